@@ -16,7 +16,7 @@ def run_experiment():
 
     optimizee_parameters = MNISTOptimizeeParameters(n_hidden=10, seed=optimizee_seed, use_small_mnist=True)
     ## Innerloop simulator
-    optimizee = MNISTOptimizee(traj, optimizee_parameters)
+    optimizee = MNISTOptimizee(traj, optimizee_parameters, data_path=experiment.paths.data_path)
 
     ## Outerloop optimizer initialization
     optimizer_seed = 1234
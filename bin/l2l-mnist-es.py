@@ -14,7 +14,7 @@ def run_experiment():
     optimizee_seed = 200
     optimizee_parameters = MNISTOptimizeeParameters(n_hidden=10, seed=optimizee_seed, use_small_mnist=True)
     ## Innerloop simulator
-    optimizee = MNISTOptimizee(traj, optimizee_parameters)
+    optimizee = MNISTOptimizee(traj, optimizee_parameters, data_path=experiment.paths.data_path)
 
     ## Outerloop optimizer initialization
     optimizer_seed = 1234
@@ -39,6 +39,8 @@ def run_experiment():
     experiment.run_experiment(optimizer=optimizer, optimizee=optimizee,
                               optimizer_parameters=optimizer_parameters,
                               optimizee_parameters=optimizee_parameters)
+    # The best individual is scored once on the images held out of the fitness evaluation
+    print("Held-out accuracy of the best individual:", optimizee.score_held_out(optimizer.best_individual))
     # End experiment
     experiment.end_experiment(optimizer)
 
@@ -70,6 +70,26 @@ class FunctionGenerator:
 
         return res
 
+    def cost_function_batch(self, xs, random_state=None):
+        """It gets the values of the function for a whole population at once. If the function includes noise,
+        the `random_state` parameter must be specified
+
+        :param xs: matrix of shape (n, dims) containing one input vector per row
+        :param ~numpy.random.RandomState random_state: The random generator used to generate the
+            noise for the function.
+        :return: array of length n with the value of the function for every row of `xs`
+        """
+        xs = np.atleast_2d(np.asarray(xs, dtype=float))
+        res = np.zeros(xs.shape[0])
+        for f in self.gen_functions:
+            res += f(xs)
+
+        if self.noise:
+            assert isinstance(random_state, np.random.RandomState)
+            res += random_state.normal(self.mu, self.sigma, size=xs.shape[0])
+
+        return res
+
     def get_params(self):
         fg_params = []
         for param in self.function_parameters:
@@ -93,8 +113,9 @@ class Function(ABC):
     @abstractmethod
     def __call__(self, x):
         """
-        :param x: input data vector with length equal to the function dimensionality
-        :return: the resulting scalar output of the function
+        :param x: input data vector with length equal to the function dimensionality, or a matrix of shape
+            (n, dims) with one input vector per row. The functions broadcast over the leading dimensions.
+        :return: the resulting scalar output of the function, or an array of length n for a matrix input
         """
         pass
 
@@ -140,10 +161,9 @@ class Shekel(Function):
 
     def __call__(self, x):
         x = np.array(x)
-        value = 0
-        for i in range(self.A.shape[0]):
-            sum_diff_sq = np.sum((x - self.A[i]) ** 2 + self.c[i]) ** -1
-            value += sum_diff_sq
+        # Differences to all minima at once, shape (..., m, dims)
+        diff_sq = (x[..., np.newaxis, :] - self.A) ** 2 + self.c[:, np.newaxis]
+        value = np.sum(np.sum(diff_sq, axis=-1) ** -1, axis=-1)
         return -value
 
 
@@ -178,7 +198,7 @@ class Michalewicz(Function):
         i = np.arange(1, self.dims + 1)
         a = (i * x ** 2) / np.pi
         b = np.sin(a) ** (2 * self.m)
-        value = -np.sum(np.sin(x) * b)
+        value = -np.sum(np.sin(x) * b, axis=-1)
         return value
 
 
@@ -221,10 +241,9 @@ class Langermann(Function):
 
     def __call__(self, x):
         x = np.array(x)
-        value = 0
-        for i in range(self.A.shape[0]):
-            sum_diff_sq = np.sum((x - self.A[i]) ** 2)
-            value += self.c[i] * np.exp((-1 / np.pi) * sum_diff_sq) * np.cos(np.pi * sum_diff_sq)
+        # Squared distances to all centers at once, shape (..., m)
+        sum_diff_sq = np.sum((x[..., np.newaxis, :] - self.A) ** 2, axis=-1)
+        value = np.sum(self.c * np.exp((-1 / np.pi) * sum_diff_sq) * np.cos(np.pi * sum_diff_sq), axis=-1)
         return value
 
 
@@ -248,7 +267,7 @@ class Easom(Function):
         x = np.array(x)
         cos_x = np.cos(x)
         x_min_pi = (x - np.pi) ** 2
-        value = -cos_x.prod() * np.exp(-np.sum(x_min_pi))
+        value = -cos_x.prod(axis=-1) * np.exp(-np.sum(x_min_pi, axis=-1))
         return value
 
 
@@ -284,10 +303,11 @@ class Permutation(Function):
 
     def __call__(self, x):
         x = np.array(x)
-        ks = np.array(range(1, self.dims + 1))
-        i = np.array(range(1, self.dims + 1))
-        value = np.array([np.sum((i ** k + self.beta) * ((x / i) ** k - 1), axis=0) for k in ks])
-        value = np.sum(value ** 2)
+        # The exponents k index the rows and the coordinates i the columns, shape (..., dims, dims)
+        ks = np.arange(1, self.dims + 1).reshape(-1, 1)
+        i = np.arange(1, self.dims + 1)
+        value = np.sum((i ** ks + self.beta) * ((x[..., np.newaxis, :] / i) ** ks - 1), axis=-1)
+        value = np.sum(value ** 2, axis=-1)
         return value
 
 
@@ -319,11 +339,14 @@ class Gaussian(Function):
         self.sigma = sigma
         self.mean = mean
         self.bound = [-5, 5]
+        # Computed once instead of on every call
+        self.sigma_inv = np.linalg.inv(np.atleast_2d(sigma))
+        self.norm = 1 / np.sqrt((2 * np.pi) ** self.dims * np.linalg.det(np.atleast_2d(sigma)))
 
     def __call__(self, x):
         x = np.array(x)
-        value = 1 / np.sqrt((2 * np.pi) ** self.dims * np.linalg.det(self.sigma))
-        value = value * np.exp(-0.5 * (np.transpose(x - self.mean).dot(np.linalg.inv(self.sigma))).dot((x - self.mean)))
+        diff = x - self.mean
+        value = self.norm * np.exp(-0.5 * np.sum(diff.dot(self.sigma_inv) * diff, axis=-1))
         return -value
 
 
@@ -344,7 +367,7 @@ class Rastrigin(Function):
 
     def __call__(self, x):
         x = np.array(x)
-        return np.sum(x ** 2 + 10 - 10 * np.cos(2 * np.pi * x))
+        return np.sum(x ** 2 + 10 - 10 * np.cos(2 * np.pi * x), axis=-1)
 
 
 RosenbrockParameters = namedtuple('RosenbrockParameters', [])
@@ -364,10 +387,10 @@ class Rosenbrock(Function):
 
     def __call__(self, x):
         x = np.array(x)
-        x_1 = x[1:self.dims]
-        x_0 = x[0:self.dims - 1]
+        x_1 = x[..., 1:self.dims]
+        x_0 = x[..., 0:self.dims - 1]
         value = 100 * (x_1 - x_0 ** 2) ** 2 + (1 - x_0) ** 2
-        value = sum(value)
+        value = np.sum(value, axis=-1)
         return value
 
 
@@ -389,8 +412,8 @@ class Ackley(Function):
 
     def __call__(self, x):
         x = np.array(x)
-        return np.exp(1) + 20 - 20 * np.exp(-0.2 * np.sqrt(np.sum(x ** 2) / self.dims)) \
-            - np.exp(np.sum(np.cos(2 * np.pi * x)) / self.dims)
+        return np.exp(1) + 20 - 20 * np.exp(-0.2 * np.sqrt(np.sum(x ** 2, axis=-1) / self.dims)) \
+            - np.exp(np.sum(np.cos(2 * np.pi * x), axis=-1) / self.dims)
 
 
 ChasmParameters = namedtuple('ChasmParameters', [])
@@ -413,4 +436,4 @@ class Chasm(Function):
 
     def __call__(self, x):
         x = np.array(x)
-        return 1e3 * np.abs(x[0]) / (1e3 * np.abs(x[0]) + 1) + 1e-2 * np.abs(x[1])
+        return 1e3 * np.abs(x[..., 0]) / (1e3 * np.abs(x[..., 0]) + 1) + 1e-2 * np.abs(x[..., 1])
@@ -20,6 +20,7 @@ class FunctionGeneratorOptimizee(Optimizee):
         super().__init__(traj)
 
         seed = np.uint32(seed)
+        self.seed = seed
         self.random_state = np.random.RandomState(seed=seed)
 
         self.fg_instance = fg_instance
@@ -48,6 +49,23 @@ class FunctionGeneratorOptimizee(Optimizee):
         """
         return {'coords': np.clip(individual['coords'], a_min=self.bound[0], a_max=self.bound[1])}
 
+    @property
+    def deterministic(self):
+        """
+        False if the function generator adds noise to the function values
+        """
+        return not self.fg_instance.noise
+
+    def cache_identity(self):
+        """
+        Identifies the optimizee by the functions, the dimensions and the noise of the function generator and by the
+        seed
+        """
+        fg = self.fg_instance
+        return '{}.{}(functions={!r}, dims={}, noise={}, mu={}, sigma={}, seed={})'.format(
+            type(self).__module__, type(self).__qualname__, fg.function_parameters, fg.dims, fg.noise, fg.mu, fg.sigma,
+            self.seed)
+
     def simulate(self, traj):
         """
         Returns the value of the function chosen during initialization
@@ -60,3 +78,15 @@ class FunctionGeneratorOptimizee(Optimizee):
 
         individual = np.array(traj.individual.coords)
         return (self.cost_fn(individual, random_state=self.random_state), )
+
+    def simulate_batch(self, traj, individuals):
+        """
+        Returns the values of the function chosen during initialization for all the individuals at once
+
+        :param ~l2l.utils.trajectory.Trajectory traj: Trajectory
+        :param individuals: list of individuals to simulate
+        :return: a list containing a single element :obj:`tuple` with the value of the function for every individual
+        """
+        coords = np.array([ind.coords for ind in individuals])
+        values = self.fg_instance.cost_function_batch(coords, random_state=self.random_state)
+        return [(value, ) for value in values]
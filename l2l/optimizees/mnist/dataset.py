@@ -0,0 +1,78 @@
+import logging
+import os
+
+import numpy as np
+from sklearn.datasets import load_digits, fetch_openml
+
+from l2l.utils.shared_array import SharedArray
+
+logger = logging.getLogger("optimizees.mnist.dataset")
+
+#: Version of the preprocessing, part of the names of the cache files. It has to be increased whenever the
+#: preprocessing changes so that caches written by older versions are not used anymore
+DATASET_VERSION = 1
+
+
+def cache_names(use_small_mnist):
+    """
+    Names of the cache files of a dataset, without extension
+
+    :param use_small_mnist: If True, the 8 x 8 digits of scikit-learn, else MNIST
+    :return: a tuple with the names of the images and of the targets
+    """
+    name = '{}_v{}'.format('digits' if use_small_mnist else 'mnist', DATASET_VERSION)
+    return name + '_images', name + '_targets'
+
+
+def preprocess_dataset(use_small_mnist):
+    """
+    Loads the dataset and converts it to flattened float32 images with values between 0 and 1 and integer labels.
+    The 8 x 8 digits ship with scikit-learn, MNIST is downloaded by :func:`~sklearn.datasets.fetch_openml`.
+
+    :param use_small_mnist: If True, the 8 x 8 digits of scikit-learn, else MNIST
+    :return: a tuple (images, targets) with one image per row of the images
+    """
+    if use_small_mnist:
+        # 8 x 8 images
+        mnist_digits = load_digits()
+        n_images = len(mnist_digits.images)  # 1797
+        data_images = mnist_digits.images.reshape(n_images, -1) / 16.  # -> 1797 x 64
+        data_targets = mnist_digits.target
+    else:
+        # 28 x 28 images
+        mnist_digits = fetch_openml('MNIST original')
+        data_images = np.asarray(mnist_digits.data) / 255.  # -> 70000 x 784
+        data_targets = mnist_digits.target
+    return data_images.astype(np.float32), np.asarray(data_targets).astype(np.int64)
+
+
+def load_dataset(use_small_mnist, data_path=None, offline=False):
+    """
+    Returns the preprocessed dataset, see :func:`preprocess_dataset`. If `data_path` is given, the dataset is
+    converted only once into .npy files in that directory, named after the dataset and :data:`DATASET_VERSION`. Later
+    calls, also by other experiments using the same directory, memory-map these files instead of loading and
+    converting the dataset again.
+
+    :param use_small_mnist: If True, the 8 x 8 digits of scikit-learn, else MNIST
+    :param data_path: Directory of the cache files, None to keep the dataset in memory
+    :param offline: If True, MNIST is never downloaded and a missing cache raises a :class:`FileNotFoundError`
+    :return: a tuple of :class:`~l2l.utils.shared_array.SharedArray` handles to the images and to the targets
+    """
+    if data_path is None:
+        if offline and not use_small_mnist:
+            raise FileNotFoundError("MNIST cannot be loaded offline without a data path")
+        return tuple(SharedArray(array) for array in preprocess_dataset(use_small_mnist))
+
+    images_name, targets_name = cache_names(use_small_mnist)
+    images_fname = os.path.join(data_path, images_name + '.npy')
+    targets_fname = os.path.join(data_path, targets_name + '.npy')
+    # The targets are written last, so the cache is complete if they exist
+    if os.path.isfile(targets_fname) and os.path.isfile(images_fname):
+        logger.info("Using the dataset cache %s", images_fname)
+        return SharedArray(fname=images_fname), SharedArray(fname=targets_fname)
+    if offline and not use_small_mnist:
+        raise FileNotFoundError("The MNIST cache {} is missing and cannot be created offline".format(images_fname))
+
+    data_images, data_targets = preprocess_dataset(use_small_mnist)
+    return (SharedArray.create(data_images, data_path, images_name),
+            SharedArray.create(data_targets, data_path, targets_name))
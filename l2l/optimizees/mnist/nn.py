@@ -23,6 +23,11 @@ def softmax(a):
     return exp_a / np.sum(exp_a, axis=-1)
 
 
+#: Default bound of the number of activations computed at once by :meth:`NeuralNetworkClassifier.score_population`,
+#: 32 MB in double precision
+MAX_ACTIVATIONS = 2 ** 22
+
+
 class NeuralNetworkClassifier:
     def __init__(self, n_input, n_hidden, n_output):
         """
@@ -61,6 +66,41 @@ class NeuralNetworkClassifier:
         score = n_correct / n_total
         return score
 
+    def score_population(self, hidden_weights, output_weights, x, y, dtype=None, max_activations=MAX_ACTIVATIONS):
+        """
+        Scores K networks at once. The weights of the networks are stacked along a first axis, so that every layer
+        is computed for a group of networks by a single batched matrix product. The activations of k networks for b
+        images take k x (n_hidden + n_output) x b values, so the networks, and the images if a single network
+        exceeds the bound, are processed in chunks of at most `max_activations` activations.
+
+        :param hidden_weights: K x n_hidden x n_input size
+        :param output_weights: K x n_output x n_hidden size
+        :param x: batch_size x n_input size
+        :param y: batch_size size
+        :param dtype: Optional. Data type of the computation, e.g. np.float32, by default the type of the inputs
+        :param max_activations: Optional. Bound of the number of activations computed at once
+        :return: array of the K scores
+        """
+        if dtype is not None:
+            hidden_weights = np.asarray(hidden_weights, dtype=dtype)
+            output_weights = np.asarray(output_weights, dtype=dtype)
+            x = np.asarray(x, dtype=dtype)
+        assert y.shape == (len(x),), "The shapes of x and y are %s, %s" % (x.shape, y.shape)
+        n_networks, n_total = len(hidden_weights), len(y)
+        activations_per_image = hidden_weights.shape[1] + output_weights.shape[1]
+        image_step = min(n_total, max(1, max_activations // activations_per_image))
+        network_step = max(1, max_activations // (activations_per_image * image_step))
+        n_correct = np.zeros(n_networks, dtype=int)
+        for network_start in range(0, n_networks, network_step):
+            networks = slice(network_start, network_start + network_step)
+            for image_start in range(0, n_total, image_step):
+                images = slice(image_start, image_start + image_step)
+                hidden_activation = sigmoid(np.matmul(hidden_weights[networks], x[images].T))  # -> k x n_hidden x b
+                output_activation = np.matmul(output_weights[networks], hidden_activation)  # -> k x n_output x b
+                output_labels = np.argmax(output_activation, axis=1)  # -> k x b
+                n_correct[networks] += np.count_nonzero(output_labels == y[images], axis=1)
+        return n_correct / n_total
+
 
 def main():
     from sklearn.datasets import load_digits, fetch_mldata
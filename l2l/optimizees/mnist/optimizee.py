@@ -1,12 +1,29 @@
 from collections import namedtuple
 
 import numpy as np
-from sklearn.datasets import load_digits, fetch_openml
 
 from l2l.optimizees.optimizee import Optimizee
+from .dataset import load_dataset
 from .nn import NeuralNetworkClassifier
 
-MNISTOptimizeeParameters = namedtuple('MNISTOptimizeeParameters', ['n_hidden', 'seed', 'use_small_mnist'])
+MNISTOptimizeeParameters = namedtuple('MNISTOptimizeeParameters',
+                                      ['n_hidden', 'seed', 'use_small_mnist', 'batch_size', 'n_held_out',
+                                       'use_float32'])
+MNISTOptimizeeParameters.__new__.__defaults__ = (None, 0, False)
+MNISTOptimizeeParameters.__doc__ = """
+:param n_hidden: Number of hidden units of the network
+:param seed: Random seed of the optimizee, used for the individuals, the mini-batches and the held-out split
+:param use_small_mnist: If True, the 8 x 8 digits of scikit-learn are used instead of MNIST
+:param batch_size: Optional. Number of images the individuals are scored on. Each generation draws its own
+    mini-batch, which is shared by all the individuals of the generation. By default all images are used. With
+    mini-batches, the fitness of an individual depends on its generation, so the optimizee is not
+    :attr:`~l2l.optimizees.optimizee.Optimizee.deterministic` and cannot be used with the evaluation cache of the
+    environment
+:param n_held_out: Optional. Number of images held out of the fitness evaluation, see
+    :meth:`MNISTOptimizee.score_held_out`. Default 0
+:param use_float32: Optional. If True, the networks are computed in single precision, which halves the memory traffic
+    of the forward pass. Default False
+"""
 
 
 class MNISTOptimizee(Optimizee):
@@ -20,37 +37,52 @@ class MNISTOptimizee(Optimizee):
     :param parameters:
         Instance of :func:`~collections.namedtuple` :class:`.MNISTOptimizeeParameters`
 
+    :param data_path:
+        Directory where the preprocessed dataset is cached as float32 .npy files, usually
+        :attr:`~l2l.paths.Paths.data_path`, see :func:`~l2l.optimizees.mnist.dataset.load_dataset`. The files are
+        written by the first optimizee using the directory and memory-mapped by all the later ones. The pickled
+        optimizee only holds handles to these files and the processes simulating the individuals memory-map them.
+        If None, the dataset is kept in memory and pickled along with the optimizee.
+
+    :param offline:
+        If True, MNIST is never downloaded: its cache has to exist in `data_path`
+
     """
 
-    def __init__(self, traj, parameters):
+    def __init__(self, traj, parameters, data_path=None, offline=False):
         super().__init__(traj)
 
-        if parameters.use_small_mnist:
-            # 8 x 8 images
-            mnist_digits = load_digits()
-            n_input = np.prod(mnist_digits.images.shape[1:])
-            n_images = len(mnist_digits.images)  # 1797
-            data_images = mnist_digits.images.reshape(n_images, -1) / 16.  # -> 1797 x 64
-            data_targets = mnist_digits.target
-        else:
-            # 28 x 28 images
-            mnist_digits = fetch_openml('MNIST original')
-            n_input = np.prod(mnist_digits.data.shape[1:])
-            data_images = mnist_digits.data / 255.  # -> 70000 x 284
-            n_images = len(data_images)
-            data_targets = mnist_digits.target
+        self._data_images, self._data_targets = load_dataset(parameters.use_small_mnist, data_path, offline)
+        n_images, n_input = self.data_images.shape
 
         self.n_images = n_images
-        self.data_images, self.data_targets = data_images, data_targets
+        if not 0 <= parameters.n_held_out < n_images:
+            raise ValueError("n_held_out needs to be between 0 and the number of images")
+        if parameters.batch_size is not None and parameters.batch_size < 1:
+            raise ValueError("batch_size needs to be greater than 0")
+        # Indices of the images used for the fitness and of the held-out images, drawn with their own generator so
+        # that the individuals do not depend on the split
+        split = np.random.RandomState(seed=[np.uint32(parameters.seed), 1]).permutation(n_images)
+        self.held_out_indices = np.sort(split[:parameters.n_held_out])
+        self.train_indices = np.sort(split[parameters.n_held_out:])
+        self.batch_size = parameters.batch_size
+        self._batch = None
 
         seed = parameters.seed
         n_hidden = parameters.n_hidden
 
         seed = np.uint32(seed)
+        self.seed = seed
+        self.parameters = parameters
         self.random_state = np.random.RandomState(seed=seed)
 
         n_output = 10  # This is always true for mnist
         self.nn = NeuralNetworkClassifier(n_input, n_hidden, n_output)
+        # Position of the weights of every layer in the flattened weights of an individual
+        self.weight_shapes = self.nn.get_weights_shapes()
+        boundaries = np.cumsum([0] + [int(np.prod(weight_shape)) for weight_shape in self.weight_shapes])
+        self.weight_slices = [slice(start, end) for start, end in zip(boundaries[:-1], boundaries[1:])]
+        self.dtype = np.float32 if parameters.use_float32 else None
 
         self.random_state = np.random.RandomState(seed=seed)
 
@@ -60,22 +92,45 @@ class MNISTOptimizee(Optimizee):
             traj.individual.f_add_parameter(key, val)
         traj.individual.f_add_parameter('seed', seed)
 
+    @property
+    def data_images(self):
+        """
+        The images of the dataset, one flattened image per row
+        """
+        return self._data_images.array
+
+    @property
+    def data_targets(self):
+        """
+        The labels of the images
+        """
+        return self._data_targets.array
+
+    def batch_indices(self, generation):
+        """
+        Returns the indices of the images on which the individuals of a generation are scored. The mini-batch of a
+        generation only depends on the seed of the optimizee and the generation, so all the processes simulating
+        individuals of the generation use the same images.
+
+        :param generation: The generation of the individual
+        :return: sorted array of image indices
+        """
+        if self.batch_size is None or self.batch_size >= len(self.train_indices):
+            return self.train_indices
+        if self._batch is None or self._batch[0] != generation:
+            random_state = np.random.RandomState(seed=[np.uint32(self.seed), 2, generation])
+            batch = random_state.choice(len(self.train_indices), self.batch_size, replace=False)
+            self._batch = (generation, self.train_indices[np.sort(batch)])
+        return self._batch[1]
+
     def create_individual(self):
         """
         Creates a random value of parameter within given bounds
         """
 
-        weight_shapes = self.nn.get_weights_shapes()
-        cumulative_num_weights_per_layer = np.cumsum([np.prod(weight_shape) for weight_shape in weight_shapes])
-
-        flattened_weights = np.empty(cumulative_num_weights_per_layer[-1])
-        for i, weight_shape in enumerate(weight_shapes):
-            if i == 0:
-                flattened_weights[:cumulative_num_weights_per_layer[i]] = \
-                    self.random_state.randn(np.prod(weight_shape)) / np.sqrt(weight_shape[1])
-            else:
-                flattened_weights[cumulative_num_weights_per_layer[i - 1]:cumulative_num_weights_per_layer[i]] = \
-                    self.random_state.randn(np.prod(weight_shape)) / np.sqrt(weight_shape[1])
+        flattened_weights = np.empty(self.weight_slices[-1].stop)
+        for weight_slice, weight_shape in zip(self.weight_slices, self.weight_shapes):
+            flattened_weights[weight_slice] = self.random_state.randn(np.prod(weight_shape)) / np.sqrt(weight_shape[1])
 
         # return dict(weights=self.random_state.randn(cumulative_num_weights_per_layer[-1]))
         return dict(weights=flattened_weights)
@@ -86,29 +141,86 @@ class MNISTOptimizee(Optimizee):
         """
         return individual
 
+    @property
+    def deterministic(self):
+        """
+        False if the individuals are scored on mini-batches which change with the generation
+        """
+        return self.batch_size is None or self.batch_size >= len(self.train_indices)
+
+    def cache_identity(self):
+        """
+        Identifies the optimizee by its parameters, which include the seed
+        """
+        return '{}.{}({!r})'.format(type(self).__module__, type(self).__qualname__, self.parameters)
+
+    def stack_weights(self, flattened_weights):
+        """
+        Splits the flattened weights of K individuals into the weights of the layers of the network
+
+        :param flattened_weights: K x n_weights array, one row per individual
+        :return: a list with a K x n_rows x n_columns array for each layer of the network
+        """
+        flattened_weights = np.asarray(flattened_weights)
+        n_individuals = len(flattened_weights)
+        return [flattened_weights[:, weight_slice].reshape((n_individuals,) + weight_shape)
+                for weight_slice, weight_shape in zip(self.weight_slices, self.weight_shapes)]
+
+    def score_population(self, flattened_weights, indices):
+        """
+        Scores K individuals at once on a subset of the images
+
+        :param flattened_weights: K x n_weights array, one row per individual
+        :param indices: Indices of the images used for the score
+        :return: array of the K accuracies
+        """
+        hidden_weights, output_weights = self.stack_weights(flattened_weights)
+        if len(indices) == self.n_images:
+            images, targets = self.data_images, self.data_targets
+        else:
+            images, targets = self.data_images[indices], self.data_targets[indices]
+        return self.nn.score_population(hidden_weights, output_weights, images, targets, dtype=self.dtype)
+
     def simulate(self, traj):
         """
-        Returns the value of the function chosen during initialization
+        Returns the accuracy of the network of the individual on the mini-batch of its generation
 
         :param ~l2l.utils.trajectory.Trajectory traj: Trajectory
-        :return: a single element :obj:`tuple` containing the value of the chosen function
+        :return: the accuracy
         """
         # configure_loggers(exactly_once=True)  # logger configuration is here since this function is paralellised
         # taken care of by jube
 
-        flattened_weights = traj.individual.weights
-        weight_shapes = self.nn.get_weights_shapes()
+        indices = self.batch_indices(traj.individual.generation)
+        return float(self.score_population([traj.individual.weights], indices)[0])
 
-        cumulative_num_weights_per_layer = np.cumsum([np.prod(weight_shape) for weight_shape in weight_shapes])
+    def simulate_batch(self, traj, individuals):
+        """
+        Returns the accuracies of all the individuals, computed for all the individuals of a generation at once
 
-        weights = []
-        for i, weight_shape in enumerate(weight_shapes):
-            if i == 0:
-                w = flattened_weights[:cumulative_num_weights_per_layer[i]].reshape(weight_shape)
-            else:
-                w = flattened_weights[
-                    cumulative_num_weights_per_layer[i - 1]:cumulative_num_weights_per_layer[i]].reshape(weight_shape)
-            weights.append(w)
+        :param ~l2l.utils.trajectory.Trajectory traj: Trajectory
+        :param individuals: list of individuals to simulate
+        :return: a list with the accuracy of every individual
+        """
+        positions = {}
+        for i, ind in enumerate(individuals):
+            positions.setdefault(ind.generation, []).append(i)
+        fitnesses = [None] * len(individuals)
+        # The individuals of a generation share their mini-batch
+        for generation, generation_positions in positions.items():
+            scores = self.score_population([individuals[i].weights for i in generation_positions],
+                                           self.batch_indices(generation))
+            for i, score in zip(generation_positions, scores):
+                fitnesses[i] = float(score)
+        return fitnesses
+
+    def score_held_out(self, individual):
+        """
+        Scores an individual, usually the best one of the run, on the held-out images, or on all images if
+        `n_held_out` is 0
 
-        self.nn.set_weights(*weights)
-        return self.nn.score(self.data_images, self.data_targets)
+        :param individual: The individual dictionary, as returned by :meth:`create_individual`
+        :return: the accuracy
+        """
+        indices = self.held_out_indices if len(self.held_out_indices) else np.arange(self.n_images)
+        return float(self.score_population([individual['weights']], indices)[0])
@@ -41,3 +41,41 @@ class Optimizee:
             multi-dimensional fitness function.
 
         """
+
+    def simulate_batch(self, traj, individuals):
+        """
+        Simulates a list of individuals in a single call. Optimizees which can evaluate a whole population at once
+        (e.g. with vectorized numpy code) should override this function; the environment then uses it to run a
+        generation in one call. The default implementation falls back to calling :meth:`simulate` for every
+        individual.
+
+        :param  ~l2l.utils.trajectory.Trajectory traj: The trajectory that contains the parameters
+        :param individuals: list of :class:`~l2l.utils.individual.Individual` objects to simulate
+
+        :return: a list with the fitness :class:`tuple` of every individual, in the order of `individuals`
+        """
+        fitnesses = []
+        for ind in individuals:
+            traj.individual = ind
+            fitnesses.append(self.simulate(traj))
+        return fitnesses
+
+    @property
+    def deterministic(self):
+        """
+        Whether :meth:`simulate` always returns the same fitness for the same individual. The evaluation cache and the
+        deduplication of the environment reuse fitnesses between individuals and refuse optimizees for which this is
+        False. The default implementation returns True.
+        """
+        return True
+
+    def cache_identity(self):
+        """
+        Identifies the optimizee in the keys of the :class:`~l2l.utils.evaluation_cache.EvaluationCache`. Two
+        optimizees with the same identity must return the same fitness for the same individual, so the identity has to
+        include the configuration of the optimizee and its seed. The default implementation uses the class of the
+        optimizee and its `seed` attribute.
+
+        :return: a string identifying the optimizee
+        """
+        return '{}.{}(seed={})'.format(type(self).__module__, type(self).__qualname__, getattr(self, 'seed', None))
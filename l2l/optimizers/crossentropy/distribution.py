@@ -1,12 +1,37 @@
 import abc
 import logging
+import time
+import warnings
 from abc import ABCMeta
 
 import numpy as np
 import sklearn.mixture
+from sklearn.exceptions import ConvergenceWarning
 
 logger = logging.getLogger('optimizers.crossentropy.distribution')
 
+#: Forms of the covariance matrix of :class:`Gaussian`
+COVARIANCE_TYPES = ('full', 'diag', 'low_rank')
+
+
+def _cholesky_update(factor, vector):
+    """
+    Rank-1 update of a triangular factor in O(d^2): turns the upper triangular `factor` R in place into the
+    triangular factor of :math:`R^T R + x x^T`, with `vector` x, by Givens rotations of the rows of R with x. A zero
+    diagonal, e.g. of a singular R, is handled.
+
+    :param factor: d x d upper triangular array, updated in place
+    :param vector: vector of size d, overwritten
+    """
+    for k in range(len(vector)):
+        radius = np.hypot(factor[k, k], vector[k])
+        if radius == 0:
+            continue
+        cos, sin = factor[k, k] / radius, vector[k] / radius
+        row = factor[k, k:].copy()
+        factor[k, k:] = cos * row + sin * vector[k:]
+        vector[k:] = cos * vector[k:] - sin * row
+
 
 class Distribution(metaclass=ABCMeta):
     """
@@ -57,12 +82,35 @@ class Distribution(metaclass=ABCMeta):
 class Gaussian(Distribution):
     """
     Gaussian distribution.
+
+    The distribution keeps a factor `F` of its covariance matrix instead of the matrix itself, such that the
+    covariance is :math:`F^T F + diag(v)`, and samples through this factor, so the covariance is never formed nor
+    factorized. The factor is updated from the previous factor and the deviations of the new samples from their mean.
+
+    :param covariance_type: Form of the covariance matrix:
+
+      - `full`: a full covariance matrix, its factor `F` is triangular and :math:`v = 0`. A fit with n samples in d
+        dimensions scales `F` by the square root of the smoothing and applies one rank-1 update per sample, in
+        :math:`O(n d^2)`
+      - `diag`: a diagonal covariance matrix :math:`diag(v)`, without factor `F`
+      - `low_rank`: the `rank` main directions of the covariance in `F` plus the variance left over in the diagonal
+        `v`. Neither of the last two forms needs memory quadratic in the number of dimensions
+
+    :param rank: Number of rows of `F` for the `low_rank` covariance
     """
 
-    def __init__(self):
+    def __init__(self, covariance_type='full', rank=None):
+        if covariance_type not in COVARIANCE_TYPES:
+            raise ValueError("Unknown covariance type {}, expected one of {}".format(covariance_type,
+                                                                                     COVARIANCE_TYPES))
+        if covariance_type == 'low_rank' and (rank is None or rank < 1):
+            raise ValueError("rank needs to be greater than 0 for a low_rank covariance")
+        self.covariance_type = covariance_type
+        self.rank = rank if covariance_type == 'low_rank' else None
         self.random_state = None
         self.mean = None
-        self.cov = None
+        self.factor = None
+        self.variances = None
 
     def init_random_state(self, random_state):
         assert self.random_state is None, "The random_state has already been set for the distribution"
@@ -70,7 +118,10 @@ class Gaussian(Distribution):
         self.random_state = random_state
 
     def get_params(self):
-        params_dict_items = [("distribution_name", self.__class__.__name__)]
+        params_dict_items = [("distribution_name", self.__class__.__name__),
+                             ("covariance_type", self.covariance_type)]
+        if self.rank is not None:
+            params_dict_items.append(("rank", self.rank))
         return dict(params_dict_items)
 
     def fit(self, data_list, smooth_update=0):
@@ -87,20 +138,58 @@ class Gaussian(Distribution):
             "The random_state for the distribution has not been set, call the" \
             " 'init_random_state' member function to set it"
 
-        mean = np.mean(data_list, axis=0)
-        cov_mat = np.cov(data_list, rowvar=False)
+        data = np.asarray(data_list, dtype=np.float64)
+        mean = np.mean(data, axis=0)
+        # The sample covariance matrix of the data is deviations^T deviations
+        deviations = (data - mean) / np.sqrt(len(data) - 1)
 
         if self.mean is None:
+            # Nothing to smooth with
+            smooth_update = 0
             self.mean = mean
-            self.cov = cov_mat
+            n_factor_rows = len(mean) if self.covariance_type == 'full' else 0
+            self.factor = np.zeros((n_factor_rows, len(mean)))
+            self.variances = np.zeros(len(mean))
 
         self.mean = smooth_update * self.mean + (1 - smooth_update) * mean
-        self.cov = smooth_update * self.cov + (1 - smooth_update) * cov_mat
+        self.variances = smooth_update * self.variances
+        if self.covariance_type == 'full':
+            # F^T F becomes smooth_update * F^T F + (1 - smooth_update) * deviations^T deviations
+            # A new array, as the factor of the previous fit is part of its returned parametrization
+            self.factor = np.sqrt(smooth_update) * self.factor
+            for deviation in np.sqrt(1 - smooth_update) * deviations:
+                _cholesky_update(self.factor, deviation)
+        elif self.covariance_type == 'diag':
+            self.variances += (1 - smooth_update) * np.sum(deviations ** 2, axis=0)
+        else:
+            # The smoothed covariance is stacked^T stacked + smooth_update * diag(variances)
+            stacked = np.vstack([np.sqrt(smooth_update) * self.factor, np.sqrt(1 - smooth_update) * deviations])
+            _, singular_values, directions = np.linalg.svd(stacked, full_matrices=False)
+            components = singular_values[:, np.newaxis] * directions
+            self.factor = components[:self.rank]
+            # Keeps the variance of the discarded directions, so the diagonal of the covariance is exact
+            self.variances += np.sum(components[self.rank:] ** 2, axis=0)
 
         logger.debug('Gaussian center\n%s', self.mean)
-        logger.debug('Gaussian cov\n%s', self.cov)
+        logger.debug('Gaussian covariance factor\n%s', self.factor)
+
+        return self._covariance_parameters(self.variances)
+
+    def _covariance_parameters(self, variances):
+        """
+        Describes the current parametrization by the factor of the covariance and the diagonal `variances` added to it
+        """
+        return {'mean': self.mean, 'covariance_factor': self.factor, 'covariance_diagonal': variances}
 
-        return {'mean': self.mean, 'covariance_matrix': self.cov}
+    def _sample(self, n_individuals, variances):
+        """
+        Samples through the factor of the covariance, with the diagonal `variances` added to the covariance
+        """
+        individuals = self.mean + np.dot(self.random_state.standard_normal((n_individuals, len(self.factor))),
+                                         self.factor)
+        if np.any(variances):
+            individuals += np.sqrt(variances) * self.random_state.standard_normal((n_individuals, len(self.mean)))
+        return individuals
 
     def sample(self, n_individuals):
         """Sample n_individuals individuals under the current parametrization
@@ -112,7 +201,7 @@ class Gaussian(Distribution):
         assert self.random_state is not None, \
             "The random_state for the distribution has not been set, call the" \
             " 'init_random_state' member function to set it"
-        return self.random_state.multivariate_normal(self.mean, self.cov, n_individuals)
+        return self._sample(n_individuals, self.variances)
 
 
 class BayesianGaussianMixture(Distribution):
@@ -124,15 +213,23 @@ class BayesianGaussianMixture(Distribution):
     number of active modes present in the given data.
 
     :param n_components: components of the mixture model
+    :param warm_start: If True, every fit after the first one starts from the parameters of the previous fit, i.e.
+        the means, precisions and weights of the components, instead of a new initialization. As the elite
+        individuals change little from one generation to the next, a few EM iterations are then enough
+    :param warm_start_max_iter: Maximal number of EM iterations of a warm-started fit
     :param kwargs: Additional arguments that get passed on to :class:`sklearn.mixture.BayesianGaussianMixture`
     """
 
-    def __init__(self, n_components=2, **kwargs):
+    def __init__(self, n_components=2, warm_start=False, warm_start_max_iter=10, **kwargs):
         self.random_state = None
         self.bayesian_mixture = sklearn.mixture.BayesianGaussianMixture(
-            n_components,
+            n_components=n_components,
             weight_concentration_prior_type='dirichlet_distribution',
             random_state=self.random_state, **kwargs)
+        self.warm_start = warm_start
+        self.warm_start_max_iter = warm_start_max_iter
+        # Iterations of the first fit
+        self.max_iter = self.bayesian_mixture.max_iter
         # taken from check_fitted function of BaysianGaussianMixture in the sklearn repository
         self.parametrization = ('covariances_', 'means_', 'weight_concentration_', 'weights_',
                                 'mean_precision_', 'degrees_of_freedom_', 'precisions_', 'precisions_cholesky_')
@@ -161,7 +258,9 @@ class BayesianGaussianMixture(Distribution):
 
     def get_params(self):
         params_dict_items = [("distribution_name", self.__class__.__name__),
-                             ("n_components", self.n_components)]
+                             ("n_components", self.n_components),
+                             ("warm_start", self.warm_start),
+                             ("warm_start_max_iter", self.warm_start_max_iter)]
         return dict(params_dict_items)
 
     def fit(self, data_list, smooth_update=0):
@@ -171,16 +270,27 @@ class BayesianGaussianMixture(Distribution):
         :param data_list: list or numpy array with individuals as rows
         :param smooth_update: determines to which extent the new samples account for the
             new distribution.
-        :return: dict specifiying current parametrization
+        :return: dict specifiying current parametrization, along with the duration `fit_time` of the fit in
+            seconds and its number of EM iterations `n_iter`
         """
         assert self.random_state is not None, \
             "The random_state for the distribution has not been set, call the" \
             " 'init_random_state' member function to set it"
 
         old = self.bayesian_mixture
-        self.bayesian_mixture.fit(data_list)
+        warm_start = self.warm_start and hasattr(self.bayesian_mixture, 'converged_')
+        self.bayesian_mixture.warm_start = warm_start
+        self.bayesian_mixture.max_iter = self.warm_start_max_iter if warm_start else self.max_iter
+        start_time = time.time()
+        with warnings.catch_warnings():
+            if warm_start:
+                # A warm-started fit is expected to stop at the iteration cap before converging
+                warnings.simplefilter('ignore', ConvergenceWarning)
+            self.bayesian_mixture.fit(data_list)
+        fit_time = time.time() - start_time
+        logger.debug('Fitted the mixture in %d iterations and %.3f s', self.bayesian_mixture.n_iter_, fit_time)
         self._postprocess_fitted(self.bayesian_mixture)
-        distribution_parameters = dict()
+        distribution_parameters = dict(fit_time=fit_time, n_iter=self.bayesian_mixture.n_iter_)
 
         # smooth update and fill out distribution parameters dict to return
         # distribution parameters can also be tuples of ndarray
@@ -296,10 +406,13 @@ class NoisyGaussian(Gaussian):
         the coordinates. The noise applied to each coordinate `i` is
         `noise_magnitude*coordinate_scale[i]`
     :param noise_decay: Multiplicative decay of the noise components
+    :param covariance_type: Form of the covariance matrix, see :class:`.Gaussian`
+    :param rank: Number of directions of the `low_rank` covariance, see :class:`.Gaussian`
     """
 
-    def __init__(self, noise_magnitude=1.0, coordinate_scale=None, noise_decay=0.95):
-        Gaussian.__init__(self)
+    def __init__(self, noise_magnitude=1.0, coordinate_scale=None, noise_decay=0.95, covariance_type='full',
+                 rank=None):
+        Gaussian.__init__(self, covariance_type, rank)
         self.noise_decay = noise_decay
         self.noise_magnitude = np.float64(noise_magnitude)
         if coordinate_scale is None:
@@ -308,7 +421,6 @@ class NoisyGaussian(Gaussian):
             self.coordinate_scale = np.array(coordinate_scale).astype(np.float64)
         self.current_noise_magnitude = self.noise_magnitude
         self.noise_value = None  # vector containing the 
-        self.noisy_cov = None
 
     def get_params(self):
         params_dict = super().get_params()
@@ -335,15 +447,17 @@ class NoisyGaussian(Gaussian):
             " 'init_random_state' member function to set it"
 
         Gaussian.fit(self, data_list, smooth_update)
-        n_dims = self.cov.shape[0]
+        n_dims = len(self.mean)
         self.noise_value = np.abs(
             self.random_state.normal(loc=0.0, scale=self.current_noise_magnitude * self.coordinate_scale,
                                      size=n_dims))
-        self.noisy_cov = self.cov + np.diag(self.noise_value)
         self.current_noise_magnitude *= self.noise_decay
 
-        logger.debug('Noisy cov\n%s', self.noisy_cov)
-        return {'mean': self.mean, 'covariance_matrix': self.noisy_cov, 'noise_value': self.noise_value}
+        logger.debug('Noise value\n%s', self.noise_value)
+        # The noise is added to the diagonal of the covariance
+        distribution_parameters = self._covariance_parameters(self.variances + self.noise_value)
+        distribution_parameters['noise_value'] = self.noise_value
+        return distribution_parameters
 
     def sample(self, n_individuals):
         """
@@ -355,4 +469,5 @@ class NoisyGaussian(Gaussian):
             "The random_state for the distribution has not been set, call the" \
             " 'init_random_state' member function to set it"
 
-        return self.random_state.multivariate_normal(self.mean, self.noisy_cov, n_individuals)
+        # The noise is added to the diagonal of the covariance
+        return self._sample(n_individuals, self.variances + self.noise_value)
@@ -1,7 +1,9 @@
 from .optimizer import GeneticAlgorithmParameters
 from .optimizer import GeneticAlgorithmOptimizer
+from .vectorized import VectorizedGeneticAlgorithmOptimizer
 
 __all__ = [
     'GeneticAlgorithmParameters',
     'GeneticAlgorithmOptimizer',
+    'VectorizedGeneticAlgorithmOptimizer',
 ]
@@ -8,6 +8,7 @@ from deap.tools import HallOfFame
 
 from l2l import dict_to_list, list_to_dict
 from l2l.optimizers.optimizer import Optimizer
+from l2l.utils.population import Population
 
 logger = logging.getLogger("l2l-ga")
 
@@ -39,6 +40,9 @@ class GeneticAlgorithmOptimizer(Optimizer):
       needed by the Optimizer
     """
 
+    # Individuals without a result keep an invalid fitness, rank below all others and are evaluated again
+    supports_partial_results = True
+
     def __init__(self, traj,
                  optimizee_create_individual,
                  optimizee_fitness_weights,
@@ -61,6 +65,29 @@ class GeneticAlgorithmOptimizer(Optimizer):
         traj.f_add_parameter('indpb', parameters.indpb, comment='Mutation parameter')
         traj.f_add_parameter('tournsize', parameters.tournsize, comment='Selection parameter')
 
+        toolbox = self._create_toolbox()
+
+        # ------- Initialize Population and Trajectory -------- #
+        # NOTE: The Individual object implements the list interface.
+        self.pop = toolbox.population(n=traj.popsize)
+        self.eval_pop_inds = [ind for ind in self.pop if not ind.fitness.valid]
+        self.eval_pop = Population(self.eval_pop_inds, self.optimizee_individual_dict_spec)
+
+        self.g = 0  # the current generation
+        self.toolbox = toolbox  # the DEAP toolbox
+        self.hall_of_fame = HallOfFame(20)
+        self.best_individual = None
+        # Individuals being evaluated in the asynchronous mode, indexed by ind_idx
+        self.in_flight = None
+        self.n_submitted = 0
+
+        self._expand_trajectory(traj)
+
+    def _create_toolbox(self):
+        """
+        Creates the DEAP types and registers the DEAP functions in a new toolbox
+        """
+        parameters = self.parameters
         # ------- Create and register functions with DEAP ------- #
         # delay_rate, slope, std_err, max_fraction_active
         creator.create("FitnessMax", base.Fitness, weights=self.optimizee_fitness_weights)
@@ -69,7 +96,7 @@ class GeneticAlgorithmOptimizer(Optimizer):
         toolbox = base.Toolbox()
         # Structure initializers
         toolbox.register("individual", tools.initIterate, creator.Individual,
-                         lambda: dict_to_list(optimizee_create_individual()))
+                         lambda: dict_to_list(self.optimizee_create_individual()))
         toolbox.register("population", tools.initRepeat, list, toolbox.individual)
 
         # Operator registering
@@ -94,23 +121,42 @@ class GeneticAlgorithmOptimizer(Optimizer):
 
         toolbox.register("mate", tools.cxBlend, alpha=parameters.matepar)
         toolbox.decorate("mate", bounding_decorator)
-        toolbox.register("mutate", tools.mutGaussian, mu=0, sigma=parameters.mutpar, indpb=traj.indpb)
+        toolbox.register("mutate", tools.mutGaussian, mu=0, sigma=parameters.mutpar, indpb=parameters.indpb)
         toolbox.decorate("mutate", bounding_decorator)
-        toolbox.register("select", tools.selTournament, tournsize=traj.tournsize)
-
-        # ------- Initialize Population and Trajectory -------- #
-        # NOTE: The Individual object implements the list interface.
-        self.pop = toolbox.population(n=traj.popsize)
+        toolbox.register("select", tools.selTournament, tournsize=parameters.tournsize)
+        return toolbox
+
+    def __getstate__(self):
+        # Neither the toolbox nor the DEAP individuals, whose classes are created at runtime, can be pickled. The
+        # individuals are stored as (genes, weighted fitness) tuples and restored by __setstate__
+        state = self.__dict__.copy()
+        del state['toolbox']
+        del state['eval_pop_inds']
+        state['pop'] = [(list(ind), ind.fitness.wvalues) for ind in self.pop]
+        state['hall_of_fame'] = (self.hall_of_fame.maxsize,
+                                 [(list(ind), ind.fitness.wvalues) for ind in self.hall_of_fame])
+        if self.in_flight is not None:
+            state['in_flight'] = {ind_idx: (list(ind), ind.fitness.wvalues) for ind_idx, ind in self.in_flight.items()}
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.toolbox = self._create_toolbox()
+
+        def restore(genes, wvalues):
+            individual = creator.Individual(genes)
+            individual.fitness.wvalues = wvalues
+            return individual
+
+        self.pop = [restore(*ind) for ind in state['pop']]
         self.eval_pop_inds = [ind for ind in self.pop if not ind.fitness.valid]
-        self.eval_pop = [list_to_dict(ind, self.optimizee_individual_dict_spec)
-                         for ind in self.eval_pop_inds]
-
-        self.g = 0  # the current generation
-        self.toolbox = toolbox  # the DEAP toolbox
-        self.hall_of_fame = HallOfFame(20)
-        self.best_individual = None
-
-        self._expand_trajectory(traj)
+        maxsize, hall_of_fame = state['hall_of_fame']
+        self.hall_of_fame = HallOfFame(maxsize)
+        # Inserting from the worst to the best individual restores the original order
+        for ind in reversed(hall_of_fame):
+            self.hall_of_fame.insert(restore(*ind))
+        if self.in_flight is not None:
+            self.in_flight = {ind_idx: restore(*ind) for ind_idx, ind in state['in_flight'].items()}
 
     def post_process(self, traj, fitnesses_results):
         """
@@ -140,13 +186,15 @@ class GeneticAlgorithmOptimizer(Optimizer):
         traj.v_idx = -1  # set the trajectory back to default
 
         logger.info("-- End of generation {} --".format(self.g))
-        best_inds = tools.selBest(self.eval_pop_inds, 2)
-        self.best_individual = list_to_dict(best_inds[0], self.optimizee_individual_dict_spec)
+        evaluated_inds = [ind for ind in self.eval_pop_inds if ind.fitness.valid]
+        best_inds = tools.selBest(evaluated_inds, 2)
+        if best_inds:
+            self.best_individual = list_to_dict(best_inds[0], self.optimizee_individual_dict_spec)
         for best_ind in best_inds:
             print("Best individual is %s, %s" % (list_to_dict(best_ind, self.optimizee_individual_dict_spec),
                                                  best_ind.fitness.values))
 
-        self.hall_of_fame.update(self.eval_pop_inds)
+        self.hall_of_fame.update(evaluated_inds)
 
         logger.info("-- Hall of fame --")
         for hof_ind in tools.selBest(self.hall_of_fame, 2):
@@ -174,23 +222,75 @@ class GeneticAlgorithmOptimizer(Optimizer):
 
             if len(set(map(tuple, offspring))) < len(offspring):
                 logger.info("Mutating more")
-                for i, o1 in enumerate(offspring[:-1]):
-                    for o2 in offspring[i + 1:]:
-                        if tuple(o1) == tuple(o2):
-                            if random.random() < 0.8:
-                                self.toolbox.mutate(o2)
-                                del o2.fitness.values
+                # Offspring equal to an earlier one are found by hashing and mutated with a probability of 0.8
+                seen = set()
+                for o in offspring:
+                    if tuple(o) in seen and random.random() < 0.8:
+                        self.toolbox.mutate(o)
+                        del o.fitness.values
+                    seen.add(tuple(o))
 
             # The population is entirely replaced by the offspring
             self.pop[:] = offspring
 
             self.eval_pop_inds = [ind for ind in self.pop if not ind.fitness.valid]
-            self.eval_pop = [list_to_dict(ind, self.optimizee_individual_dict_spec)
-                             for ind in self.eval_pop_inds]
+            self.eval_pop = Population(self.eval_pop_inds, self.optimizee_individual_dict_spec)
 
             self.g += 1  # Update generation counter
             self._expand_trajectory(traj)
 
+    def post_process_async(self, traj, result):
+        """
+        Steady-state variant of the algorithm for the asynchronous mode, see
+        :meth:`~l2l.optimizers.optimizer.Optimizer.post_process_async`
+
+        The population is made of the evaluated individuals. A finished individual is added to it while it has less
+        than `popsize` members and afterwards replaces the worst member if it is fitter. For every finished individual
+        one child is bred from two parents selected by tournament and sent to evaluation, until `popsize * NGEN`
+        individuals have been evaluated in total.
+        """
+        CXPB, MUTPB, NGEN = traj.CXPB, traj.MUTPB, traj.n_iteration
+        if self.in_flight is None:
+            # The initial individuals were indexed by _expand_trajectory
+            self.in_flight = dict(enumerate(self.eval_pop_inds))
+            self.n_submitted = len(self.eval_pop_inds)
+            self.pop = []
+
+        ind_idx, fitness = result
+        individual = self.in_flight.pop(ind_idx)
+        individual.fitness.values = fitness
+        self.g = max(self.g, traj.individual.generation)
+
+        traj.f_add_result('$set.$.individual', list_to_dict(individual, self.optimizee_individual_dict_spec))
+        traj.f_add_result('$set.$.fitness', fitness)
+        self.hall_of_fame.update([individual])
+
+        if len(self.pop) < traj.popsize:
+            self.pop.append(individual)
+        else:
+            worst = tools.selWorst(self.pop, 1)[0]
+            if individual.fitness > worst.fitness:
+                self.pop[self.pop.index(worst)] = individual
+        self.best_individual = list_to_dict(tools.selBest(self.pop, 1)[0], self.optimizee_individual_dict_spec)
+
+        if self.n_submitted >= traj.popsize * NGEN:
+            return {}
+
+        # ------- Breed one child by crossover and mutation -------- #
+        child, other = map(self.toolbox.clone, self.toolbox.select(self.pop, 2))
+        if random.random() < CXPB:
+            self.toolbox.mate(child, other)
+            del child.fitness.values
+        if random.random() < MUTPB or child.fitness.valid:
+            # An unmodified child would be a plain copy of its parent, it is always mutated
+            self.toolbox.mutate(child)
+            del child.fitness.values
+
+        new_idx = self.n_submitted
+        self.n_submitted += 1
+        self.in_flight[new_idx] = child
+        return {new_idx: list_to_dict(child, self.optimizee_individual_dict_spec)}
+
     def end(self, traj):
         """
         See :meth:`~l2l.optimizers.optimizer.Optimizer.end`
@@ -0,0 +1,233 @@
+import logging
+
+import numpy as np
+
+from l2l import dict_to_list, list_to_dict
+from l2l.optimizers.optimizer import Optimizer
+from l2l.utils.population import Population
+
+logger = logging.getLogger("l2l-ga")
+
+
+class VectorizedGeneticAlgorithmOptimizer(Optimizer):
+    """
+    Implements the evolutionary algorithm of :class:`~l2l.optimizers.evolution.optimizer.GeneticAlgorithmOptimizer`
+    with NumPy operators applied to the whole population at once instead of the DEAP operators applied to one
+    individual at a time. The population is a (popsize, dim) array and every generation:
+
+      - selects popsize parents by tournaments of `tournsize` individuals
+      - mates the pairs of consecutive parents with probability `CXPB` by blend crossover with parameter `matepar`
+      - mutates every child with probability `MUTPB` by adding Gaussian noise of standard deviation `mutpar` to each
+        of its elements with probability `indpb`
+      - mutates children equal to an earlier child with probability 0.8
+
+    as the DEAP implementation does, so both behave the same statistically but do not draw the same individuals. The
+    random numbers come from a :class:`numpy.random.RandomState` seeded with `seed`. Only the children which were
+    mated or mutated are bounded, by one call of the bounding function per child and operator, and evaluated.
+
+    Individuals left without a result by the environment rank below all others and are evaluated again.
+
+    It takes the same parameters as :class:`~l2l.optimizers.evolution.optimizer.GeneticAlgorithmOptimizer`.
+
+    :param  ~l2l.utils.trajectory.Trajectory traj: Use this trajectory to store the parameters of the specific runs.
+      The parameters should be initialized based on the values in `parameters`
+    :param optimizee_create_individual: Function that creates a new individual
+    :param optimizee_fitness_weights: Fitness weights. The fitness returned by the Optimizee is multiplied by these
+      values (one for each element of the fitness vector)
+    :param parameters: Instance of :func:`~collections.namedtuple`
+      :class:`~l2l.optimizers.evolution.optimizer.GeneticAlgorithmParameters` containing the parameters needed by the
+      Optimizer
+    """
+
+    supports_partial_results = True
+
+    def __init__(self, traj,
+                 optimizee_create_individual,
+                 optimizee_fitness_weights,
+                 parameters,
+                 optimizee_bounding_func=None):
+
+        super().__init__(traj,
+                         optimizee_create_individual=optimizee_create_individual,
+                         optimizee_fitness_weights=optimizee_fitness_weights,
+                         parameters=parameters, optimizee_bounding_func=optimizee_bounding_func)
+        self.optimizee_bounding_func = optimizee_bounding_func
+        __, self.optimizee_individual_dict_spec = dict_to_list(optimizee_create_individual(), get_dict_spec=True)
+
+        if parameters.popsize < 1:
+            raise ValueError("popsize needs to be greater than 0")
+
+        traj.f_add_parameter('seed', parameters.seed, comment='Seed for RNG')
+        traj.f_add_parameter('popsize', parameters.popsize, comment='Population size')
+        traj.f_add_parameter('CXPB', parameters.CXPB, comment='Crossover term')
+        traj.f_add_parameter('MUTPB', parameters.MUTPB, comment='Mutation probability')
+        traj.f_add_parameter('n_iteration', parameters.NGEN, comment='Number of generations')
+
+        traj.f_add_parameter('indpb', parameters.indpb, comment='Mutation parameter')
+        traj.f_add_parameter('tournsize', parameters.tournsize, comment='Selection parameter')
+
+        self.random_state = np.random.RandomState(np.uint32(parameters.seed))
+
+        # ------- Initialize Population and Trajectory -------- #
+        self.pop = Population.from_individuals([optimizee_create_individual() for _ in range(parameters.popsize)],
+                                               self.optimizee_individual_dict_spec).data
+        # Weighted fitness of every individual, only meaningful where valid is True
+        self.pop_wvalues = np.zeros((parameters.popsize, len(optimizee_fitness_weights)))
+        self.valid = np.zeros(parameters.popsize, dtype=bool)
+        # Rows of the individuals of self.pop being evaluated
+        self.eval_indices = np.arange(parameters.popsize)
+        self.eval_pop = Population(self.pop[self.eval_indices], self.optimizee_individual_dict_spec)
+
+        self.g = 0  # the current generation
+        self.hall_of_fame_size = 20
+        self.hall_of_fame = np.empty((0, self.pop.shape[1]))
+        self.hall_of_fame_wvalues = np.empty((0, len(optimizee_fitness_weights)))
+        self.best_individual = None
+
+        self._expand_trajectory(traj)
+
+    @staticmethod
+    def _sort_best(wvalues):
+        """
+        Sorts the individuals from the best to the worst, comparing the weighted fitnesses lexicographically as DEAP
+        does
+
+        :param wvalues: (n, n_objectives) array of weighted fitnesses
+        :return: the indices of the individuals, best first
+        """
+        # lexsort sorts by the last key first and is stable, so equal individuals keep their order
+        return np.lexsort(-wvalues.T[::-1])
+
+    def _ranked_wvalues(self):
+        """
+        Weighted fitnesses of the population in which the individuals without a fitness rank last
+        """
+        return np.where(self.valid[:, np.newaxis], self.pop_wvalues, -np.inf)
+
+    def _bound(self, rows):
+        """
+        Applies the bounding function to the given rows of the population
+        """
+        if self.optimizee_bounding_func is None or len(rows) == 0:
+            return
+        bounded = Population(self.pop[rows], self.optimizee_individual_dict_spec)
+        bounded.apply_bounding(self.optimizee_bounding_func)
+        self.pop[rows] = bounded.data
+
+    def _mutate(self, rows):
+        """
+        Gaussian mutation of the given rows of the population, invalidating their fitness
+        """
+        mutated = self.random_state.rand(len(rows), self.pop.shape[1]) < self.parameters.indpb
+        noise = self.random_state.normal(0., self.parameters.mutpar, size=mutated.shape)
+        self.pop[rows] += np.where(mutated, noise, 0.)
+        self.valid[rows] = False
+        self._bound(rows)
+
+    def _update_hall_of_fame(self, individuals, wvalues):
+        """
+        Keeps the best distinct individuals seen so far
+        """
+        candidates = np.concatenate([self.hall_of_fame, individuals])
+        candidate_wvalues = np.concatenate([self.hall_of_fame_wvalues, wvalues])
+        order = self._sort_best(candidate_wvalues)
+        _, first = np.unique(candidates[order], axis=0, return_index=True)
+        order = order[np.sort(first)][:self.hall_of_fame_size]
+        self.hall_of_fame, self.hall_of_fame_wvalues = candidates[order], candidate_wvalues[order]
+
+    def post_process(self, traj, fitnesses_results):
+        """
+        See :meth:`~l2l.optimizers.optimizer.Optimizer.post_process`
+        """
+        CXPB, MUTPB, NGEN = traj.CXPB, traj.MUTPB, traj.n_iteration
+
+        logger.info("  Evaluating %i individuals" % len(fitnesses_results))
+
+        #**************************************************************************************************************
+        # Storing run-information in the trajectory
+        # Reading fitnesses and performing distribution update
+        #**************************************************************************************************************
+        for run_index, fitness in fitnesses_results:
+            # We need to convert the current run index into an ind_idx
+            # (index of individual within one generation)
+            traj.v_idx = run_index
+            ind_index = traj.par.ind_idx
+
+            traj.f_add_result('$set.$.individual', self.eval_pop[ind_index])
+            traj.f_add_result('$set.$.fitness', fitness)
+
+            # Use the ind_idx to update the fitness
+            row = self.eval_indices[ind_index]
+            self.pop_wvalues[row] = np.multiply(fitness, self.optimizee_fitness_weights)
+            self.valid[row] = True
+
+        traj.v_idx = -1  # set the trajectory back to default
+
+        logger.info("-- End of generation {} --".format(self.g))
+        evaluated = self.eval_indices[self.valid[self.eval_indices]]
+        evaluated = evaluated[self._sort_best(self.pop_wvalues[evaluated])]
+        if len(evaluated):
+            self.best_individual = list_to_dict(self.pop[evaluated[0]], self.optimizee_individual_dict_spec)
+        for row in evaluated[:2]:
+            logger.info("Best individual is %s, %s" % (list_to_dict(self.pop[row], self.optimizee_individual_dict_spec),
+                                                       self.pop_wvalues[row] / self.optimizee_fitness_weights))
+
+        self._update_hall_of_fame(self.pop[evaluated], self.pop_wvalues[evaluated])
+
+        logger.info("-- Hall of fame --")
+        for hof_ind, hof_wvalues in zip(self.hall_of_fame[:2], self.hall_of_fame_wvalues[:2]):
+            logger.info("HOF individual is %s, %s" % (list_to_dict(hof_ind, self.optimizee_individual_dict_spec),
+                                                      hof_wvalues / self.optimizee_fitness_weights))
+
+        # ------- Create the next generation by crossover and mutation -------- #
+        if self.g < NGEN - 1:  # not necessary for the last generation
+            n_individuals = len(self.pop)
+            # Select the next generation individuals by tournaments, the winner of a tournament is its best aspirant
+            rank = np.empty(n_individuals, dtype=int)
+            rank[self._sort_best(self._ranked_wvalues())] = np.arange(n_individuals)
+            aspirants = self.random_state.randint(n_individuals, size=(n_individuals, traj.tournsize))
+            winners = aspirants[np.arange(n_individuals), np.argmin(rank[aspirants], axis=1)]
+            self.pop, self.pop_wvalues, self.valid = self.pop[winners], self.pop_wvalues[winners], self.valid[winners]
+
+            # Blend crossover of the pairs of consecutive offspring
+            first, second = np.arange(0, n_individuals - 1, 2), np.arange(1, n_individuals, 2)
+            mated = self.random_state.rand(len(first)) < CXPB
+            first, second = first[mated], second[mated]
+            gamma = (1. + 2. * self.parameters.matepar) * self.random_state.rand(len(first), self.pop.shape[1]) \
+                - self.parameters.matepar
+            parents1, parents2 = self.pop[first], self.pop[second]
+            self.pop[first] = (1. - gamma) * parents1 + gamma * parents2
+            self.pop[second] = gamma * parents1 + (1. - gamma) * parents2
+            children = np.concatenate([first, second])
+            self.valid[children] = False
+            self._bound(children)
+
+            mutants = np.flatnonzero(self.random_state.rand(n_individuals) < MUTPB)
+            self._mutate(mutants)
+
+            _, first_occurrences = np.unique(self.pop, axis=0, return_index=True)
+            if len(first_occurrences) < n_individuals:
+                logger.info("Mutating more")
+                # Offspring equal to an earlier one are mutated with a probability of 0.8
+                duplicates = np.setdiff1d(np.arange(n_individuals), first_occurrences)
+                self._mutate(duplicates[self.random_state.rand(len(duplicates)) < 0.8])
+
+            self.eval_indices = np.flatnonzero(~self.valid)
+            self.eval_pop = Population(self.pop[self.eval_indices], self.optimizee_individual_dict_spec)
+
+            self.g += 1  # Update generation counter
+            self._expand_trajectory(traj)
+
+    def end(self, traj):
+        """
+        See :meth:`~l2l.optimizers.optimizer.Optimizer.end`
+        """
+        # ------------ Finished all runs and print result --------------- #
+        logger.info("-- End of (successful) evolution --")
+        for row in self._sort_best(self._ranked_wvalues())[:10]:
+            logger.info("Best individual is %s, %s"
+                        % (self.pop[row], self.pop_wvalues[row] / self.optimizee_fitness_weights))
+
+        logger.info("-- Hall of fame --")
+        for hof_ind, hof_wvalues in zip(self.hall_of_fame, self.hall_of_fame_wvalues):
+            logger.info("HOF individual is %s, %s" % (hof_ind, hof_wvalues / self.optimizee_fitness_weights))
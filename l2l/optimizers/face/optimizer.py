@@ -5,6 +5,7 @@ import numpy as np
 
 from l2l import dict_to_list, list_to_dict
 from l2l.optimizers.optimizer import Optimizer
+from l2l.utils.population import Population
 
 logger = logging.getLogger("optimizers.face")
 
@@ -131,21 +132,19 @@ class FACEOptimizer(Optimizer):
         # The first iteration does not pick the values out of the Gaussian distribution. It picks randomly
         # (or at-least as randomly as optimizee_create_individual creates individuals)
 
-        # Note that this array stores individuals as an np.array of floats as opposed to Individual-Dicts
+        # Note that the population stores individuals as an array of floats as opposed to Individual-Dicts
         # This is because this array is used within the context of the cross entropy algorithm and
         # Thus needs to handle the optimizee individuals as vectors
-        current_eval_pop = [self.optimizee_create_individual() for _ in range(parameters.min_pop_size)]
+        self.eval_pop = Population.from_individuals(
+            [self.optimizee_create_individual() for _ in range(parameters.min_pop_size)], self.optimizee_individual_dict_spec)
 
         if optimizee_bounding_func is not None:
-            current_eval_pop = [self.optimizee_bounding_func(ind) for ind in current_eval_pop]
-
-        self.eval_pop = current_eval_pop
-        self.eval_pop_asarray = np.array([dict_to_list(x) for x in self.eval_pop])
+            self.eval_pop.apply_bounding(self.optimizee_bounding_func)
 
         # Max Likelihood
         self.current_distribution = parameters.distribution
         self.current_distribution.init_random_state(self.random_state)
-        self.current_distribution.fit(self.eval_pop_asarray)
+        self.current_distribution.fit(self.eval_pop.data)
 
         self._expand_trajectory(traj)
 
@@ -181,7 +180,7 @@ class FACEOptimizer(Optimizer):
         generation_name = 'generation_{}'.format(self.g)
 
         # Sorting the data according to fitness
-        sorted_population = self.eval_pop_asarray[fitness_sorting_indices]
+        sorted_population = self.eval_pop.data[fitness_sorting_indices]
         sorted_fitess = np.asarray(weighted_fitness_list)[fitness_sorting_indices]
 
         # Elite individuals are with performance better than or equal to the (1-rho) quantile.
@@ -259,16 +258,13 @@ class FACEOptimizer(Optimizer):
         # **************************************************************************************************************
         # Note that this is only done in case the evaluated run is not the last run
         fitnesses_results.clear()
-        self.eval_pop.clear()
         if expand:
             # Sample from the constructed distribution
-            self.eval_pop_asarray = self.current_distribution.sample(self.pop_size)
-            self.eval_pop = [list_to_dict(ind_asarray, self.optimizee_individual_dict_spec)
-                             for ind_asarray in self.eval_pop_asarray]
+            self.eval_pop = Population(self.current_distribution.sample(self.pop_size),
+                                       self.optimizee_individual_dict_spec)
             # Clip to boundaries
             if self.optimizee_bounding_func is not None:
-                self.eval_pop = [self.optimizee_bounding_func(individual) for individual in self.eval_pop]
-                self.eval_pop_asarray = np.array([dict_to_list(x) for x in self.eval_pop])
+                self.eval_pop.apply_bounding(self.optimizee_bounding_func)
             self.g += 1  # Update generation counter
             self.T *= temp_decay
             self._expand_trajectory(traj)
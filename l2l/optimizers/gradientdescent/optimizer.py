@@ -6,6 +6,7 @@ import numpy as np
 
 from l2l import dict_to_list
 from l2l import list_to_dict
+from l2l.utils.population import Population
 from l2l.optimizers.optimizer import Optimizer
 
 logger = logging.getLogger("optimizers.gradientdescent")
@@ -145,32 +146,29 @@ class GradientDescentOptimizer(Optimizer):
                                                 ' common across a generation')
 
         # Explore the neighbourhood in the parameter space of current individual
-        new_individual_list = [
-            list_to_dict(self.current_individual + 
-                         self.random_state.normal(0.0, parameters.exploration_step_size, self.current_individual.size),
-                         self.optimizee_individual_dict_spec)
-            for i in range(parameters.n_random_steps)
-        ]
+        new_individuals = np.empty((parameters.n_random_steps + 1, self.current_individual.size))
+        for i in range(parameters.n_random_steps):
+            new_individuals[i] = self.current_individual + \
+                self.random_state.normal(0.0, parameters.exploration_step_size, self.current_individual.size)
 
         # Also add the current individual to determine it's fitness
-        new_individual_list.append(list_to_dict(self.current_individual, self.optimizee_individual_dict_spec))
-            
+        new_individuals[-1] = self.current_individual
+
+        self.eval_pop = Population(new_individuals, self.optimizee_individual_dict_spec)
         if optimizee_bounding_func is not None:
-            new_individual_list = [self.optimizee_bounding_func(ind) for ind in new_individual_list]
+            self.eval_pop.apply_bounding(self.optimizee_bounding_func)
 
         # Storing the fitness of the current individual
         self.current_fitness = -np.Inf
         self.g = 0
         
-        self.eval_pop = new_individual_list
         self._expand_trajectory(traj)
 
     def post_process(self, traj, fitnesses_results):
         """
         See :meth:`~l2l.optimizers.optimizer.Optimizer.post_process`
         """
-        old_eval_pop = self.eval_pop.copy()
-        self.eval_pop.clear()
+        old_eval_pop = self.eval_pop
 
         logger.info("  Evaluating %i individuals" % len(fitnesses_results))
         
@@ -200,15 +198,14 @@ class GradientDescentOptimizer(Optimizer):
                 self.current_fitness = weighted_fitness
             else:
                 fitnesses[i] = weighted_fitness
-                dx[i] = np.array(dict_to_list(individual)) - self.current_individual
+                dx[i] = old_eval_pop.data[ind_index] - self.current_individual
         traj.v_idx = -1  # set the trajectory back to default
 
         # Performs descending arg-sort of weighted fitness
         fitness_sorting_indices = list(reversed(np.argsort(weighted_fitness_list)))
-        old_eval_pop_as_array = np.array([dict_to_list(x) for x in old_eval_pop])
 
         # Sorting the data according to fitness
-        sorted_population = old_eval_pop_as_array[fitness_sorting_indices]
+        sorted_population = old_eval_pop.data[fitness_sorting_indices]
         sorted_fitness = np.asarray(weighted_fitness_list)[fitness_sorting_indices]
 
         logger.info("-- End of generation %d --", self.g)
@@ -241,18 +238,17 @@ class GradientDescentOptimizer(Optimizer):
             self.current_individual = np.array(dict_to_list(current_individual_dict))
 
             # Explore the neighbourhood in the parameter space of the current individual
-            new_individual_list = [
-                list_to_dict(self.current_individual + 
-                             self.random_state.normal(0.0, traj.exploration_step_size, self.current_individual.size),
-                             self.optimizee_individual_dict_spec)
-                for _ in range(traj.n_random_steps)
-            ]
+            new_individuals = np.empty((traj.n_random_steps + 1, self.current_individual.size))
+            for i in range(traj.n_random_steps):
+                new_individuals[i] = self.current_individual + \
+                    self.random_state.normal(0.0, traj.exploration_step_size, self.current_individual.size)
+            # The current individual was already bounded
+            new_individuals[-1] = self.current_individual
+            self.eval_pop = Population(new_individuals, self.optimizee_individual_dict_spec)
             if self.optimizee_bounding_func is not None:
-                new_individual_list = [self.optimizee_bounding_func(ind) for ind in new_individual_list]
-            new_individual_list.append(current_individual_dict)
+                self.eval_pop.apply_bounding(self.optimizee_bounding_func)
 
             fitnesses_results.clear()
-            self.eval_pop = new_individual_list
             self.g += 1  # Update generation counter
             self._expand_trajectory(traj)
 
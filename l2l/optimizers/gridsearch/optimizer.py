@@ -2,7 +2,6 @@ import logging
 from collections import namedtuple
 
 import numpy as np
-from l2l.utils.tools import cartesian_product
 
 from l2l import DictEntryType
 from l2l import dict_to_list
@@ -10,7 +9,8 @@ from l2l.optimizers.optimizer import Optimizer
 
 logger = logging.getLogger("optimizers.gridsearch")
 
-GridSearchParameters = namedtuple('GridSearchParameters', ['param_grid'])
+GridSearchParameters = namedtuple('GridSearchParameters', ['param_grid', 'chunk_size', 'top_k', 'n_levels'])
+GridSearchParameters.__new__.__defaults__ = (None, 1, 1)
 GridSearchParameters.__doc__ = """
 :param dict param_grid: This is the data structure specifying the grid over which to search. This should be a
     dictionary as follows::
@@ -23,6 +23,18 @@ GridSearchParameters.__doc__ = """
     Note that there must be as many keys as there are in the `Individual-Dict` returned by the function
     :meth:`.Optimizee.create_individual`. Also, if any of the parameters of the individuals is an array, then the above
     grid specification applies to each element of the array.
+
+:param int chunk_size: Optional. If given, the grid is streamed: each generation evaluates the next `chunk_size`
+    points of the grid, which are computed from their index when the generation is created, so the grid is never
+    held in memory as a whole. By default the whole grid is evaluated in a single generation.
+
+:param int top_k: Optional. Number of best grid points kept while the grid is evaluated, default 1
+
+:param int n_levels: Optional. Number of levels of the coarse-to-fine refinement, default 1 (no refinement). Every
+    level after the first evaluates, around each of the `top_k` best points found so far, a grid with the same
+    `n_steps` per parameter spanning one step of the previous level on each side of the point. The step thus
+    shrinks by a factor `n_steps / 2` per level, which needs `n_steps` > 2. The points are clipped to the bounds
+    of `param_grid`.
 """
 
 
@@ -35,14 +47,20 @@ class GridSearchOptimizer(Optimizer):
     Notes regarding what it does -
 
     1.  This algorithm does not do any kind of adaptive searching and thus the concept of generations does not apply
-        per se. That said, it is currently implemented as a series of runs in a single generation. All of these runs
-        are declared in the constructor itself. The :meth:`.Optimizer.post_process()` function simply prints the
-        individual with the maximal fitness.
-    
+        per se. By default, it is implemented as a series of runs in a single generation. With `chunk_size` set in
+        the parameters, the grid is streamed instead: every generation evaluates the next `chunk_size` grid points
+        and only the `top_k` best points seen so far are kept, so the memory used by the optimizer does not depend
+        on the size of the grid. The individuals of a chunk are removed from the trajectory once they are
+        evaluated. Combine this with the `store_results` and `results_window` options of the experiment to also
+        bound the results kept by the environment.
+        With `n_levels` > 1, the search is adaptive: after the grid, finer grids are evaluated around the best
+        points, level after level. This reaches the resolution of a fine grid with far fewer evaluations on smooth
+        fitness landscapes.
+
     2.  This algorithm doesnt make use of self.eval_pop and :meth:`.Optimizer._expand_trajectory()` simply because the
-        cartesian product can be used more efficiently directly. (Imagine having to split a dict of 10000 parameter
-        combinations into 10000 small `Individual-Dict`s and storing into eval_pop only to join them and call
-        `traj.f_expand()` in :meth:`.Optimizer._expand_trajectory()`)
+        grid points can be computed more efficiently directly. The point with index `i` is found by unraveling `i`
+        over the shape of the grid, in the order of the cartesian product of the sorted parameter names. In the
+        refinement levels, the index also selects the cell, i.e. the best point around which the grid lies.
 
     :param  ~l2l.utils.trajectory.Trajectory traj: Use this trajectory to store the parameters of the specific runs.
         The parameters should be initialized based on the values in `parameters`
@@ -72,8 +90,6 @@ class GridSearchOptimizer(Optimizer):
 
         sample_individual = self.optimizee_create_individual()
 
-        # Generate parameter dictionary based on optimizee_param_grid
-        self.param_list = {}
         _, optimizee_individual_param_spec = dict_to_list(sample_individual, get_dict_spec=True)
         self.optimizee_individual_dict_spec = optimizee_individual_param_spec
 
@@ -82,43 +98,130 @@ class GridSearchOptimizer(Optimizer):
         assert set(sample_individual.keys()) == set(optimizee_param_grid.keys()), \
             "The Parameters of optimizee_param_grid don't match those of the optimizee individual"
 
-        for param_name, param_type, param_length in optimizee_individual_param_spec:
+        # The grid is the cartesian product of one axis per element of the parameters, in the order of the sorted
+        # parameter names. Only the values of the axes are stored, for each cell of the current level
+        self.param_spec = sorted(optimizee_individual_param_spec)
+        n_steps = []
+        lower_bounds = []
+        upper_bounds = []
+        for param_name, _, param_length in self.param_spec:
             param_lower_bound, param_upper_bound, param_n_steps = optimizee_param_grid[param_name]
-            if param_type == DictEntryType.Scalar:
-                self.param_list[param_name] = np.linspace(param_lower_bound, param_upper_bound, param_n_steps + 1)
-            elif param_type == DictEntryType.Sequence:
-                curr_param_list = np.linspace(param_lower_bound, param_upper_bound, param_n_steps + 1)
-                curr_param_list = np.meshgrid(*([curr_param_list] * param_length), indexing='ij')
-                curr_param_list = [x.ravel() for x in curr_param_list]
-                curr_param_list = np.stack(curr_param_list, axis=-1)
-                self.param_list[param_name] = curr_param_list
-            self.size = len(self.param_list[param_name])
-
-        self.param_list = cartesian_product(self.param_list, tuple(sorted(optimizee_param_grid.keys())))
+            n_steps += [param_n_steps] * param_length
+            lower_bounds += [param_lower_bound] * param_length
+            upper_bounds += [param_upper_bound] * param_length
+        self.n_steps = np.array(n_steps)
+        self.lower_bounds = np.array(lower_bounds, dtype=float)
+        self.upper_bounds = np.array(upper_bounds, dtype=float)
+        self.grid_shape = tuple(int(n) + 1 for n in self.n_steps)
+        #: Number of points of the grid of one cell
+        self.cell_size = 1
+        for n_points in self.grid_shape:
+            self.cell_size *= n_points
+
+        self.top_k = parameters.top_k
+        self.n_levels = parameters.n_levels
+        if self.top_k < 1 or self.n_levels < 1:
+            raise ValueError("top_k and n_levels need to be greater than 0")
+        if parameters.chunk_size is not None and parameters.chunk_size < 1:
+            raise ValueError("chunk_size needs to be greater than 0")
+        if self.n_levels > 1 and np.any(self.n_steps < 3):
+            raise ValueError("The refinement needs more than 2 steps per parameter")
+        #: The current generation number
+        self.g = 0
+        #: The current level and the step between two grid points of this level along every axis
+        self.level = 0
+        self.step = (self.upper_bounds - self.lower_bounds) / self.n_steps
+        #: Values of every axis for every cell of the current level, list of arrays of shape (n_cells, n_points)
+        self.axis_values = [np.linspace(lower_bound, upper_bound, n_points).reshape(1, -1)
+                            for lower_bound, upper_bound, n_points in zip(self.lower_bounds, self.upper_bounds,
+                                                                          self.grid_shape)]
+        self._start_level()
+        #: Points (one value per axis), weighted fitnesses and fitnesses of the best points evaluated so far
+        self.top_points = np.zeros((0, len(self.n_steps)))
+        self.top_weighted_fitnesses = np.zeros(0)
+        self.top_fitnesses = np.zeros((0, len(optimizee_fitness_weights)))
+
+        n_cells = min(self.top_k, self.cell_size)
+        n_iteration = self._n_chunks(self.cell_size) + (self.n_levels - 1) * self._n_chunks(n_cells * self.cell_size)
 
         # Adding the bounds information to the trajectory
         traj.f_add_parameter_group('grid_spec')
         for param_name, param_grid_spec in optimizee_param_grid.items():
             traj.grid_spec.f_add_parameter(param_name + '.lower_bound', param_grid_spec[0])
             traj.grid_spec.f_add_parameter(param_name + '.uper_bound', param_grid_spec[1])
-        traj.f_add_parameter('n_iteration', 1, comment='Grid search does only 1 iteration')
-        #: The current generation number
-        self.g = 0
+        traj.f_add_parameter('n_iteration', n_iteration,
+                             comment='Grid search does one iteration per chunk of the grid of every level')
         # Expanding the trajectory
-        grouped_params_dict = {'individual.' + key: value for key, value in self.param_list.items()}
-        final_params_dict = {'generation': [self.g],
-                             'ind_idx': range(self.size)}
-        final_params_dict.update(grouped_params_dict)
-        traj.f_expand(cartesian_product(final_params_dict,
-                                        [('ind_idx',) + tuple(grouped_params_dict.keys()), 'generation']))
+        self._expand_trajectory(traj)
 
         #: The population (i.e. list of individuals) to be evaluated at the next iteration
         self.eval_pop = None
 
+    def _n_chunks(self, size):
+        chunk_size = size if self.parameters.chunk_size is None else self.parameters.chunk_size
+        return -(-size // chunk_size)
+
+    def _start_level(self):
+        #: Number of points of the current level and chunk size used for it
+        self.size = len(self.axis_values[0]) * self.cell_size
+        self.chunk_size = self.size if self.parameters.chunk_size is None else self.parameters.chunk_size
+        #: Generation in which the current level started
+        self.level_start = self.g
+
+    def _refine(self):
+        """
+        Starts the next level, with one cell around each of the best points found so far and a step shrunk by
+        `n_steps / 2`
+        """
+        self.level += 1
+        self.step = 2 * self.step / self.n_steps
+        self.axis_values = [np.clip(self.top_points[:, [axis]] + (np.arange(n_points) - (n_points - 1) / 2) * step,
+                                    lower_bound, upper_bound)
+                            for axis, (n_points, step, lower_bound, upper_bound)
+                            in enumerate(zip(self.grid_shape, self.step, self.lower_bounds, self.upper_bounds))]
+        self._start_level()
+
+    def _axis_points(self, indices):
+        """
+        Computes the grid points of the current level with the given indices
+        :param indices: array of indices between 0 and :attr:`size`
+        :return: array of shape (len(indices), n_axes)
+        """
+        cells, local_indices = np.divmod(np.asarray(indices, dtype=np.int64), self.cell_size)
+        axis_indices = np.unravel_index(local_indices, self.grid_shape)
+        return np.stack([values[cells, axis_indices[axis]] for axis, values in enumerate(self.axis_values)], axis=-1)
+
+    def _points_to_dict(self, points):
+        """
+        Splits an array of points of shape (n, n_axes) into the parameters of the individual
+        :return: a dictionary mapping every parameter name to an array with one value (or one row for sequence
+            parameters) per point
+        """
+        params = {}
+        axis = 0
+        for param_name, param_type, param_length in self.param_spec:
+            if param_type == DictEntryType.Scalar:
+                params[param_name] = points[:, axis]
+            else:
+                params[param_name] = points[:, axis:axis + param_length]
+            axis += param_length
+        return params
+
+    def grid_points(self, indices):
+        """
+        Computes the grid points of the current level with the given indices
+
+        :param indices: array of indices into the grid, between 0 and :attr:`size`
+        :return: a dictionary mapping every parameter name to an array with one value (or one row for sequence
+            parameters) per index
+        """
+        return self._points_to_dict(self._axis_points(indices))
+
     def post_process(self, traj, fitnesses_results):
         """
-        In this optimizer, the post_proces function merely returns the best individual out of the grid and
-        does not expand the trajectory. It also stores any relevant results
+        In this optimizer, the post_proces function merges the fitnesses of the evaluated chunk of the grid into the
+        best points found so far and expands the trajectory with the next chunk. After the last chunk, it sets the
+        best individual of the grid. It also stores any relevant results
         """
         logger.info('Finished Simulation')
         logger.info('-------------------')
@@ -129,7 +232,6 @@ class GridSearchOptimizer(Optimizer):
         optimizee_fitness_weights = np.reshape(np.array(self.optimizee_fitness_weights), (-1, 1))
 
         weighted_fitness_array = np.matmul(fitness_array, optimizee_fitness_weights).ravel()
-        max_fitness_indiv_index = np.argmax(weighted_fitness_array)
 
         logger.info('Storing Results')
         logger.info('---------------')
@@ -139,26 +241,57 @@ class GridSearchOptimizer(Optimizer):
             traj.f_add_result('$set.$.fitness', np.array(run_fitness))
             traj.f_add_result('$set.$.weighted_fitness', run_weighted_fitness)
 
+        # Reduce the chunk and the best points so far to the top_k best distinct points
+        chunk_start = (self.g - self.level_start) * self.chunk_size
+        points = np.concatenate([self.top_points, self._axis_points(chunk_start + run_idx_array)])
+        weighted_fitnesses = np.concatenate([self.top_weighted_fitnesses, weighted_fitness_array])
+        fitnesses = np.concatenate([self.top_fitnesses, fitness_array.reshape(len(fitness_array), -1)])
+        top = []
+        seen = set()
+        for i in np.argsort(-weighted_fitnesses, kind='stable'):
+            if len(top) == self.top_k:
+                break
+            if tuple(points[i]) not in seen:
+                seen.add(tuple(points[i]))
+                top.append(i)
+        self.top_points = points[top]
+        self.top_weighted_fitnesses = weighted_fitnesses[top]
+        self.top_fitnesses = fitnesses[top]
+
+        if self.parameters.chunk_size is not None:
+            # The individuals of the chunk can be computed again from their indices
+            traj.f_remove_generation(self.g)
+        self.g += 1
+        traj.v_idx = -1
+
+        if (self.g - self.level_start) * self.chunk_size < self.size:
+            logger.info('Evaluated %d of %d grid points of level %d', (self.g - self.level_start) * self.chunk_size,
+                        self.size, self.level)
+            self._expand_trajectory(traj)
+            return
+        if self.level < self.n_levels - 1:
+            self._refine()
+            logger.info('Refining around %d points with steps %s (level %d)', len(self.top_points), self.step,
+                        self.level)
+            self._expand_trajectory(traj)
+            return
+
         logger.info('Best Individual is:')
         logger.info('')
 
-        traj.v_idx = run_idx_array[max_fitness_indiv_index]
-        individual = traj.individual
+        best_point = self._points_to_dict(self.top_points[:1])
         self.best_individual = {}
         for param_name, _, _ in self.optimizee_individual_dict_spec:
-            logger.info('  %s: %s', param_name, individual[param_name])
-            self.best_individual[param_name] = individual[param_name]
+            logger.info('  %s: %s', param_name, best_point[param_name][0])
+            self.best_individual[param_name] = best_point[param_name][0]
 
-        self.best_fitness = fitness_array[max_fitness_indiv_index]
-        logger.info('  with fitness: %s', fitness_array[max_fitness_indiv_index])
-        logger.info('  with weighted fitness: %s', weighted_fitness_array[max_fitness_indiv_index])
-
-        self.g += 1
-        traj.v_idx = -1
+        self.best_fitness = self.top_fitnesses[0]
+        logger.info('  with fitness: %s', self.top_fitnesses[0])
+        logger.info('  with weighted fitness: %s', self.top_weighted_fitnesses[0])
 
     def _expand_trajectory(self, traj):
         """
-        Add as many explored runs as individuals that need to be evaluated. Furthermore, add the individuals as explored
+        Add as many explored runs as grid points in the current chunk. Furthermore, add the grid points as explored
         parameters.
 
         :param  ~l2l.utils.trajectory.Trajectory traj: The  trajectory that contains the parameters and the
@@ -167,20 +300,15 @@ class GridSearchOptimizer(Optimizer):
 
         :return:
         """
-
-        grouped_params_dict = get_grouped_dict(self.eval_pop)
-        grouped_params_dict = {'individual.' + key: val for key, val in grouped_params_dict.items()}
+        start = (self.g - self.level_start) * self.chunk_size
+        indices = np.arange(start, min(start + self.chunk_size, self.size))
+        grouped_params_dict = {'individual.' + key: val for key, val in self.grid_points(indices).items()}
 
         final_params_dict = {'generation': [self.g],
-                             'ind_idx': range(len(self.eval_pop))}
+                             'ind_idx': range(len(indices))}
         final_params_dict.update(grouped_params_dict)
-
-        # We need to convert them to lists or write our own custom IndividualParameter ;-)
-        # Note the second argument to `cartesian_product`: This is for only having the cartesian product
-        # between ``generation x (ind_idx AND individual)``, so that every individual has just one
-        # unique index within a generation.
-        traj.f_expand(cartesian_product(final_params_dict,
-                                        [('ind_idx',) + tuple(grouped_params_dict.keys()), 'generation']))
+        # The parameter arrays are used as the columns of the individuals of the generation
+        traj.f_expand(final_params_dict)
 
     def end(self, traj):
         """
@@ -189,6 +317,10 @@ class GridSearchOptimizer(Optimizer):
         traj.f_add_result('final_individual', self.best_individual)
         traj.f_add_result('final_fitness', self.best_fitness)
         traj.f_add_result('n_iteration', self.g)
+        top_points = self._points_to_dict(self.top_points)
+        traj.f_add_result('top_individuals',
+                          [({param_name: top_points[param_name][i] for param_name in top_points}, fitness)
+                           for i, fitness in enumerate(self.top_fitnesses)])
 
         logger.info('x -------------------------------- x')
         logger.info('  Completed SUCCESSFUL Grid Search  ')
@@ -5,6 +5,7 @@ import numpy as np
 
 from l2l import dict_to_list, list_to_dict
 from l2l.optimizers.optimizer import Optimizer
+from l2l.utils.population import Population
 
 logger = logging.getLogger("optimizers.naturalevolutionstrategies")
 
@@ -173,17 +174,20 @@ class NaturalEvolutionStrategiesOptimizer(Optimizer):
 
         # Generate initial distribution
         self.current_perturbations = self._get_perturbations(traj)
-        current_eval_pop_arr = (self.mu + self.sigma * self.current_perturbations).tolist()
+        self.eval_pop = self._create_eval_pop()
 
-        self.eval_pop = [list_to_dict(ind, self.optimizee_individual_dict_spec) for ind in current_eval_pop_arr]
-
-        # Bounding function has to be applied AFTER the individual has been converted to a dict
-        if optimizee_bounding_func is not None:
-            self.eval_pop = [self.optimizee_bounding_func(ind) for ind in self.eval_pop]
+        self._expand_trajectory(traj)
 
-        self.eval_pop_arr = np.array([dict_to_list(ind) for ind in self.eval_pop])
+    def _create_eval_pop(self):
+        """
+        Creates the population of individuals sampled around the current mean of the search distribution
+        """
+        eval_pop = Population(self.mu + self.sigma * self.current_perturbations, self.optimizee_individual_dict_spec)
 
-        self._expand_trajectory(traj)
+        # Bounding function is applied on the Individual-Dicts
+        if self.optimizee_bounding_func is not None:
+            eval_pop.apply_bounding(self.optimizee_bounding_func)
+        return eval_pop
 
     def _get_perturbations(self, traj):
         perturbations = self.random_state.randn(traj.pop_size, *traj.dimension)
@@ -232,7 +236,7 @@ class NaturalEvolutionStrategiesOptimizer(Optimizer):
         fitness_sorting_indices = list(reversed(np.argsort(weighted_fitness_list)))
 
         # Sorting the data according to fitness
-        sorted_population = self.eval_pop_arr[fitness_sorting_indices]
+        sorted_population = self.eval_pop.data[fitness_sorting_indices]
         sorted_fitness = np.asarray(weighted_fitness_list)[fitness_sorting_indices]
         sorted_perturbations = self.current_perturbations[fitness_sorting_indices]
 
@@ -296,20 +300,10 @@ class NaturalEvolutionStrategiesOptimizer(Optimizer):
         # **************************************************************************************************************
         # Note that this is only done in case the evaluated run is not the last run
 
-        self.eval_pop.clear()
-
         # check if to stop
         if self.g < n_iteration - 1 and self.best_fitness_in_run < stop_criterion:
             self.current_perturbations = self._get_perturbations(traj)
-            current_eval_pop_arr = (self.mu + self.sigma * self.current_perturbations).tolist()
-
-            self.eval_pop = [list_to_dict(ind, self.optimizee_individual_dict_spec) for ind in current_eval_pop_arr]
-
-            # Bounding function has to be applied AFTER the individual has been converted to a dict
-            if self.optimizee_bounding_func is not None:
-                self.eval_pop = [self.optimizee_bounding_func(ind) for ind in self.eval_pop]
-
-            self.eval_pop_arr = np.array([dict_to_list(ind) for ind in self.eval_pop])
+            self.eval_pop = self._create_eval_pop()
 
             self.g += 1  # Update generation counter
             self._expand_trajectory(traj)
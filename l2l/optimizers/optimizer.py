@@ -3,6 +3,7 @@ from collections import namedtuple
 from l2l.utils.tools import cartesian_product
 
 from l2l import get_grouped_dict
+from l2l.utils.population import Population
 
 OptimizerParameters = namedtuple('OptimizerParamters', [])
 
@@ -26,6 +27,11 @@ class Optimizer:
 
     """
 
+    #: Whether :meth:`post_process` accepts the results of only some of the individuals of :attr:`eval_pop`, as given
+    #: by the environment with `on_failure='drop'`. Optimizers which match the results to the individuals by position
+    #: need the results of every individual and keep the default False
+    supports_partial_results = False
+
     def __init__(self, traj,
                  optimizee_create_individual,
                  optimizee_fitness_weights,
@@ -43,7 +49,8 @@ class Optimizer:
 
         #: The current generation number
         self.g = None
-        #: The population (i.e. list of individuals) to be evaluated at the next iteration
+        #: The population (i.e. list of individuals or :class:`~l2l.utils.population.Population`) to be evaluated at
+        #: the next iteration
         self.eval_pop = None
 
     def post_process(self, traj, fitnesses_results):
@@ -67,6 +74,24 @@ class Optimizer:
         self.g += 1
         self._expand_trajectory(traj)
 
+    def post_process_async(self, traj, result):
+        """
+        Counterpart of :meth:`post_process` for the asynchronous mode of the environment. It is called with the
+        result of every single individual as soon as it finishes, while other individuals are still running. The
+        optimizer updates its state with the result and immediately returns the individuals that should be evaluated
+        next. Returning an empty dictionary means no new individual is needed for this result; the run ends when no
+        individual is left in flight.
+
+        :param  ~l2l.utils.trajectory.Trajectory traj: The trajectory that contains the parameters. The individual
+            that finished is accessible using `traj.individual`
+
+        :param tuple result: The tuple `(ind_idx, fitness)` of the finished individual
+
+        :return: A dictionary `{ind_idx: Individual-Dict}` of new individuals. The `ind_idx` have to be unique over
+            the whole run and are chosen by the optimizer.
+        """
+        raise NotImplementedError("{} does not support the asynchronous mode".format(type(self).__name__))
+
     def end(self, traj):
         """
         Run any code required to clean-up, print final individuals etc.
@@ -89,6 +114,9 @@ class Optimizer:
 
         :return:
         """
+        if isinstance(self.eval_pop, Population):
+            traj.f_expand_population(self.eval_pop, self.g)
+            return
 
         grouped_params_dict = get_grouped_dict(self.eval_pop)
         grouped_params_dict = {'individual.' + key: val for key, val in grouped_params_dict.items()}
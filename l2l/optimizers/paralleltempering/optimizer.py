@@ -9,6 +9,7 @@ from enum import Enum
 from l2l.optimizers.optimizer import Optimizer
 from l2l import dict_to_list
 from l2l import list_to_dict
+from l2l.utils.population import Population
 
 logger = logging.getLogger("optimizers.paralleltempering")
 
@@ -27,7 +28,8 @@ ParallelTemperingParameters.__doc__ = """
     and the second entry is the ending temperature
 """
 
-AvailableCoolingSchedules = Enum('Schedule', 'DEFAULT LOGARITHMIC EXPONENTIAL LINEAR_MULTIPLICATIVE QUADRATIC_MULTIPLICATIVE LINEAR_ADDAPTIVE QUADRATIC_ADDAPTIVE EXPONENTIAL_ADDAPTIVE TRIGONOMETRIC_ADDAPTIVE')
+AvailableCoolingSchedules = Enum('Schedule', 'DEFAULT LOGARITHMIC EXPONENTIAL LINEAR_MULTIPLICATIVE QUADRATIC_MULTIPLICATIVE LINEAR_ADDAPTIVE QUADRATIC_ADDAPTIVE EXPONENTIAL_ADDAPTIVE TRIGONOMETRIC_ADDAPTIVE',
+                                 qualname='AvailableCoolingSchedules')
 
 """
 
@@ -209,15 +211,13 @@ class ParallelTemperingOptimizer(Optimizer):
         # Keep track of current fitness value to decide whether we want the next individual to be accepted or not
         self.current_fitness_value_list = [-np.Inf] * parameters.n_parallel_runs
 
-        new_individual_list = [
-            list_to_dict(ind_as_list + np.random.normal(0.0, parameters.noisy_step, ind_as_list.size) * traj.noisy_step,
-                         self.optimizee_individual_dict_spec)
-            for ind_as_list in self.current_individual_list
-        ]
+        self.eval_pop = Population(
+            [ind_as_list + np.random.normal(0.0, parameters.noisy_step, ind_as_list.size) * traj.noisy_step
+             for ind_as_list in self.current_individual_list],
+            self.optimizee_individual_dict_spec)
         if optimizee_bounding_func is not None:
-            new_individual_list = [self.optimizee_bounding_func(ind) for ind in new_individual_list]
+            self.eval_pop.apply_bounding(self.optimizee_bounding_func)
 
-        self.eval_pop = new_individual_list
         self._expand_trajectory(traj)
         
         #initialize container for the indices of the parallel runs
@@ -288,8 +288,8 @@ class ParallelTemperingOptimizer(Optimizer):
         cooling_schedules = self.cooling_schedules
         decay_parameters = self.decay_parameters
         temperature_bounds = self.temperature_bounds
-        old_eval_pop = self.eval_pop.copy()
-        self.eval_pop.clear()
+        old_eval_pop = self.eval_pop
+        new_individuals = np.empty_like(old_eval_pop.data)
         temperature = self.T_all
         for i in range(0,traj.n_parallel_runs):
             self.T_all[self.parallel_indices[i]] = self.cooling(temperature[self.parallel_indices[i]], cooling_schedules[self.parallel_indices[i]], decay_parameters[self.parallel_indices[i]], temperature_bounds[self.parallel_indices[i],:], n_iteration)
@@ -318,21 +318,21 @@ class ParallelTemperingOptimizer(Optimizer):
             # Accept
             if r < p or weighted_fitness >= current_fitness_value_i:
                 self.current_fitness_value_list[i] = weighted_fitness
-                self.current_individual_list[i] = np.array(dict_to_list(individual))
+                self.current_individual_list[i] = old_eval_pop.data[ind_index].copy()
 
             traj.f_add_result('$set.$.individual', individual)
             # Watchout! if weighted fitness is a tuple/np array it should be converted to a list first here
             traj.f_add_result('$set.$.fitness', weighted_fitness)
 
             current_individual = self.current_individual_list[i]
-            new_individual = list_to_dict(current_individual + np.random.randn(current_individual.size) * noisy_step * self.T,
-                                          self.optimizee_individual_dict_spec)
-            if self.optimizee_bounding_func is not None:
-                new_individual = self.optimizee_bounding_func(new_individual)
+            new_individuals[i] = current_individual + np.random.randn(current_individual.size) * noisy_step * self.T
 
             logger.debug("Current best fitness for individual %d is %.2f. New individual is %s", 
-                         i, self.current_fitness_value_list[i], new_individual)
-            self.eval_pop.append(new_individual)
+                         i, self.current_fitness_value_list[i], new_individuals[i])
+
+        self.eval_pop = Population(new_individuals, self.optimizee_individual_dict_spec)
+        if self.optimizee_bounding_func is not None:
+            self.eval_pop.apply_bounding(self.optimizee_bounding_func)
             
         # the parallel tempering swapping starts here
         for i in range(0,traj.n_parallel_runs):
@@ -7,6 +7,7 @@ from enum import Enum
 from l2l import dict_to_list
 from l2l import list_to_dict
 from l2l.optimizers.optimizer import Optimizer
+from l2l.utils.population import Population
 
 logger = logging.getLogger("optimizers.simulatedannealing")
 
@@ -23,7 +24,8 @@ SimulatedAnnealingParameters.__doc__ = """
 
 """
 
-AvailableCoolingSchedules = Enum('Schedule', 'DEFAULT LOGARITHMIC EXPONENTIAL LINEAR_MULTIPLICATIVE QUADRATIC_MULTIPLICATIVE LINEAR_ADDAPTIVE QUADRATIC_ADDAPTIVE EXPONENTIAL_ADDAPTIVE TRIGONOMETRIC_ADDAPTIVE')
+AvailableCoolingSchedules = Enum('Schedule', 'DEFAULT LOGARITHMIC EXPONENTIAL LINEAR_MULTIPLICATIVE QUADRATIC_MULTIPLICATIVE LINEAR_ADDAPTIVE QUADRATIC_ADDAPTIVE EXPONENTIAL_ADDAPTIVE TRIGONOMETRIC_ADDAPTIVE',
+                                 qualname='AvailableCoolingSchedules')
 
 """
 Multiplicative Monotonic Cooling
@@ -152,24 +154,27 @@ class SimulatedAnnealingOptimizer(Optimizer):
         # Keep track of current fitness value to decide whether we want the next individual to be accepted or not
         self.current_fitness_value_list = [-np.Inf] * parameters.n_parallel_runs
 
-        new_individual_list = [
-            list_to_dict(
-                ind_as_list + self.random_state.normal(0.0, parameters.noisy_step, ind_as_list.size) * traj.noisy_step * self.T,
-                self.optimizee_individual_dict_spec)
-            for ind_as_list in self.current_individual_list
-        ]
+        self.eval_pop = Population(
+            [ind_as_list + self.random_state.normal(0.0, parameters.noisy_step, ind_as_list.size) * traj.noisy_step * self.T
+             for ind_as_list in self.current_individual_list],
+            self.optimizee_individual_dict_spec)
         if optimizee_bounding_func is not None:
-            new_individual_list = [self.optimizee_bounding_func(ind) for ind in new_individual_list]
+            self.eval_pop.apply_bounding(self.optimizee_bounding_func)
 
-        self.eval_pop = new_individual_list
         self._expand_trajectory(traj)
         
         self.cooling_schedule = parameters.cooling_schedule
 
-    def cooling(self,temperature, cooling_schedule, temperature_decay, temperature_end, steps_total):        
+        # State of the chains in the asynchronous mode: the chain, the individual and the temperature of every
+        # individual being evaluated, indexed by ind_idx
+        self.in_flight = None
+        self.n_submitted = 0
+
+    def cooling(self,temperature, cooling_schedule, temperature_decay, temperature_end, steps_total, k=None):
         # assumes, that the temperature always starts at 1
         T0 = 1
-        k = self.g + 1    
+        if k is None:
+            k = self.g + 1
       
         if cooling_schedule == AvailableCoolingSchedules.DEFAULT:
             return temperature * temperature_decay
@@ -208,8 +213,8 @@ class SimulatedAnnealingOptimizer(Optimizer):
         """
         noisy_step, temp_decay, n_iteration, stop_criterion = \
             traj.noisy_step, traj.temp_decay, traj.n_iteration, traj.stop_criterion
-        old_eval_pop = self.eval_pop.copy()
-        self.eval_pop.clear()
+        old_eval_pop = self.eval_pop
+        new_individuals = np.empty_like(old_eval_pop.data)
         temperature = self.T
         temperature_end = 0
         self.T = self.cooling(temperature, self.cooling_schedule, temp_decay, temperature_end, n_iteration)
@@ -236,22 +241,22 @@ class SimulatedAnnealingOptimizer(Optimizer):
             # Accept
             if r < p or weighted_fitness >= current_fitness_value_i:
                 self.current_fitness_value_list[i] = weighted_fitness
-                self.current_individual_list[i] = np.array(dict_to_list(individual))
+                self.current_individual_list[i] = old_eval_pop.data[ind_index].copy()
 
             traj.f_add_result('$set.$.individual', individual)
             # Watchout! if weighted fitness is a tuple/np array it should be converted to a list first here
             traj.f_add_result('$set.$.fitness', weighted_fitness)
 
             current_individual = self.current_individual_list[i]
-            new_individual = list_to_dict(
-                current_individual + self.random_state.randn(current_individual.size) * noisy_step * self.T,
-                self.optimizee_individual_dict_spec)
-            if self.optimizee_bounding_func is not None:
-                new_individual = self.optimizee_bounding_func(new_individual)
+            new_individuals[i] = current_individual + \
+                self.random_state.randn(current_individual.size) * noisy_step * self.T
 
             logger.debug("Current best fitness for individual %d is %.2f. New individual is %s",
-                         i, self.current_fitness_value_list[i], new_individual)
-            self.eval_pop.append(new_individual)
+                         i, self.current_fitness_value_list[i], new_individuals[i])
+
+        self.eval_pop = Population(new_individuals, self.optimizee_individual_dict_spec)
+        if self.optimizee_bounding_func is not None:
+            self.eval_pop.apply_bounding(self.optimizee_bounding_func)
 
         logger.debug("Current best fitness within population is %.2f", max(self.current_fitness_value_list))
 
@@ -265,6 +270,56 @@ class SimulatedAnnealingOptimizer(Optimizer):
             self.g += 1  # Update generation counter
             self._expand_trajectory(traj)
 
+    def post_process_async(self, traj, result):
+        """
+        Asynchronous variant of the algorithm, see :meth:`~l2l.optimizers.optimizer.Optimizer.post_process_async`
+
+        The parallel runs are independent chains, every chain takes its next step as soon as the evaluation of its
+        previous step finished. The generation of an individual is the step of its chain, so each chain is cooled
+        with its own step count instead of the global generation counter.
+        """
+        noisy_step, temp_decay, n_iteration, stop_criterion = \
+            traj.noisy_step, traj.temp_decay, traj.n_iteration, traj.stop_criterion
+        if self.in_flight is None:
+            # The initial individuals were indexed by _expand_trajectory, individual i starts chain i
+            self.in_flight = {i: (i, individual, self.T) for i, individual in enumerate(self.eval_pop)}
+            self.n_submitted = len(self.eval_pop)
+
+        ind_idx, fitness = result
+        chain, individual, temperature = self.in_flight.pop(ind_idx)
+        step = traj.individual.generation
+        self.g = max(self.g, step)
+        temperature = self.cooling(temperature, self.cooling_schedule, temp_decay, 0, n_iteration, k=step + 1)
+
+        weighted_fitness = sum(f * w for f, w in zip(fitness, self.optimizee_fitness_weights))
+
+        # Accept or reject the new solution
+        current_fitness_value = self.current_fitness_value_list[chain]
+        r = self.random_state.rand()
+        p = np.exp((weighted_fitness - current_fitness_value) / temperature)
+        if r < p or weighted_fitness >= current_fitness_value:
+            self.current_fitness_value_list[chain] = weighted_fitness
+            self.current_individual_list[chain] = np.array(dict_to_list(individual))
+
+        traj.f_add_result('$set.$.individual', individual)
+        traj.f_add_result('$set.$.fitness', weighted_fitness)
+
+        if step >= n_iteration - 1 or stop_criterion <= max(self.current_fitness_value_list):
+            logger.info("-- End of chain {} at step {} --".format(chain, step))
+            return {}
+
+        current_individual = self.current_individual_list[chain]
+        new_individual = list_to_dict(
+            current_individual + self.random_state.randn(current_individual.size) * noisy_step * temperature,
+            self.optimizee_individual_dict_spec)
+        if self.optimizee_bounding_func is not None:
+            new_individual = self.optimizee_bounding_func(new_individual)
+
+        new_idx = self.n_submitted
+        self.n_submitted += 1
+        self.in_flight[new_idx] = (chain, new_individual, temperature)
+        return {new_idx: new_individual}
+
     def end(self, traj):
         """
         See :meth:`~l2l.optimizers.optimizer.Optimizer.end`
@@ -2,7 +2,7 @@ import unittest
 
 import numpy as np
 from l2l.tests.test_optimizer import OptimizerTestCase
-from l2l.optimizers.crossentropy.distribution import NoisyGaussian
+from l2l.optimizers.crossentropy.distribution import Gaussian, NoisyGaussian, NoisyBayesianGaussianMixture
 from l2l.optimizers.crossentropy import CrossEntropyOptimizer, CrossEntropyParameters
 
 
@@ -33,6 +33,47 @@ class CEOptimizerTestCase(OptimizerTestCase):
         self.assertEqual(best[1], -1.9766742736816023)
         self.experiment.end_experiment(optimizer)
 
+    def test_gaussian_covariance_factor(self):
+        random_state = np.random.RandomState(0)
+        old_data, new_data = random_state.randn(8, 6), random_state.randn(8, 6) * 2 + 1
+        smoothed_cov = 0.3 * np.cov(old_data, rowvar=False) + 0.7 * np.cov(new_data, rowvar=False)
+        for covariance_type, rank in [('full', None), ('diag', None), ('low_rank', 3)]:
+            distribution = Gaussian(covariance_type, rank)
+            distribution.init_random_state(np.random.RandomState(1))
+            distribution.fit(old_data)
+            distribution.fit(new_data, smooth_update=0.3)
+            cov = np.dot(distribution.factor.T, distribution.factor) + np.diag(distribution.variances)
+            np.testing.assert_allclose(np.diag(cov), np.diag(smoothed_cov))
+            if covariance_type == 'full':
+                np.testing.assert_allclose(cov, smoothed_cov)
+                # The factor stays the upper triangular Cholesky factor of the covariance
+                np.testing.assert_allclose(distribution.factor, np.linalg.cholesky(smoothed_cov).T, atol=1e-12)
+            samples = distribution.sample(100000)
+            np.testing.assert_allclose(np.cov(samples, rowvar=False), cov, atol=0.05)
+        # Fewer samples than dimensions give a singular factor
+        distribution = Gaussian()
+        distribution.init_random_state(np.random.RandomState(1))
+        distribution.fit(old_data[:3])
+        np.testing.assert_allclose(np.dot(distribution.factor.T, distribution.factor), np.cov(old_data[:3], rowvar=False),
+                                   atol=1e-12)
+        with self.assertRaises(ValueError):
+            Gaussian('low_rank')
+
+    def test_mixture_warm_start(self):
+        random_state = np.random.RandomState(0)
+        data = np.concatenate([random_state.randn(30, 2), random_state.randn(30, 2) + 5])
+        distribution = NoisyBayesianGaussianMixture(n_components=2, noise_magnitude=0.01, warm_start=True,
+                                                    warm_start_max_iter=1)
+        distribution.init_random_state(np.random.RandomState(1))
+        self.assertGreater(distribution.fit(data)['n_iter'], 1)
+        for _ in range(3):
+            data += random_state.randn(*data.shape) * 0.05
+            # A single EM iteration from the previous fit is enough
+            warm = distribution.fit(data)
+            self.assertEqual(warm['n_iter'], 1)
+            self.assertGreaterEqual(warm['fit_time'], 0.)
+        np.testing.assert_allclose(np.sort(warm['means'][:, 0]), [0., 5.], atol=0.5)
+
 
 def suite():
     suite = unittest.makeSuite(CEOptimizerTestCase, 'test')
@@ -1,7 +1,11 @@
 import unittest
 
+import numpy as np
+
 from l2l.tests.test_optimizer import OptimizerTestCase
-from l2l.optimizers.evolution import GeneticAlgorithmOptimizer, GeneticAlgorithmParameters
+from l2l.optimizers.evolution import GeneticAlgorithmOptimizer, GeneticAlgorithmParameters, \
+    VectorizedGeneticAlgorithmOptimizer
+from l2l.utils.environment import Environment
 
 
 class GAOptimizerTestCase(OptimizerTestCase):
@@ -32,6 +36,34 @@ class GAOptimizerTestCase(OptimizerTestCase):
         self.assertEqual(best[1], -1.9766742736816023)
         self.experiment.end_experiment(optimizer)
 
+    def test_vectorized(self):
+        env = Environment(trajectory='test_vectorized_ga')
+        optimizer_parameters = GeneticAlgorithmParameters(seed=0, popsize=20, CXPB=0.5, MUTPB=0.3, NGEN=8,
+                                                          indpb=0.5, tournsize=3, matepar=0.5, mutpar=1)
+
+        def bounding_func(individual):
+            return {'coords': np.clip(individual['coords'], -1., 1.)}
+
+        optimizer = VectorizedGeneticAlgorithmOptimizer(env.trajectory,
+                                                        optimizee_create_individual=self.optimizee.create_individual,
+                                                        optimizee_fitness_weights=(-0.1,),
+                                                        parameters=optimizer_parameters,
+                                                        optimizee_bounding_func=bounding_func)
+        env.add_postprocessing(optimizer.post_process)
+        results = env.run(self.optimizee.simulate)
+
+        self.assertEqual(optimizer.g, 7)
+        self.assertEqual(optimizer.pop.shape, (20, 2))
+        self.assertTrue(np.all(optimizer.valid))
+        # Only the mated and mutated children are evaluated again
+        self.assertLess(len(results[7]), 20)
+        # Apart from the initial individuals, all the individuals are bounded
+        self.assertTrue(np.all(np.abs(optimizer.eval_pop.data) <= 1.))
+        fitnesses = -0.1 * np.array([fitness for generation in range(8) for _, fitness in results[generation]])
+        self.assertAlmostEqual(optimizer.hall_of_fame_wvalues[0, 0], np.max(fitnesses))
+        self.assertTrue(np.all(np.diff(optimizer.hall_of_fame_wvalues[:, 0]) <= 0))
+        self.assertEqual(len(np.unique(optimizer.hall_of_fame, axis=0)), len(optimizer.hall_of_fame))
+
 
 def suite():
     suite = unittest.makeSuite(GAOptimizerTestCase, 'test')
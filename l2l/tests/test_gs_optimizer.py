@@ -1,11 +1,14 @@
 import unittest
 
+import numpy as np
+
 from l2l.tests.test_optimizer import OptimizerTestCase
 
 from l2l.optimizers.gridsearch import GridSearchOptimizer, GridSearchParameters
 
 from l2l import list_to_dict
 from l2l.utils.experiment import Experiment
+from l2l.utils.trajectory import Trajectory
 
 
 class GSOptimizerTestCase(OptimizerTestCase):
@@ -29,10 +32,50 @@ class GSOptimizerTestCase(OptimizerTestCase):
             self.fail(e.__name__)
         print(self.experiment.optimizer)
         best = self.experiment.optimizer.best_individual['coords']
-        self.assertEqual(best[0], 5)
-        self.assertEqual(best[1], 5)
+        # The minimum of the 3 Gaussians lies at the center of the 3 x 3 grid
+        self.assertEqual(best[0], 0)
+        self.assertEqual(best[1], 0)
         self.experiment.end_experiment(optimizer)
 
+    def _run_grid(self, parameters, optimum=(1.3, 2.2)):
+        trajectory = Trajectory(name='test_gs')
+        optimizer = GridSearchOptimizer(trajectory, optimizee_create_individual=self.optimizee.create_individual,
+                                        optimizee_fitness_weights=(-1.,), parameters=parameters)
+        n_simulations = 0
+        for generation in range(trajectory.par['n_iteration']):
+            individuals = trajectory.individuals[generation]
+            n_simulations += len(individuals)
+            optimizer.post_process(trajectory, [(ind.ind_idx, (np.sum((ind.coords - optimum) ** 2),))
+                                                for ind in individuals])
+        return optimizer, trajectory, n_simulations
+
+    def test_streaming_matches_full_grid(self):
+        param_grid = {'coords': (self.optimizee.bound[0], self.optimizee.bound[1], 10)}
+        full, _, _ = self._run_grid(GridSearchParameters(param_grid=param_grid, top_k=3))
+        streamed, trajectory, n_simulations = self._run_grid(
+            GridSearchParameters(param_grid=param_grid, chunk_size=7, top_k=3))
+        self.assertEqual(n_simulations, 121)
+        self.assertEqual(trajectory.par['n_iteration'], 18)
+        # The evaluated chunks do not stay in the trajectory
+        self.assertEqual(trajectory.individuals, {})
+        np.testing.assert_array_equal(streamed.top_points, full.top_points)
+        np.testing.assert_array_equal(streamed.best_individual['coords'], full.best_individual['coords'])
+        np.testing.assert_array_equal(full.best_individual['coords'], [1., 2.])
+
+    def test_refinement_levels(self):
+        # The step shrinks from 1 to 0.2 and 0.04, so the optimum (1.32, 2.24) is a grid point of the last level
+        param_grid = {'coords': (self.optimizee.bound[0], self.optimizee.bound[1], 10)}
+        optimizer, trajectory, n_simulations = self._run_grid(
+            GridSearchParameters(param_grid=param_grid, top_k=3, n_levels=3), optimum=[1.32, 2.24])
+        self.assertEqual(trajectory.par['n_iteration'], 3)
+        # A full grid with the same resolution would have 251 x 251 points
+        self.assertEqual(n_simulations, 121 + 2 * 3 * 121)
+        np.testing.assert_allclose(optimizer.best_individual['coords'], [1.32, 2.24], atol=1e-12)
+        with self.assertRaises(ValueError):
+            GridSearchOptimizer(Trajectory(name='test_gs'), optimizee_create_individual=self.optimizee.create_individual,
+                                optimizee_fitness_weights=(-1.,),
+                                parameters=GridSearchParameters(param_grid={'coords': (-5, 5, 2)}, n_levels=2))
+
 
 def suite():
     suite = unittest.makeSuite(GSOptimizerTestCase, 'test')
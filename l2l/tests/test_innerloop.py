@@ -1,11 +1,537 @@
-
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+import threading
+import time
 import unittest
 
+import numpy as np
+
+from l2l.optimizees.functions.benchmarked_functions import BenchmarkedFunctions
+from l2l.optimizees.functions.function_generator import FunctionGenerator, LangermannParameters, \
+    PermutationParameters, ShekelParameters
+from l2l.optimizees.functions.optimizee import FunctionGeneratorOptimizee
+from l2l.optimizees.optimizee import Optimizee
+from l2l.optimizers.crossentropy import CrossEntropyOptimizer, CrossEntropyParameters
+from l2l.optimizers.crossentropy.distribution import Gaussian
+from l2l.optimizers.evolution import GeneticAlgorithmOptimizer, GeneticAlgorithmParameters, \
+    VectorizedGeneticAlgorithmOptimizer
+from l2l.optimizers.simulatedannealing.optimizer import SimulatedAnnealingParameters, SimulatedAnnealingOptimizer, \
+    AvailableCoolingSchedules
+from l2l.paths import Paths
+from l2l.utils.environment import Environment
+from l2l.utils.failures import IndividualsFailedError, SimulationError
+from l2l.utils.JUBE_runner import JUBERunner, prepare_optimizee
+from l2l.utils.pilot_runner import PilotRunner
+from l2l.utils.pool_runner import PoolRunner, IndividualExecutionError
+from l2l.utils.result_store import ResultStore
+from l2l.utils.trajectory import Trajectory
+from l2l.utils.work_units import read_work_unit, write_work_units
+
+
+class FailingOptimizee:
+    """
+    Optimizee whose simulation fails for one specific individual
+    """
+
+    def __init__(self, failing_idx):
+        self.failing_idx = failing_idx
+
+    def simulate(self, traj):
+        if traj.individual.ind_idx == self.failing_idx:
+            raise ValueError("Simulation failed")
+        return (float(traj.individual.ind_idx),)
+
+
+class FlakyOptimizee:
+    """
+    Optimizee whose simulation fails the first time it is called for each of the given individuals, or takes
+    `sleep` seconds instead if `sleep` is set
+    """
+
+    def __init__(self, flaky_idx, sleep=None):
+        self.flaky_idx = flaky_idx
+        self.sleep = sleep
+        self.failed = set()
+
+    def simulate(self, traj):
+        ind_idx = traj.individual.ind_idx
+        if ind_idx in self.flaky_idx and ind_idx not in self.failed:
+            self.failed.add(ind_idx)
+            if self.sleep is None:
+                raise ValueError("Simulation failed")
+            time.sleep(self.sleep)
+        return (float(ind_idx),)
+
 
 class InnerLoopTestCase(unittest.TestCase):
 
     def setUp(self):
-        return
+        bench_functs = BenchmarkedFunctions()
+        (_, benchmark_function), _ = bench_functs.get_function_by_index(0, noise=False)
+        self.trajectory = Trajectory(name='test_innerloop')
+        self.optimizee = FunctionGeneratorOptimizee(self.trajectory, benchmark_function, seed=1)
+        self.n_individuals = 7
+        self._expand(0)
+
+    def _expand(self, generation):
+        self.trajectory.f_expand({
+            'generation': [generation],
+            'ind_idx': range(self.n_individuals),
+            'individual.coords': [self.optimizee.create_individual()['coords'] for _ in range(self.n_individuals)],
+        })
+
+    def _serial_results(self, generation):
+        results = []
+        for ind in self.trajectory.individuals[generation]:
+            self.trajectory.individual = ind
+            results.append((ind.ind_idx, self.optimizee.simulate(self.trajectory)))
+        return results
+
+    def test_batch_matches_serial(self):
+        bench_functs = BenchmarkedFunctions()
+        for function_id in range(len(bench_functs.function_name_map)):
+            (_, benchmark_function), _ = bench_functs.get_function_by_index(function_id, noise=True)
+            batch_optimizee = FunctionGeneratorOptimizee(self.trajectory, benchmark_function, seed=1)
+            serial_optimizee = FunctionGeneratorOptimizee(self.trajectory, benchmark_function, seed=1)
+            creator = FunctionGeneratorOptimizee(self.trajectory, benchmark_function, seed=2)
+            individuals = self.trajectory.individuals[0]
+            for ind in individuals:
+                ind.f_add_parameter('individual.coords', creator.create_individual()['coords'])
+            batch = batch_optimizee.simulate_batch(self.trajectory, individuals)
+            # The default implementation calls simulate for every individual
+            serial = Optimizee.simulate_batch(serial_optimizee, self.trajectory, individuals)
+            np.testing.assert_allclose(np.array(batch), np.array(serial), rtol=1e-12)
+
+    def test_function_kernels_broadcast(self):
+        random_state = np.random.RandomState(3)
+        A, c = random_state.rand(9, 4) * 10, random_state.rand(9)
+        generator = FunctionGenerator([ShekelParameters(A=A.tolist(), c=c.tolist()),
+                                       LangermannParameters(A=A.tolist(), c=c.tolist()),
+                                       PermutationParameters(beta=0.5)], dims=4)
+        xs = random_state.rand(11, 4) * 4 - 2
+        shekel, langermann, permutation = generator.gen_functions
+        np.testing.assert_allclose(shekel(xs), [-sum(1 / np.sum((x - a) ** 2 + ci) for a, ci in zip(A, c))
+                                                for x in xs], rtol=1e-12)
+        for f in generator.gen_functions:
+            np.testing.assert_allclose(f(xs), [f(x) for x in xs], rtol=1e-12)
+        np.testing.assert_allclose(generator.cost_function_batch(xs), [generator.cost_function(x) for x in xs],
+                                   rtol=1e-12)
+
+    def test_pool_matches_serial(self):
+        pool = PoolRunner(self.trajectory, self.optimizee.simulate, n_workers=2, chunk_size=3)
+        try:
+            self.assertEqual(pool.run(self.trajectory, 0), self._serial_results(0))
+            # The same workers are reused for the next generation
+            self._expand(1)
+            self.assertEqual(pool.run(self.trajectory, 1), self._serial_results(1))
+        finally:
+            pool.close()
+        self.assertEqual(pool.pool_size, 2)
+        self.assertEqual(pool.queue_depth, 0)
+        self.assertLessEqual(len(pool.worker_stats), 2)
+        self.assertEqual(sum(s['n_individuals'] for s in pool.worker_stats.values()), 2 * self.n_individuals)
+        self.assertEqual(sum(s['n_tasks'] for s in pool.worker_stats.values()), 6)
+
+    def test_pool_reports_failing_individual(self):
+        pool = PoolRunner(self.trajectory, FailingOptimizee(failing_idx=4).simulate, n_workers=2, chunk_size=2)
+        try:
+            with self.assertRaises(IndividualExecutionError) as context:
+                pool.run(self.trajectory, 0)
+        finally:
+            pool.close()
+        self.assertEqual(context.exception.ind_idx, 4)
+        self.assertEqual(context.exception.generation, 0)
+
+    def _run_environment(self, runfunc, n_iteration=1, **keyword_args):
+        env = Environment(trajectory='test_environment', **keyword_args)
+        env.trajectory = self.trajectory
+        self.trajectory.f_add_parameter('n_iteration', n_iteration)
+        env.add_postprocessing(lambda traj, results: None)
+        return env, env.run(runfunc)
+
+    def test_evaluation_cache(self):
+        cache_path = os.path.join(tempfile.mkdtemp(), 'cache.sqlite')
+        simulated = []
+
+        def simulate(traj):
+            simulated.append(traj.individual.ind_idx)
+            return self.optimizee.simulate(traj)
+
+        # The second generation repeats the individuals of the first one
+        self.trajectory.individuals[1] = self.trajectory.individuals[0]
+        _, results = self._run_environment(simulate, n_iteration=2, cache=True, cache_path=cache_path,
+                                           cache_size=self.n_individuals)
+        self.assertEqual(simulated, list(range(self.n_individuals)))
+        self.assertEqual(results[0], self._serial_results(0))
+        self.assertEqual(results[1], results[0])
+        self.assertEqual(self.trajectory.results.evaluation_cache[0], {'hits': 0, 'misses': self.n_individuals})
+        self.assertEqual(self.trajectory.results.evaluation_cache[1], {'hits': self.n_individuals, 'misses': 0})
+
+        # Another experiment finds the fitnesses in the persistent cache
+        env = Environment(trajectory='test_environment', cache=True, cache_path=cache_path, cache_size=2)
+        env.trajectory = self.trajectory
+        env.add_postprocessing(lambda traj, results: None)
+        self.assertEqual(env.run(simulate)[0], results[0])
+        self.assertEqual(len(simulated), self.n_individuals)
+        self.assertEqual(len(env.cache), 2)
+
+    def test_deduplicate_individuals(self):
+        coords = [self.optimizee.create_individual()['coords'] for _ in range(3)]
+        self.trajectory.f_expand({
+            'generation': [1],
+            'ind_idx': range(self.n_individuals),
+            'individual.coords': [coords[i % 3] for i in range(self.n_individuals)],
+        })
+        simulated = []
+
+        def simulate(traj):
+            simulated.append(traj.individual.ind_idx)
+            return self.optimizee.simulate(traj)
+
+        env = Environment(trajectory='test_environment', deduplicate=True)
+        env.trajectory = self.trajectory
+        self.assertEqual(env._evaluate_generation(1, simulate), self._serial_results(1))
+        self.assertEqual(simulated, [0, 1, 2])
+        self.assertEqual(env.run_id, 3)
+
+    def test_cache_needs_deterministic_optimizee(self):
+        bench_functs = BenchmarkedFunctions()
+        (_, noisy_function), _ = bench_functs.get_function_by_index(0, noise=True)
+        noisy_optimizee = FunctionGeneratorOptimizee(self.trajectory, noisy_function, seed=1)
+        self.assertFalse(noisy_optimizee.deterministic)
+        self.assertTrue(self.optimizee.deterministic)
+        self.trajectory.f_add_parameter('n_iteration', 1)
+        for keyword_args in [dict(cache=True), dict(deduplicate=True)]:
+            env = Environment(trajectory='test_environment', **keyword_args)
+            env.trajectory = self.trajectory
+            env.add_postprocessing(lambda traj, results: None)
+            with self.assertRaisesRegex(ValueError, 'deterministic'):
+                env.run(noisy_optimizee.simulate)
+
+    def test_failed_individuals_penalty(self):
+        env, results = self._run_environment(FailingOptimizee(failing_idx=4).simulate, on_failure='penalty',
+                                             penalty_fitness=(-100.,))
+        expected = [(i, (-100.,) if i == 4 else (float(i),)) for i in range(self.n_individuals)]
+        self.assertEqual(results[0], expected)
+        self.assertEqual(list(self.trajectory.results.failed_individuals[0].keys()), [4])
+        self.assertEqual(env.run_id, self.n_individuals)
+
+    def test_failed_individuals_dropped(self):
+        _, results = self._run_environment(FailingOptimizee(failing_idx=4).simulate, on_failure='drop')
+        self.assertEqual(results[0], [(i, (float(i),)) for i in range(self.n_individuals) if i != 4])
+
+    def test_failed_individuals_dropped_by_optimizer(self):
+        def create_ga(traj, optimizee):
+            parameters = GeneticAlgorithmParameters(seed=0, popsize=6, CXPB=0.5, MUTPB=0.3, NGEN=3, indpb=0.02,
+                                                    tournsize=2, matepar=0.5, mutpar=1)
+            return GeneticAlgorithmOptimizer(traj, optimizee_create_individual=optimizee.create_individual,
+                                             optimizee_fitness_weights=(-0.1,), parameters=parameters)
+
+        def create_vectorized_ga(traj, optimizee):
+            parameters = GeneticAlgorithmParameters(seed=0, popsize=6, CXPB=0.5, MUTPB=0.3, NGEN=3, indpb=0.02,
+                                                    tournsize=2, matepar=0.5, mutpar=1)
+            return VectorizedGeneticAlgorithmOptimizer(traj, optimizee_create_individual=optimizee.create_individual,
+                                                       optimizee_fitness_weights=(-0.1,), parameters=parameters)
+
+        def create_ce(traj, optimizee):
+            parameters = CrossEntropyParameters(pop_size=6, rho=0.5, smoothing=0.0, temp_decay=0, n_iteration=3,
+                                                distribution=Gaussian(), stop_criterion=np.inf, seed=1)
+            return CrossEntropyOptimizer(traj, optimizee_create_individual=optimizee.create_individual,
+                                         optimizee_fitness_weights=(-1.,), parameters=parameters)
+
+        for create_optimizer in [create_ga, create_vectorized_ga, create_ce]:
+            env = Environment(trajectory='test_drop', on_failure='drop')
+            optimizee = FunctionGeneratorOptimizee(env.trajectory, self.optimizee.fg_instance, seed=1)
+            optimizer = create_optimizer(env.trajectory, optimizee)
+            env.add_postprocessing(optimizer.post_process)
+
+            def simulate(traj):
+                if traj.individual.generation == 0 and traj.individual.ind_idx == 1:
+                    raise ValueError("Simulation failed")
+                return optimizee.simulate(traj)
+
+            if not optimizer.supports_partial_results:
+                # The optimizer matches the results by position
+                with self.assertRaises(ValueError):
+                    env.run(simulate)
+                continue
+            results = env.run(simulate)
+            self.assertEqual([ind_idx for ind_idx, _ in results[0]], [0, 2, 3, 4, 5])
+            self.assertEqual(sorted(results.keys()), [0, 1, 2])
+            self.assertIsNotNone(optimizer.best_individual)
+
+    def test_failed_individuals_raise(self):
+        with self.assertRaises(IndividualsFailedError) as context:
+            self._run_environment(FailingOptimizee(failing_idx=4).simulate, max_retries=2)
+        self.assertEqual(list(context.exception.failures.keys()), [4])
+        with self.assertRaises(ValueError):
+            Environment(trajectory='test_failures', on_failure='penalty')
+
+    def test_failed_individuals_retried(self):
+        optimizee = FlakyOptimizee(flaky_idx=[1, 5])
+        _, results = self._run_environment(optimizee.simulate, max_retries=1)
+        self.assertEqual(results[0], [(i, (float(i),)) for i in range(self.n_individuals)])
+        self.assertIsNone(self.trajectory.results.f_get_result('failed_individuals'))
+
+    def test_individual_timeout(self):
+        optimizee = FlakyOptimizee(flaky_idx=[2], sleep=5.)
+        start = time.time()
+        _, results = self._run_environment(optimizee.simulate, timeout=0.2, on_failure='penalty',
+                                           penalty_fitness=(-1.,))
+        self.assertLess(time.time() - start, 5.)
+        self.assertEqual(results[0][2], (2, (-1.,)))
+        self.assertIn('IndividualTimeoutError', self.trajectory.results.failed_individuals[0][2])
+
+    def test_individual_timeout_outside_main_thread(self):
+        # SIGALRM cannot be used outside the main thread, the individuals run without deadline
+        optimizee = FlakyOptimizee(flaky_idx=[2], sleep=0.3)
+        outcome = {}
+
+        def run_environment():
+            try:
+                outcome['results'] = self._run_environment(optimizee.simulate, timeout=0.1)[1]
+            except Exception as e:
+                outcome['error'] = e
+
+        thread = threading.Thread(target=run_environment)
+        thread.start()
+        thread.join()
+        self.assertNotIn('error', outcome)
+        self.assertEqual(outcome['results'][0], [(i, (float(i),)) for i in range(self.n_individuals)])
+
+    def test_pool_run_individuals_reports_failures(self):
+        pool = PoolRunner(self.trajectory, FailingOptimizee(failing_idx=4).simulate, n_workers=2, chunk_size=2)
+        try:
+            results, failures = pool.run_individuals(0, self.trajectory.individuals[0])
+        finally:
+            pool.close()
+        self.assertEqual(results, [(i, (float(i),)) for i in range(self.n_individuals) if i != 4])
+        self.assertEqual(list(failures.keys()), [4])
+        self.assertIn('Simulation failed', failures[4])
+
+    def test_jube_results_collected_on_completion(self):
+        root_dir = tempfile.mkdtemp()
+        paths = Paths('test_innerloop', dict(run_num='test'), root_dir_path=root_dir)
+        self.trajectory.f_add_parameter_group("JUBE_params", "Contains JUBE parameters")
+        self.trajectory.f_add_parameter_to_group("JUBE_params", "exec", "python")
+        self.trajectory.f_add_parameter_to_group("JUBE_params", "paths_obj", paths)
+        self.trajectory.f_add_parameter_to_group("JUBE_params", "ready_poll_min", 0.01)
+        self.trajectory.f_add_parameter_to_group("JUBE_params", "ready_poll_max", 0.05)
+        jube = JUBERunner(self.trajectory)
+        individuals = self.trajectory.individuals[0]
+
+        def finish_individuals():
+            # Individuals finish in reverse order, one after the other
+            for ind in reversed(individuals):
+                fname = os.path.join(jube.work_paths["results"], "results_%d_0.bin" % ind.ind_idx)
+                with open(fname, "wb") as handle:
+                    pickle.dump(float(ind.ind_idx), handle)
+                open(os.path.join(jube.work_paths["ready_files"], "ready_0_%d" % ind.ind_idx), "w").close()
+                time.sleep(0.01)
+
+        writer = threading.Thread(target=finish_individuals)
+        writer.start()
+        results = list(jube.iter_results(0, individuals))
+        writer.join()
+        self.assertEqual(sorted(results), [(i, float(i)) for i in range(self.n_individuals)])
+
+    def test_result_store_keeps_window(self):
+        results_path = tempfile.mkdtemp()
+        env = Environment(trajectory='test_store', results_path=results_path, results_window=2)
+        optimizee = FunctionGeneratorOptimizee(env.trajectory, self.optimizee.fg_instance, seed=1)
+        parameters = CrossEntropyParameters(pop_size=6, rho=0.5, smoothing=0.0, temp_decay=0, n_iteration=5,
+                                            distribution=Gaussian(), stop_criterion=np.inf, seed=1)
+        optimizer = CrossEntropyOptimizer(env.trajectory, optimizee_create_individual=optimizee.create_individual,
+                                          optimizee_fitness_weights=(-1.,), parameters=parameters)
+        individuals = {}
+        postprocessing = optimizer.post_process
+
+        def record_individuals(traj, results):
+            individuals[optimizer.g] = [ind.coords.copy() for ind in traj.individuals[optimizer.g]]
+            postprocessing(traj, results)
+
+        env.add_postprocessing(record_individuals)
+        results = env.run(optimizee.simulate)
+        # Only the last two generations are kept in memory
+        self.assertEqual(sorted(results.keys()), [3, 4])
+        self.assertEqual(sorted(env.trajectory.individuals.keys()), [3, 4])
+        self.assertEqual(sorted(env.trajectory.results.all_results.f_to_dict().keys()), [3, 4])
+
+        store = ResultStore(results_path)
+        self.assertEqual(store.generations, [0, 1, 2, 3, 4])
+        generation = store.load_generation(1)
+        self.assertIsInstance(generation['fitness'], np.memmap)
+        self.assertEqual(generation['fitness'].shape, (6, 1))
+        np.testing.assert_array_equal(generation['ind_idx'], np.arange(6))
+        np.testing.assert_array_equal(generation['individuals'].get_grouped_dict()['coords'], individuals[1])
+        self.assertEqual(generation['generation_params']['algorithm_params']['generation'], 1)
+
+    def test_resume_from_checkpoint(self):
+        checkpoint_path = os.path.join(tempfile.mkdtemp(), 'checkpoint.bin')
+        env = Environment(trajectory='test_checkpoint', checkpoint_path=checkpoint_path, checkpoint_interval=3)
+        optimizee = FunctionGeneratorOptimizee(env.trajectory, self.optimizee.fg_instance, seed=1)
+        parameters = GeneticAlgorithmParameters(seed=0, popsize=6, CXPB=0.5, MUTPB=0.3, NGEN=5, indpb=0.5,
+                                                tournsize=2, matepar=0.5, mutpar=1)
+        optimizer = GeneticAlgorithmOptimizer(env.trajectory, optimizee_create_individual=optimizee.create_individual,
+                                              optimizee_fitness_weights=(-0.1,), parameters=parameters)
+        env.add_postprocessing(optimizer.post_process)
+        results = env.run(optimizee.simulate)
+
+        # The checkpoint was written after generation 2, the last two generations are run again from it
+        resumed_env = Environment(trajectory='test_resumed')
+        checkpoint = resumed_env.load_checkpoint(checkpoint_path)
+        self.assertEqual(checkpoint['generation'], 3)
+        resumed_results = resumed_env.run(checkpoint['runfunc'], checkpoint['generation'], checkpoint['result'])
+        resumed_optimizer = resumed_env.postprocessing.__self__
+        self.assertIsNot(resumed_optimizer, optimizer)
+        self.assertEqual(resumed_results, results)
+        self.assertEqual(resumed_env.run_id, env.run_id)
+        np.testing.assert_array_equal(resumed_optimizer.best_individual['coords'], optimizer.best_individual['coords'])
+        self.assertEqual([ind.fitness.values for ind in resumed_optimizer.hall_of_fame],
+                         [ind.fitness.values for ind in optimizer.hall_of_fame])
+
+    def test_jube_work_units(self):
+        root_dir = tempfile.mkdtemp()
+        paths = Paths('test_innerloop', dict(run_num='test'), root_dir_path=root_dir)
+        self.trajectory.f_add_parameter_group("JUBE_params", "Contains JUBE parameters")
+        self.trajectory.f_add_parameter_to_group("JUBE_params", "exec", "python")
+        self.trajectory.f_add_parameter_to_group("JUBE_params", "paths_obj", paths)
+        self._expand(1)
+        self.trajectory.results.f_add_result_to_group("all_results", 0, self._serial_results(0))
+        jube = JUBERunner(self.trajectory)
+        individuals = self.trajectory.individuals[1]
+        path_ready = os.path.join(jube.work_paths["ready_files"], "ready_1_")
+        jube.prepare_run_file(path_ready)
+        prepare_optimizee(self.optimizee, paths.simulation_path)
+        write_work_units(jube.work_units_path(1), self.trajectory.f_slim_copy(), individuals)
+
+        # The work unit only holds the parameters and the individual, not the history of the trajectory
+        trajectory = read_work_unit(jube.work_units_path(1), 3)
+        self.assertEqual((trajectory.individual.generation, trajectory.individual.ind_idx), (1, 3))
+        np.testing.assert_array_equal(trajectory.individual.coords, individuals[3].coords)
+        self.assertEqual(trajectory.individuals, {})
+        self.assertEqual(trajectory.results.all_results.f_to_dict(), {})
+        self.assertIs(trajectory.par.trajectory, trajectory)
+        self.assertIsNotNone(trajectory.JUBE_params)
+        with self.assertRaises(KeyError):
+            read_work_unit(jube.work_units_path(1), self.n_individuals)
+
+        # The generated run file simulates the individual from its work unit
+        l2l_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join([l2l_root, os.environ.get('PYTHONPATH', '')]))
+        subprocess.check_call([sys.executable, os.path.join(jube.work_paths["run_files"], "run_optimizee.py"),
+                               "3", "1"], env=env)
+        self.assertTrue(os.path.isfile(path_ready + "3"))
+        self.trajectory.individual = individuals[3]
+        self.assertEqual(jube.collect_result(1, 3), self.optimizee.simulate(self.trajectory))
+
+    def _pilot_runner(self, optimizee, n_workers=2):
+        paths = Paths('test_innerloop', dict(run_num='test'), root_dir_path=tempfile.mkdtemp())
+        self.trajectory.f_add_parameter_group("JUBE_params", "Contains JUBE parameters")
+        self.trajectory.f_add_parameter_to_group("JUBE_params", "exec", "python")
+        self.trajectory.f_add_parameter_to_group("JUBE_params", "paths_obj", paths)
+        self.trajectory.f_add_parameter_to_group("JUBE_params", "pilot_workers", n_workers)
+        self.trajectory.f_add_parameter_to_group("JUBE_params", "ready_poll_min", 0.01)
+        self.trajectory.f_add_parameter_to_group("JUBE_params", "ready_poll_max", 0.05)
+        prepare_optimizee(optimizee, paths.simulation_path)
+        pilot = PilotRunner(self.trajectory)
+        pilot.start()
+        return pilot
+
+    def test_pilot_workers_match_serial(self):
+        pilot = self._pilot_runner(self.optimizee)
+        try:
+            self.assertEqual(pilot.run(self.trajectory, 0), self._serial_results(0))
+            # The same workers run the next generation
+            self._expand(1)
+            self.assertEqual(pilot.run(self.trajectory, 1), self._serial_results(1))
+            processes = list(pilot.processes)
+        finally:
+            pilot.close()
+        self.assertEqual([process.returncode for process in processes], [0, 0])
+        self.assertEqual(os.listdir(pilot.work_paths['queue']), [])
+        self.assertEqual(len(os.listdir(pilot.work_paths['claimed'])), 2 * self.n_individuals)
+
+    def test_pilot_worker_reports_failing_individual(self):
+        pilot = self._pilot_runner(FailingOptimizee(failing_idx=4))
+        try:
+            results, failures = pilot.run_individuals(self.trajectory, 0, self.trajectory.individuals[0])
+            self.assertEqual([ind_idx for ind_idx, _ in results], [0, 1, 2, 3, 5, 6])
+            self.assertEqual(list(failures), [4])
+            self.assertIn("Simulation failed", failures[4])
+            # Without fault tolerance the failure is raised instead of waiting for the result forever
+            with self.assertRaises(SimulationError):
+                pilot.run(self.trajectory, 0)
+        finally:
+            pilot.close()
+
+    def test_pilot_withdraws_timed_out_tickets(self):
+        pilot = self._pilot_runner(FlakyOptimizee(flaky_idx=[0], sleep=2.), n_workers=1)
+        try:
+            # Wait for the worker to be up
+            pilot.run_individuals(self.trajectory, 0, self.trajectory.individuals[0][1:])
+            # The only worker is busy with the first individual until the others have timed out
+            self._expand(1)
+            results, failures = pilot.run_individuals(self.trajectory, 1, self.trajectory.individuals[1], timeout=1.)
+            self.assertEqual(results, [])
+            self.assertEqual(sorted(failures), list(range(self.n_individuals)))
+            self.assertIn("still running", failures[0])
+            self.assertTrue(all("still running" not in failures[ind_idx] for ind_idx in range(1, self.n_individuals)))
+            self.assertEqual(os.listdir(pilot.work_paths['queue']), [])
+        finally:
+            pilot.close()
+        # The withdrawn individuals were never run
+        claimed = [name.split('.')[0] for name in os.listdir(pilot.work_paths['claimed'])]
+        self.assertEqual([name for name in claimed if name.startswith('1_')], ['1_0'])
+
+    def _run_asynchronous(self, create_optimizer):
+        env = Environment(trajectory='test_async', n_workers=3, asynchronous=True)
+        bench_functs = BenchmarkedFunctions()
+        (_, benchmark_function), _ = bench_functs.get_function_by_index(0, noise=False)
+        optimizee = FunctionGeneratorOptimizee(env.trajectory, benchmark_function, seed=1)
+        optimizer = create_optimizer(env.trajectory, optimizee)
+        env.add_postprocessing(optimizer.post_process)
+        env.add_async_postprocessing(optimizer.post_process_async)
+        results = env.run(optimizee.simulate)
+        return env, optimizer, results
+
+    def test_asynchronous_steady_state_ga(self):
+        def create_optimizer(traj, optimizee):
+            parameters = GeneticAlgorithmParameters(seed=0, popsize=5, CXPB=0.5, MUTPB=0.3, NGEN=4, indpb=0.02,
+                                                    tournsize=2, matepar=0.5, mutpar=1)
+            return GeneticAlgorithmOptimizer(traj, optimizee_create_individual=optimizee.create_individual,
+                                             optimizee_fitness_weights=(-0.1,), parameters=parameters)
+
+        env, optimizer, results = self._run_asynchronous(create_optimizer)
+        ind_indices = [ind_idx for generation in results.values() for ind_idx, _ in generation]
+        self.assertEqual(sorted(ind_indices), list(range(20)))
+        self.assertEqual(len(optimizer.pop), 5)
+        self.assertTrue(all(ind.fitness.valid for ind in optimizer.pop))
+        self.assertEqual(optimizer.in_flight, {})
+        self.assertEqual(env.run_id, 20)
+
+    def test_asynchronous_sa_chains(self):
+        def create_optimizer(traj, optimizee):
+            parameters = SimulatedAnnealingParameters(n_parallel_runs=3, noisy_step=.03, temp_decay=.99,
+                                                      n_iteration=4, stop_criterion=np.Inf, seed=1,
+                                                      cooling_schedule=AvailableCoolingSchedules.DEFAULT)
+            return SimulatedAnnealingOptimizer(traj, optimizee_create_individual=optimizee.create_individual,
+                                               optimizee_fitness_weights=(-1,), parameters=parameters)
+
+        env, optimizer, results = self._run_asynchronous(create_optimizer)
+        # Every chain takes one step per generation
+        self.assertEqual(sorted(results.keys()), [0, 1, 2, 3])
+        self.assertTrue(all(len(generation) == 3 for generation in results.values()))
+        self.assertEqual(optimizer.g, 3)
+
+    def test_asynchronous_needs_pool(self):
+        env = Environment(trajectory='test_async', asynchronous=True)
+        with self.assertRaises(ValueError):
+            env.run(FailingOptimizee(failing_idx=0).simulate)
+
 
 def suite():
     suite = unittest.makeSuite(InnerLoopTestCase, 'test')
@@ -14,4 +540,4 @@ def suite():
 
 def run():
     runner = unittest.TextTestRunner(verbosity=2)
-    runner.run(suite())
\ No newline at end of file
+    runner.run(suite())
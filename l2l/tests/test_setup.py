@@ -7,9 +7,18 @@ from l2l.logging_tools import create_shared_logger_data, configure_loggers
 from l2l.paths import Paths
 from l2l.optimizees.functions.benchmarked_functions import BenchmarkedFunctions
 from l2l.optimizees.functions.optimizee import FunctionGeneratorOptimizee
+from l2l.optimizees.mnist import MNISTOptimizee, MNISTOptimizeeParameters
+from l2l.optimizees.mnist.dataset import load_dataset, DATASET_VERSION
 from l2l.utils.experiment import Experiment
+from l2l.utils.population import Population
+from l2l.utils.shared_array import SharedArray
+from l2l import dict_to_list, DictEntryType
+
+import numpy as np
 
 import os
+import pickle
+import tempfile
 
 
 class SetupTestCase(unittest.TestCase):
@@ -42,6 +51,135 @@ class SetupTestCase(unittest.TestCase):
         self.trajectory.f_add_parameter_to_group("Test_params", "param1", "value1")
         self.assertEqual("value1", self.trajectory.Test_params.params["param1"])
 
+    def test_trajectory_run_index_lookup(self):
+        self.trajectory.current_results = [(run_idx, (0.,)) for run_idx in range(10, 20)]
+        self.trajectory.v_idx = 13
+        self.assertEqual(self.trajectory.par.ind_idx, 3)
+        # Results appended in place are found as well
+        self.trajectory.current_results.append((42, (0.,)))
+        self.trajectory.v_idx = 42
+        self.assertEqual(self.trajectory.par.ind_idx, 10)
+        self.trajectory.v_idx = 7
+        with self.assertRaises(ValueError):
+            self.trajectory.par.ind_idx
+
+    def test_population_expand(self):
+        individuals = [{'coords': np.array([i, i + 1.]), 'scale': 2. * i} for i in range(4)]
+        population = Population.from_individuals(individuals)
+        self.assertEqual(population.data.shape, (4, 3))
+        np.testing.assert_array_equal(population.data[2], dict_to_list(individuals[2]))
+        self.trajectory.f_expand_population(population, 3)
+        ind = self.trajectory.individuals[3][2]
+        self.assertEqual((ind.generation, ind.ind_idx), (3, 2))
+        np.testing.assert_array_equal(ind.coords, [2., 3.])
+        self.assertEqual(ind.scale, 4.)
+        population.apply_bounding(lambda x: {'coords': np.clip(x['coords'], 0., 2.), 'scale': x['scale']})
+        np.testing.assert_array_equal(population[3]['coords'], [2., 2.])
+
+    def test_individual_shares_generation_columns(self):
+        population = Population(np.arange(12.).reshape(4, 3), [('coords', DictEntryType.Sequence, 2),
+                                                                 ('scale', DictEntryType.Scalar, 1)])
+        self.trajectory.f_expand_population(population, 0)
+        ind = self.trajectory.individuals[0][1]
+        self.assertFalse(hasattr(ind, '__dict__'))
+        self.assertEqual(sorted(ind.keys), ['individual.coords', 'individual.scale'])
+        # Parameters are read from the population array
+        population.data[1, 0] = -1.
+        np.testing.assert_array_equal(ind.coords, [-1., 4.])
+        self.assertIsNone(ind.missing)
+        # Pickling keeps the parameters of the individual only
+        restored = pickle.loads(pickle.dumps(ind))
+        self.assertEqual((restored.generation, restored.ind_idx), (0, 1))
+        np.testing.assert_array_equal(restored['coords'], [-1., 4.])
+        self.assertEqual(restored.scale, 5.)
+        # Adding a parameter gives the individual its own parameter dictionary
+        ind.f_add_parameter('individual.offset', 1.)
+        population.data[1, 2] = 0.
+        self.assertEqual(ind.scale, 5.)
+        self.assertEqual(ind.offset, 1.)
+        self.assertIsNone(self.trajectory.individuals[0][2].offset)
+
+    def test_shared_dataset(self):
+        with tempfile.TemporaryDirectory() as data_path:
+            parameters = MNISTOptimizeeParameters(n_hidden=5, seed=1, use_small_mnist=True)
+            optimizee = MNISTOptimizee(self.trajectory, parameters, data_path=data_path)
+            self.assertIsInstance(optimizee.data_images, np.memmap)
+            self.assertEqual(optimizee.data_images.shape, (1797, 64))
+            # The pickled optimizee only holds the handles to the dataset files
+            pickled = pickle.dumps(optimizee)
+            self.assertLess(len(pickled), optimizee.data_images.nbytes // 10)
+            restored = pickle.loads(pickled)
+            np.testing.assert_array_equal(restored.data_targets, optimizee.data_targets)
+            self.trajectory.individual.f_add_parameter('individual.weights', optimizee.create_individual()['weights'])
+            self.assertEqual(restored.simulate(self.trajectory), optimizee.simulate(self.trajectory))
+            # A handle without file keeps its array
+            handle = pickle.loads(pickle.dumps(SharedArray(np.arange(3))))
+            np.testing.assert_array_equal(np.asarray(handle), [0, 1, 2])
+
+    def test_mnist_dataset_cache(self):
+        with tempfile.TemporaryDirectory() as data_path:
+            with self.assertRaises(FileNotFoundError):
+                load_dataset(use_small_mnist=False, data_path=data_path, offline=True)
+            images, targets = load_dataset(use_small_mnist=True, data_path=data_path)
+            self.assertEqual(images.array.dtype, np.float32)
+            self.assertEqual(images.array.max(), 1.)
+            self.assertIn('_v{}_'.format(DATASET_VERSION), os.path.basename(images.fname))
+            # Later optimizees memory-map the cache
+            os.utime(images.fname, (0, 0))
+            optimizee = MNISTOptimizee(self.trajectory,
+                                       MNISTOptimizeeParameters(n_hidden=5, seed=1, use_small_mnist=True),
+                                       data_path=data_path, offline=True)
+            self.assertEqual(os.stat(images.fname).st_mtime, 0)
+            self.assertIsInstance(optimizee.data_images, np.memmap)
+            np.testing.assert_array_equal(optimizee.data_targets, targets.array)
+
+    def test_mnist_mini_batches(self):
+        parameters = MNISTOptimizeeParameters(n_hidden=5, seed=1, use_small_mnist=True, batch_size=100,
+                                              n_held_out=297)
+        optimizee = MNISTOptimizee(self.trajectory, parameters)
+        batch = optimizee.batch_indices(3)
+        self.assertEqual(len(batch), 100)
+        self.assertEqual(len(np.intersect1d(batch, optimizee.held_out_indices)), 0)
+        # Every process draws the same mini-batch for a generation, and another one for the next generation
+        np.testing.assert_array_equal(MNISTOptimizee(self.trajectory, parameters).batch_indices(3), batch)
+        self.assertFalse(np.array_equal(optimizee.batch_indices(4), batch))
+        # The fitness depends on the mini-batch of the generation
+        self.assertFalse(optimizee.deterministic)
+        self.assertTrue(MNISTOptimizee(self.trajectory, parameters._replace(batch_size=None)).deterministic)
+
+        individual = optimizee.create_individual()
+        self.trajectory.individual.f_add_parameter('individual.weights', individual['weights'])
+        score = optimizee.simulate(self.trajectory)
+        self.assertEqual(score * 100, round(score * 100))
+        held_out_score = optimizee.score_held_out(individual)
+        self.assertEqual(held_out_score * 297, round(held_out_score * 297))
+
+    def test_mnist_population_scores(self):
+        parameters = MNISTOptimizeeParameters(n_hidden=5, seed=1, use_small_mnist=True, batch_size=200)
+        optimizee = MNISTOptimizee(self.trajectory, parameters)
+        individuals = [optimizee.create_individual() for _ in range(6)]
+        self.trajectory.f_expand_population(Population.from_individuals(individuals), 2)
+        scores = optimizee.simulate_batch(self.trajectory, self.trajectory.individuals[2])
+        batch = optimizee.batch_indices(2)
+        for individual, score in zip(individuals, scores):
+            # Same score as the network with the weights of the individual
+            optimizee.nn.set_weights(*[w[0] for w in optimizee.stack_weights([individual['weights']])])
+            self.assertEqual(score, optimizee.nn.score(optimizee.data_images[batch], optimizee.data_targets[batch]))
+        for ind, score in zip(self.trajectory.individuals[2], scores):
+            self.trajectory.individual = ind
+            self.assertEqual(optimizee.simulate(self.trajectory), score)
+        # Chunks of a few networks, and of a few images for a single network, give the same scores
+        hidden_weights, output_weights = optimizee.stack_weights([individual['weights'] for individual in individuals])
+        for max_activations in [1, 50, 2000, 6000]:
+            np.testing.assert_array_equal(
+                optimizee.nn.score_population(hidden_weights, output_weights, optimizee.data_images[batch],
+                                              optimizee.data_targets[batch], max_activations=max_activations),
+                scores)
+
+        single_precision = MNISTOptimizee(self.trajectory, parameters._replace(use_float32=True))
+        np.testing.assert_allclose(single_precision.simulate_batch(self.trajectory, self.trajectory.individuals[2]),
+                                   scores, atol=0.01)
+
     def test_juberunner_setup(self):
         self.experiment = Experiment(root_dir_path='../../results')
         self.trajectory, _ = self.experiment.prepare_experiment(
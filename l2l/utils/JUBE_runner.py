@@ -4,6 +4,10 @@ import pickle
 import time
 import logging
 
+from l2l.utils.failures import SimulationError
+from l2l.utils.work_units import write_work_units, work_units_fname, result_fname, error_fname, ready_fname, \
+    WORK_UNITS_DIR, RESULTS_DIR, READY_DIR
+
 logger = logging.getLogger("JUBERunner")
 
 
@@ -52,7 +56,7 @@ class JUBERunner():
         self.filename = ""
         self.path = args['paths_obj'].simulation_path
         # Create directories for workspace
-        subdirs = ['jube_xml', 'run_files', 'ready_files', 'trajectories', 'results', 'work']
+        subdirs = ['jube_xml', 'run_files', READY_DIR, WORK_UNITS_DIR, RESULTS_DIR, 'work']
         self.work_paths = {sdir: os.path.join(self.path, sdir) for sdir in subdirs}
 
         os.makedirs(self.path, exist_ok=True)
@@ -61,16 +65,20 @@ class JUBERunner():
             os.makedirs(self.work_paths[dir], exist_ok=True)
 
         self.zeepath = os.path.join(self.path, "optimizee.bin")
+        # Bounds in seconds of the adaptive interval used to check for finished individuals
+        self.poll_interval_min = float(args.get('ready_poll_min', 0.1))
+        self.poll_interval_max = float(args.get('ready_poll_max', 5.0))
 
 
-    def write_pop_for_jube(self, trajectory, generation):
+    def write_pop_for_jube(self, trajectory, generation, individuals=None):
         """
         Writes an XML file which contains the parameters for JUBE
         :param trajectory: A trajectory object holding the parameters to generate the JUBE XML file for each generation
         :param generation: Id of the current generation
+        :param individuals: The individuals to run, by default all the individuals of the generation
         """
         self.trajectory = trajectory
-        eval_pop = trajectory.individuals[generation]
+        eval_pop = trajectory.individuals[generation] if individuals is None else individuals
         self.generation = generation
         fname = "_jube_%s.xml" % str(self.generation)
         self.filename = os.path.join(self.work_paths['jube_xml'], fname)
@@ -105,7 +113,7 @@ class JUBERunner():
             f.write('    <parameter name="walltime">' + self.jube_config['walltime'] + '</parameter>\n')
             f.write('    <parameter name="ppn" type="int">' + self.jube_config['ppn'] + '</parameter>\n')
             f.write('    <parameter name="ready_file_scheduler" mode="python" type="string"> ' +
-                    os.path.join(self.work_paths['ready_files'], 'ready_${index} ') +
+                    os.path.join(self.work_paths[READY_DIR], 'ready_${index} ') +
                     '</parameter>\n')
             f.write('    <parameter name="ready_file">' + self.jube_config['ready_file'] +
                     str(self.generation) + '</parameter>\n')
@@ -130,11 +138,11 @@ class JUBERunner():
         if self.scheduler != 'None':
             f.write('    <use>files,sub_job</use>\n')
             f.write('    <do done_file="' +
-                    os.path.join(self.work_paths['ready_files'], 'ready_w_%s' % self.generation) +
+                    os.path.join(self.work_paths[READY_DIR], 'ready_w_%s' % self.generation) +
                     '">$submit_cmd $job_file </do> <!-- shell command -->\n')
         else:
             f.write('    <do done_file="' +
-                    os.path.join(self.work_paths['ready_files'], 'ready_w_%s' % self.generation) +
+                    os.path.join(self.work_paths[READY_DIR], 'ready_w_%s' % self.generation) +
                     '">$exec $index ' + str(self.generation) +
                     ' -n $tasks_per_job </do> <!-- shell command -->\n')
 
@@ -180,13 +188,96 @@ class JUBERunner():
         """
         results = []
         for ind in individuals:
-            indfname = "results_%s_%s.bin" % (ind.ind_idx, generation)
-            handle = open(os.path.join(self.work_paths["results"], indfname), "rb")
-            results.append((ind.ind_idx, pickle.load(handle)))
-            handle.close()
+            results.append((ind.ind_idx, self.collect_result(generation, ind.ind_idx)))
 
         return results
 
+    def collect_result(self, generation, ind_idx):
+        """
+        Loads the result of a single individual
+        :param generation: generation id
+        :param ind_idx: index of the individual
+        :return: the object produced as result of the execution of the individual
+        :raises SimulationError: if the process which executed the individual reported an error instead
+        """
+        errfname = error_fname(self.path, generation, ind_idx)
+        if os.path.isfile(errfname):
+            with open(errfname) as handle:
+                raise SimulationError("Individual {} of generation {} failed:\n{}".format(ind_idx, generation,
+                                                                                          handle.read()))
+        with open(result_fname(self.path, generation, ind_idx), "rb") as handle:
+            return pickle.load(handle)
+
+    def _ready_file(self, generation, ind_idx):
+        return ready_fname(self.path, generation, ind_idx)
+
+    def iter_results(self, generation, individuals, timeout=None):
+        """
+        Yields the results of the individuals as soon as they finish, in order of completion.
+        :param generation: generation id
+        :param individuals: list of individuals which are executed in this generation
+        :param timeout: Time in seconds after which to stop waiting for the individuals which did not finish. None
+            waits until all individuals have finished
+        :return: generator of (ind_idx, result) tuples
+        """
+        ready_files = {self._ready_file(generation, ind.ind_idx): ind.ind_idx for ind in individuals}
+        for ready_file in self.wait_for_ready(ready_files, timeout):
+            ind_idx = ready_files[ready_file]
+            yield ind_idx, self.collect_result(generation, ind_idx)
+
+    def gather_results(self, generation, individuals, timeout=None):
+        """
+        Gathers the results of the individuals without failing on the individuals which did not finish within
+        `timeout` seconds or whose result cannot be loaded.
+        :param generation: generation id
+        :param individuals: list of individuals which are executed in this generation
+        :param timeout: Time in seconds after which to stop waiting. None waits until all individuals have finished
+        :return: a tuple (results, failures) of dictionaries indexed by ind_idx, holding the results of the finished
+            individuals and the reason of the failure of the others
+        """
+        ready_files = {self._ready_file(generation, ind.ind_idx): ind.ind_idx for ind in individuals}
+        results = {}
+        failures = {}
+        for ready_file in self.wait_for_ready(ready_files, timeout):
+            ind_idx = ready_files[ready_file]
+            try:
+                results[ind_idx] = self.collect_result(generation, ind_idx)
+            except SimulationError as e:
+                failures[ind_idx] = str(e)
+            except (OSError, EOFError, pickle.UnpicklingError) as e:
+                failures[ind_idx] = "Result could not be loaded: {!r}".format(e)
+        for ind in individuals:
+            if ind.ind_idx not in results and ind.ind_idx not in failures:
+                failures[ind.ind_idx] = "Not finished after {} seconds".format(timeout)
+        return results, failures
+
+    def _clear_ready_files(self, generation, individuals):
+        """
+        Removes the ready files and the errors left over by earlier executions of the individuals
+        """
+        for ind in individuals:
+            for fname in [self._ready_file(generation, ind.ind_idx), error_fname(self.path, generation, ind.ind_idx)]:
+                if os.path.isfile(fname):
+                    os.remove(fname)
+
+    def _dispatch(self, trajectory, generation, individuals):
+        """
+        Writes the run file and the work units of the individuals and starts their execution through JUBE
+        """
+        # Prefix of the ready files of the generation, completed by the ind_idx in the run file
+        path_ready = ready_fname(self.path, generation, '')
+        self.prepare_run_file(path_ready)
+
+        # Dump the work units of all optimizee runs in the generation into a single file. The trajectory is written
+        # once and without the history of the previous generations
+        write_work_units(self.work_units_path(generation), trajectory.f_slim_copy(), individuals)
+        if individuals:
+            trajectory.individual = individuals[-1]
+
+        # Call the main function from JUBE
+        logger.info("JUBE running generation: " + str(self.generation))
+        main(["run", self.filename])
+
     def run(self, trajectory, generation):
         """
         Takes care of running the generation by preparing the JUBE configuration files and, waiting for the execution
@@ -196,42 +287,86 @@ class JUBERunner():
         :param generation: id of the generation
         :return results: a list containing objects produced as results of the execution of each individual
         """
-        args = []
-        args.append("run")
-        args.append(self.filename)
         self.done = False
-        ready_files = []
-        path_ready = os.path.join(self.work_paths["ready_files"], "ready_%d_"%generation)
-        self.prepare_run_file(path_ready)
+        individuals = self.trajectory.individuals[generation]
+        self._dispatch(trajectory, generation, individuals)
 
-        # Dump all trajectories for each optimizee run in the generation
-        for ind in self.trajectory.individuals[generation]:
-            trajectory.individual = ind
-            trajfname = "trajectory_%s_%s.bin" % (ind.ind_idx, generation)
-            handle = open(os.path.join(self.work_paths["trajectories"], trajfname),
-                          "wb")
-            pickle.dump(trajectory, handle, pickle.HIGHEST_PROTOCOL)
-            handle.close()
-            ready_files.append(path_ready + str(ind.ind_idx))
-
-        # Call the main function from JUBE
-        logger.info("JUBE running generation: " + str(self.generation))
-        main(args)
-
-        # Wait for ready files to be written
-        while not self.is_done(ready_files):
-            time.sleep(5)
+        # Results are loaded incrementally while the individuals finish
+        collected = dict(self.iter_results(generation, individuals))
 
         # Touch done generation
         logger.info("JUBE finished generation: " + str(self.generation))
         fname = "ready_w_%s" % generation
-        f = open(os.path.join(self.work_paths["ready_files"], fname), "w")
+        f = open(os.path.join(self.work_paths[READY_DIR], fname), "w")
         f.close()
 
         self.done = True
-        results = self.collect_results_from_run(generation, self.trajectory.individuals[generation])
+        results = [(ind.ind_idx, collected[ind.ind_idx]) for ind in individuals]
         return results
 
+    def run_individuals(self, trajectory, generation, individuals, timeout=None):
+        """
+        Runs a list of individuals of the generation, usually the ones which failed in a previous attempt, without
+        waiting forever. Individuals whose ready file does not appear within `timeout` seconds after the dispatch,
+        or whose result cannot be loaded, are reported as failed.
+        :param trajectory: trajectory object storing individual parameters for each generation
+        :param generation: id of the generation
+        :param individuals: list of individuals to run
+        :param timeout: Time in seconds to wait for the individuals. None waits until all individuals have finished
+        :return: a tuple (results, failures) where results is a list of (ind_idx, fitness) tuples in the order of
+            `individuals` and failures a dictionary mapping the ind_idx of the failed individuals to the reason
+        """
+        self._clear_ready_files(generation, individuals)
+        self.write_pop_for_jube(trajectory, generation, individuals)
+        self._dispatch(trajectory, generation, individuals)
+        results, failures = self.gather_results(generation, individuals, timeout)
+        return [(ind.ind_idx, results[ind.ind_idx]) for ind in individuals if ind.ind_idx in results], failures
+
+    def work_units_path(self, generation):
+        """
+        Path of the file holding the work units of a generation, see :func:`~l2l.utils.work_units.write_work_units`
+        :param generation: id of the generation
+        """
+        return work_units_fname(self.path, generation)
+
+    def wait_for_ready(self, files, timeout=None):
+        """
+        Waits for the ready files of the individuals and yields every file as soon as it is found.
+        Instead of checking every file on each pass, the ready directories are listed once per pass and only the
+        files which are still outstanding are looked up. The interval between two passes starts at
+        `poll_interval_min` and doubles, up to `poll_interval_max`, while no new individual finishes.
+        :param files: iterable of ready files to wait for
+        :param timeout: Time in seconds after which to stop waiting for the outstanding files. None waits for all
+        :return: generator of the ready files in order of completion
+        """
+        outstanding = set(files)
+        interval = self.poll_interval_min
+        end = None if timeout is None else time.time() + timeout
+        while outstanding:
+            finished = set()
+            for directory in {os.path.dirname(f) for f in outstanding}:
+                try:
+                    present = os.listdir(directory)
+                except FileNotFoundError:
+                    continue
+                finished.update(os.path.join(directory, name) for name in present)
+            finished &= outstanding
+            for f in sorted(finished):
+                outstanding.discard(f)
+                yield f
+            if not outstanding:
+                break
+            if finished:
+                interval = self.poll_interval_min
+            else:
+                interval = min(2 * interval, self.poll_interval_max)
+            if end is not None:
+                remaining = end - time.time()
+                if remaining <= 0:
+                    break
+                interval = min(interval, remaining)
+            time.sleep(interval)
+
     def is_done(self, files):
         """
         Identifies if all files marking the end of the execution of individuals in a generation are present or not.
@@ -246,29 +381,24 @@ class JUBERunner():
 
     def prepare_run_file(self, path_ready):
         """
-        Writes a python run file which takes care of loading the optimizee from a binary file, the trajectory object
-        of each individual. Then executes the 'simulate' function of the optimizee using the trajectory and
-        writes the results in a binary file.
+        Writes a python run file which takes care of loading the optimizee from a binary file and the work unit of
+        each individual from the work unit file of the generation. Then executes the 'simulate' function of the
+        optimizee using the trajectory and writes the results in a binary file.
         :param path_ready: path to store the ready files
         :return true if all files are present, false otherwise
         """
-        trajpath = os.path.join(self.work_paths["trajectories"],
-                                'trajectory_" + str(idx) + "_" + str(iteration) + ".bin')
-        respath = os.path.join(self.work_paths['results'],
-                               'results_" + str(idx) + "_" + str(iteration) + ".bin')
         f = open(os.path.join(self.work_paths["run_files"], "run_optimizee.py"), "w")
         f.write('import pickle\n' +
                 'import sys\n' +
+                'from l2l.utils.work_units import read_work_unit, work_units_fname, result_fname\n' +
                 'idx = sys.argv[1]\n' +
                 'iteration = sys.argv[2]\n' +
-                'handle_trajectory = open("' + trajpath + '", "rb")\n' +
-                'trajectory = pickle.load(handle_trajectory)\n' +
-                'handle_trajectory.close()\n' +
+                'trajectory = read_work_unit(work_units_fname("' + self.path + '", iteration), int(idx))\n' +
                 'handle_optimizee = open("' + self.zeepath + '", "rb")\n' +
                 'optimizee = pickle.load(handle_optimizee)\n' +
                 'handle_optimizee.close()\n\n' +
                 'res = optimizee.simulate(trajectory)\n\n' +
-                'handle_res = open("' + respath + '", "wb")\n' +
+                'handle_res = open(result_fname("' + self.path + '", iteration, idx), "wb")\n' +
                 'pickle.dump(res, handle_res, pickle.HIGHEST_PROTOCOL)\n' +
                 'handle_res.close()\n\n' +
                 'handle_res = open("' + path_ready + '" + str(idx), "wb")\n' +
@@ -0,0 +1,33 @@
+import logging
+import os
+import pickle
+
+logger = logging.getLogger("utils.checkpoint")
+
+
+def save_checkpoint(fname, state):
+    """
+    Pickles the state of the outer loop into a file. The state is first written to a temporary file which then
+    replaces the checkpoint, so the checkpoint on disk is always complete even if the run is killed while writing.
+
+    :param fname: Path of the checkpoint file
+    :param state: The state to be stored, usually a dictionary
+    """
+    tmp_fname = fname + '.tmp'
+    with open(tmp_fname, 'wb') as handle:
+        pickle.dump(state, handle, protocol=pickle.HIGHEST_PROTOCOL)
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(tmp_fname, fname)
+    logger.info("Checkpoint written to %s", fname)
+
+
+def load_checkpoint(fname):
+    """
+    Loads a checkpoint written by :func:`save_checkpoint`
+
+    :param fname: Path of the checkpoint file
+    :return: the stored state
+    """
+    with open(fname, 'rb') as handle:
+        return pickle.load(handle)
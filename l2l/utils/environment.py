@@ -1,7 +1,21 @@
+import concurrent.futures
+import random
 import time
+import traceback
 
+import numpy as np
+
+from l2l.optimizees.optimizee import Optimizee
+from l2l.optimizers.optimizer import Optimizer
+from l2l.utils.checkpoint import save_checkpoint, load_checkpoint
+from l2l.utils.evaluation_cache import EvaluationCache, individual_key
+from l2l.utils.failures import FAILURE_ACTIONS, IndividualsFailedError, deadline
+from l2l.utils.individual import Individual
 from l2l.utils.trajectory import Trajectory
 from l2l.utils.JUBE_runner import JUBERunner
+from l2l.utils.pilot_runner import PilotRunner
+from l2l.utils.pool_runner import PoolRunner
+from l2l.utils.result_store import ResultStore
 import logging
 
 logger = logging.getLogger("utils.Environment")
@@ -10,8 +24,8 @@ logger = logging.getLogger("utils.Environment")
 class Environment:
     """
     The Environment class takes the place of the pypet Environment and provides the required functionality
-    to execute the inner loop. This means it uses either JUBE or sequential calls in order to execute all
-    individuals in a generation.
+    to execute the inner loop. This means it uses either JUBE, a pool of local worker processes or sequential calls
+    in order to execute all individuals in a generation.
     Based on the pypet environment concept: https://github.com/SmokinCaterpillar/pypet
     """
 
@@ -19,8 +33,42 @@ class Environment:
         """
         Initializes an Environment
         :param args: arguments passed to the environment initialization
-        :param keyword_args: arguments by keyword. Relevant keywords are trajectory and filename.
+        :param keyword_args: arguments by keyword. Relevant keywords are trajectory, filename, multiprocessing,
+        n_workers, chunk_size, asynchronous, results_path, results_window, checkpoint_path, checkpoint_interval,
+        timeout, max_retries, on_failure, penalty_fitness, cache, cache_size, cache_path and deduplicate.
         The trajectory object holds individual parameters and history per generation of the exploration process.
+        If n_workers is larger than 1 (and multiprocessing is not enabled) the individuals are executed on a pool
+        of n_workers local processes, chunk_size individuals at a time.
+        If asynchronous is True, there is no barrier between generations: every result is handed to the
+        asynchronous postprocessing as soon as it arrives (see :meth:`add_async_postprocessing`). Requires the pool.
+        If results_path is given, every generation is written to a :class:`~l2l.utils.result_store.ResultStore` in
+        that directory as soon as it is complete. With results_window set as well, only the last results_window
+        generations are kept in the trajectory and in the results returned by :meth:`run`.
+        With multiprocessing enabled and `pilot_workers` set in the JUBE_params of the trajectory, the individuals are
+        executed by long-lived pilot workers launched once for the whole run (see
+        :class:`~l2l.utils.pilot_runner.PilotRunner`) instead of one JUBE job per individual.
+        If checkpoint_path is given, the state of the outer loop is written to that file every checkpoint_interval
+        generations (default 1), see :meth:`load_checkpoint`.
+        timeout, max_retries, on_failure and penalty_fitness make the execution of a generation tolerant to failing
+        individuals. An individual fails if its simulation raises, runs longer than timeout seconds or its worker
+        dies. Failed individuals are run again up to max_retries times. Individuals which still fail are handled
+        according to on_failure: `raise` (default) stops the run, `drop` leaves them out of the results of the
+        generation and `penalty` gives them the fitness penalty_fitness. The final failures of every generation
+        are recorded in the results group `failed_individuals` of the trajectory.
+        `drop` is only accepted if the postprocessing is not an optimizer or the optimizer handles partial results,
+        see :attr:`~l2l.optimizers.optimizer.Optimizer.supports_partial_results`. Most optimizers shipped with L2L
+        match the results to the individuals by position and need `penalty` instead.
+        The timeout is enforced with SIGALRM for sequential calls, if the environment runs in the main thread, and in
+        the pool workers. With JUBE or the pilot
+        workers it bounds the time waited for the results after the individuals are dispatched.
+        If cache is True, the fitness of every individual is memoized in an
+        :class:`~l2l.utils.evaluation_cache.EvaluationCache` holding at most cache_size entries in memory (default
+        no limit) and, if cache_path is given, persisted to an SQLite database in that file. Individuals found in the
+        cache are not executed. The number of hits and misses of every generation is recorded in the results group
+        `evaluation_cache` of the trajectory.
+        If deduplicate is True, individuals of a generation with equal parameters are executed only once and all of
+        them get the fitness of that execution. The cache and the deduplication are refused for optimizees which are
+        not :attr:`~l2l.optimizees.optimizee.Optimizee.deterministic`.
         """
         if 'trajectory' in keyword_args:
             self.trajectory = Trajectory(name=keyword_args['trajectory'])
@@ -30,62 +78,477 @@ class Environment:
         self.multiprocessing = False#We don't use Jube
         if 'multiprocessing' in keyword_args:
             self.multiprocessing = keyword_args['multiprocessing']
+        self.n_workers = keyword_args.get('n_workers', 1)
+        self.chunk_size = keyword_args.get('chunk_size', 1)
+        self.asynchronous = keyword_args.get('asynchronous', False)
+        self.async_postprocessing = None
+        self.result_store = None
+        if keyword_args.get('results_path') is not None:
+            self.result_store = ResultStore(keyword_args['results_path'])
+        self.results_window = keyword_args.get('results_window')
+        if self.results_window is not None and self.results_window < 1:
+            raise ValueError("results_window needs to be greater than 0")
+        self.checkpoint_path = keyword_args.get('checkpoint_path')
+        self.checkpoint_interval = keyword_args.get('checkpoint_interval', 1)
+        if self.checkpoint_interval < 1:
+            raise ValueError("checkpoint_interval needs to be greater than 0")
+        self.timeout = keyword_args.get('timeout')
+        if self.timeout is not None and self.timeout <= 0:
+            raise ValueError("timeout needs to be greater than 0")
+        self.max_retries = keyword_args.get('max_retries', 0)
+        if self.max_retries < 0:
+            raise ValueError("max_retries needs to be at least 0")
+        self.on_failure = keyword_args.get('on_failure', 'raise')
+        if self.on_failure not in FAILURE_ACTIONS:
+            raise ValueError("on_failure needs to be one of {}".format(FAILURE_ACTIONS))
+        self.penalty_fitness = keyword_args.get('penalty_fitness')
+        if self.on_failure == 'penalty' and self.penalty_fitness is None:
+            raise ValueError("on_failure 'penalty' needs a penalty_fitness")
+        self.use_cache = keyword_args.get('cache', False)
+        self.cache_size = keyword_args.get('cache_size')
+        self.cache_path = keyword_args.get('cache_path')
+        self.cache = None
+        self.deduplicate = keyword_args.get('deduplicate', False)
+        self.pool = None
+        self.pilot = None
         self.run_id = 0
         self.enable_logging()
 
-    def run(self, runfunc):
+    def run(self, runfunc, start_generation=0, result=None):
         """
-        Runs the optimizees using either JUBE or sequential calls.
+        Runs the optimizees using either JUBE, a local process pool or sequential calls. In the asynchronous mode
+        the generations overlap and the individuals are run on the local process pool as they are created.
         :param runfunc: The function to be called from the optimizee
+        :param start_generation: id of the first generation to run. Used to continue a run from a checkpoint
+        :param result: results of the generations run before start_generation
         :return: the results of running a whole generation. Dictionary indexed by generation id.
         """
-        result = {}
+        result = {} if result is None else result
         start_outer = time.time()
-        for it in range(self.trajectory.par['n_iteration']):
-            start_it = time.time()
-            print("---multiprocessing---", self.multiprocessing)
-            if self.multiprocessing:
-                # Multiprocessing is done through JUBE, either with or without scheduler
-                logging.info("Environment run starting JUBERunner for n iterations: " + str(self.trajectory.par['n_iteration']))
-                start = time.time()
-                jube = JUBERunner(self.trajectory)
-                result[it] = []
-                # Initialize new JUBE run and execute it
-                try:
-                    jube.write_pop_for_jube(self.trajectory,it)
-                    result[it] = jube.run(self.trajectory,it)
-                except Exception as e:
-                    if self.logging:
-                        logger.exception("Error launching JUBE run: " + str(e.__cause__))
-                    raise e
+        if self.asynchronous and start_generation > 0:
+            raise ValueError("Runs in the asynchronous mode cannot be continued from a checkpoint")
+        if self.asynchronous and (self.multiprocessing or self.n_workers < 2):
+            raise ValueError("The asynchronous mode needs the local worker pool, i.e. n_workers > 1 "
+                             "and multiprocessing disabled")
+        if self.asynchronous and self._fault_tolerant():
+            raise ValueError("timeout, max_retries and on_failure are not supported in the asynchronous mode")
+        if self.asynchronous and (self.use_cache or self.deduplicate):
+            raise ValueError("The evaluation cache and the deduplication are not supported in the asynchronous mode")
+        if self.on_failure == 'drop':
+            optimizer = getattr(self.postprocessing, '__self__', None)
+            if isinstance(optimizer, Optimizer) and not optimizer.supports_partial_results:
+                raise ValueError("{} needs the results of all individuals, use on_failure 'penalty' instead of "
+                                 "'drop'".format(type(optimizer).__name__))
+        if self.use_cache or self.deduplicate:
+            optimizee = getattr(runfunc, '__self__', None)
+            if isinstance(optimizee, Optimizee) and not optimizee.deterministic:
+                raise ValueError("The evaluation cache and the deduplication need a deterministic optimizee, the "
+                                 "fitness of {} varies between evaluations".format(type(optimizee).__name__))
+        if self.use_cache and self.cache is None:
+            self.cache = EvaluationCache(self._cache_namespace(runfunc), self.cache_size, self.cache_path)
+        if not self.multiprocessing and self.n_workers > 1:
+            # The worker pool is kept alive for the whole outer loop
+            self.pool = PoolRunner(self.trajectory, runfunc, self.n_workers, self.chunk_size, self.timeout)
+        if self.multiprocessing and self._uses_pilot():
+            # The pilot workers are kept alive for the whole outer loop
+            self.pilot = PilotRunner(self.trajectory)
+            self.pilot.start()
+        try:
+            if self.asynchronous:
+                result = self._run_asynchronous()
+            else:
+                for it in range(start_generation, self.trajectory.par['n_iteration']):
+                    start_it = time.time()
+                    result[it] = self._evaluate_generation(it, runfunc)
+                    print("- optimizee simulation:", it, ", in ", round(time.time() - start_it, 6), "segs")
+                    # Add results to the trajectory
+                    start_postProc = time.time()
+                    self.trajectory.results.f_add_result_to_group("all_results", it, result[it])
+                    self.trajectory.current_results = result[it]
+                    if self.result_store is not None:
+                        # Stored before the postprocessing, which may clear the results
+                        self.result_store.append_generation(it, self.trajectory.individuals[it], result[it])
+                    # Perform the postprocessing step in order to generate the new parameter set
+                    self.postprocessing(self.trajectory, result[it])
+                    if self.result_store is not None:
+                        self._store_generation_params(it)
+                        if self.results_window is not None and it >= self.results_window:
+                            self.trajectory.f_remove_generation(it - self.results_window)
+                            result.pop(it - self.results_window)
+                    if self.checkpoint_path is not None and (it + 1) % self.checkpoint_interval == 0:
+                        self._save_checkpoint(it + 1, runfunc, result)
+                    print("- postprocessing:",it ,", in ",round(time.time() - start_postProc, 6), "segs")
+                    print("")
+        finally:
+            if self.pool is not None:
+                self.pool.close()
+                self.pool = None
+            if self.pilot is not None:
+                self.pilot.close()
+                self.pilot = None
+            if self.cache is not None:
+                self.cache.close()
+        print("- Outerloop: in ", round(time.time() - start_outer, 6), "segs")
 
+        return result
 
-            else:
-                # Sequential calls to the runfunc in the optimizee
-                result[it] = []
+    def _evaluate_generation(self, it, runfunc):
+        """
+        Evaluates all individuals of one generation. With the evaluation cache, the fitness of the individuals is
+        looked up in the cache first and only the individuals which are not in the cache are executed. With
+        deduplication, individuals with equal parameters are executed once and share the fitness.
+        :param it: id of the generation
+        :param runfunc: The function to be called from the optimizee
+        :return: list of (ind_idx, fitness) tuples of the generation, in the order of the individuals
+        """
+        if self.cache is None and not self.deduplicate:
+            return self._execute_generation(it, runfunc)
+
+        individuals = self.trajectory.individuals[it]
+        if self.cache is not None:
+            hits, misses = self.cache.hits, self.cache.misses
+            keys = {ind.ind_idx: self.cache.key(ind) for ind in individuals}
+        else:
+            keys = {ind.ind_idx: individual_key(ind) for ind in individuals}
+        # Fitness by key, from the cache or from the individual executed for the key
+        fitnesses = {}
+        executed_keys = set()
+        executed = []
+        for ind in individuals:
+            key = keys[ind.ind_idx]
+            if self.deduplicate and (key in fitnesses or key in executed_keys):
+                continue
+            if self.cache is not None:
+                fitness = self.cache.get(key)
+                if fitness is not None:
+                    fitnesses[key] = fitness
+                    continue
+            executed_keys.add(key)
+            executed.append(ind)
+
+        executed_idx = {ind.ind_idx for ind in executed}
+        results = {}
+        if executed:
+            results = dict(self._execute_individuals(it, runfunc, executed))
+            failed = self.trajectory.results.f_get_result('failed_individuals')
+            failed = {} if failed is None else failed.f_get_result(it, {})
+            for ind_idx, fitness in results.items():
+                fitnesses.setdefault(keys[ind_idx], fitness)
+                # Penalties of failed individuals are not their fitness
+                if self.cache is not None and ind_idx not in failed:
+                    self.cache.put(keys[ind_idx], fitness)
+        if individuals:
+            self.trajectory.individual = individuals[-1]
+
+        if self.deduplicate:
+            logger.info("Generation %d: %d individuals executed for %d distinct individuals", it, len(executed),
+                        len(set(keys.values())))
+        if self.cache is not None:
+            stats = {'hits': self.cache.hits - hits, 'misses': self.cache.misses - misses}
+            if self.trajectory.results.f_get_result('evaluation_cache') is None:
+                self.trajectory.results.f_add_result_group('evaluation_cache',
+                                                           "Hits and misses of the evaluation cache")
+            self.trajectory.results.f_add_result_to_group('evaluation_cache', it, stats)
+            logger.info("Evaluation cache in generation %d: %d hits, %d misses", it, stats['hits'], stats['misses'])
+
+        # Individuals which were not executed get the fitness of their key, i.e. the one from the cache or the one of
+        # the equal individual executed for them. Executed individuals which failed and were dropped have no fitness
+        generation_results = []
+        for ind in individuals:
+            if ind.ind_idx in results:
+                generation_results.append((ind.ind_idx, results[ind.ind_idx]))
+            elif ind.ind_idx not in executed_idx and keys[ind.ind_idx] in fitnesses:
+                generation_results.append((ind.ind_idx, fitnesses[keys[ind.ind_idx]]))
+        return generation_results
+
+    def _execute_individuals(self, it, runfunc, individuals):
+        """
+        Executes a part of the individuals of one generation, see :meth:`_execute_generation`
+        """
+        generation = self.trajectory.individuals[it]
+        self.trajectory.individuals[it] = individuals
+        try:
+            return self._execute_generation(it, runfunc)
+        finally:
+            self.trajectory.individuals[it] = generation
+
+    def _execute_generation(self, it, runfunc):
+        """
+        Executes all individuals of one generation using either JUBE, the worker pool or sequential calls.
+        :param it: id of the generation
+        :param runfunc: The function to be called from the optimizee
+        :return: list of (ind_idx, fitness) tuples of the generation
+        """
+        print("---multiprocessing---", self.multiprocessing)
+        if self._fault_tolerant():
+            return self._execute_generation_tolerant(it, runfunc)
+
+        if self.pilot is not None:
+            try:
+                results = self.pilot.run(self.trajectory, it)
+                self.run_id = self.run_id + len(results)
+                return results
+            except Exception:
+                if self.logging:
+                    logger.exception("Error during execution of individuals on the pilot workers")
+                raise
+
+        elif self.multiprocessing:
+            # Multiprocessing is done through JUBE, either with or without scheduler
+            logging.info("Environment run starting JUBERunner for n iterations: " + str(self.trajectory.par['n_iteration']))
+            jube = JUBERunner(self.trajectory)
+            # Initialize new JUBE run and execute it
+            try:
+                jube.write_pop_for_jube(self.trajectory,it)
+                return jube.run(self.trajectory,it)
+            except Exception as e:
+                if self.logging:
+                    logger.exception("Error launching JUBE run: " + str(e.__cause__))
+                raise e
+
+        elif self.pool is not None:
+            # Individuals are distributed over the pool of local worker processes
+            try:
+                results = self.pool.run(self.trajectory, it)
+                self.run_id = self.run_id + len(results)
+                return results
+            except Exception:
+                if self.logging:
+                    logger.exception("Error during pool execution of individuals")
+                raise
+
+        else:
+            # Sequential calls to the runfunc in the optimizee
+            results = []
+            individuals = self.trajectory.individuals[it]
+            optimizee = getattr(runfunc, '__self__', None)
+            try:
+                if individuals and self._has_batch_simulation(runfunc):
+                    # The optimizee simulates the whole generation in a single call
+                    fitnesses = optimizee.simulate_batch(self.trajectory, individuals)
+                    # Leave the trajectory pointing to the last individual, as the sequential calls do
+                    self.trajectory.individual = individuals[-1]
+                    results = [(ind.ind_idx, fitness) for ind, fitness in zip(individuals, fitnesses)]
+                    self.run_id = self.run_id + len(results)
+                    return results
                 # Call runfunc on each individual from the trajectory
-                try:
-                    for ind in self.trajectory.individuals[it]:
-                        self.trajectory.individual = ind
-                        result[it].append((ind.ind_idx, runfunc(self.trajectory)))
-                        self.run_id = self.run_id + 1
-                except:
-                    if self.logging:
-                        logger.exception("Error during serial execution of individuals")
-                    raise
-            print("- optimizee simulation:", it, ", in ", round(time.time() - start_it, 6), "segs")
-            # Add results to the trajectory
-            start_postProc = time.time()
-            self.trajectory.results.f_add_result_to_group("all_results", it, result[it])
-            self.trajectory.current_results = result[it]
-            # Perform the postprocessing step in order to generate the new parameter set
-            self.postprocessing(self.trajectory, result[it])
-            print("- postprocessing:",it ,", in ",round(time.time() - start_postProc, 6), "segs")
-            print("")
-        print("- Outerloop: in ", round(time.time() - start_outer, 6), "segs")
+                for ind in individuals:
+                    self.trajectory.individual = ind
+                    results.append((ind.ind_idx, runfunc(self.trajectory)))
+                    self.run_id = self.run_id + 1
+            except:
+                if self.logging:
+                    logger.exception("Error during serial execution of individuals")
+                raise
+            return results
+
+    def _execute_generation_tolerant(self, it, runfunc):
+        """
+        Executes all individuals of one generation, retrying the failed individuals up to max_retries times and
+        applying the on_failure action to the individuals which still fail.
+        :param it: id of the generation
+        :param runfunc: The function to be called from the optimizee
+        :return: list of (ind_idx, fitness) tuples of the generation, in the order of the individuals
+        """
+        individuals = self.trajectory.individuals[it]
+        collected = {}
+        failures = {}
+        pending = individuals
+        for attempt in range(self.max_retries + 1):
+            if attempt > 0:
+                logger.warning("Retrying %d failed individuals of generation %d (retry %d of %d)",
+                               len(pending), it, attempt, self.max_retries)
+            results, failures = self._run_individuals(it, runfunc, pending)
+            collected.update(results)
+            pending = [ind for ind in pending if ind.ind_idx in failures]
+            if not pending:
+                break
+
+        if failures:
+            if self.trajectory.results.f_get_result('failed_individuals') is None:
+                self.trajectory.results.f_add_result_group('failed_individuals',
+                                                           "Individuals which failed after all retries")
+            self.trajectory.results.f_add_result_to_group('failed_individuals', it, failures)
+            if self.logging:
+                logger.error("%d individuals of generation %d failed after %d retries: %s", len(failures), it,
+                             self.max_retries, sorted(failures))
+            if self.on_failure == 'raise':
+                raise IndividualsFailedError(it, failures)
+            if self.on_failure == 'penalty':
+                collected.update((ind_idx, self.penalty_fitness) for ind_idx in failures)
+
+        results = [(ind.ind_idx, collected[ind.ind_idx]) for ind in individuals if ind.ind_idx in collected]
+        self.run_id = self.run_id + len(results)
+        return results
+
+    def _run_individuals(self, it, runfunc, individuals):
+        """
+        Runs a list of individuals of a generation without stopping at the first failure
+        :param it: id of the generation
+        :param runfunc: The function to be called from the optimizee
+        :param individuals: list of individuals to run
+        :return: a tuple (results, failures) where results is a list of (ind_idx, fitness) tuples and failures a
+            dictionary mapping the ind_idx of the failed individuals to the reason
+        """
+        if self.pilot is not None:
+            return self.pilot.run_individuals(self.trajectory, it, individuals, self.timeout)
+        elif self.multiprocessing:
+            jube = JUBERunner(self.trajectory)
+            return jube.run_individuals(self.trajectory, it, individuals, self.timeout)
+        elif self.pool is not None:
+            return self.pool.run_individuals(it, individuals)
+
+        # Sequential calls, one at a time so that a failing individual does not affect the others
+        results = []
+        failures = {}
+        for ind in individuals:
+            self.trajectory.individual = ind
+            try:
+                with deadline(self.timeout):
+                    results.append((ind.ind_idx, runfunc(self.trajectory)))
+            except Exception:
+                failures[ind.ind_idx] = traceback.format_exc()
+        return results, failures
 
+    def _fault_tolerant(self):
+        """
+        Checks if the execution of the individuals needs to tolerate failures
+        """
+        return self.timeout is not None or self.max_retries > 0 or self.on_failure != 'raise'
+
+    def _run_asynchronous(self):
+        """
+        Runs the optimization without a barrier between generations. The individuals of the first generation are
+        submitted to the worker pool one by one. Every finished individual is handed to the asynchronous
+        postprocessing, which may return new individuals that are submitted right away. The run ends when no
+        individual is left in flight.
+        A new individual belongs to the generation following the one of the individual whose result created it.
+        :return: the results of the run. Dictionary indexed by generation id, the results of a generation are in
+            order of completion.
+        """
+        if self.async_postprocessing is None:
+            raise ValueError("The asynchronous mode needs an asynchronous postprocessing function")
+        result = {}
+        pending = {}
+
+        def submit(ind):
+            pending[self.pool.submit(ind.generation, [ind])] = ind
+
+        for ind in self.trajectory.individuals[0]:
+            submit(ind)
+        try:
+            while pending:
+                done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    ind = pending.pop(future)
+                    (ind_idx, fitness), = future.result()
+                    self.run_id = self.run_id + 1
+                    if ind.generation not in result:
+                        result[ind.generation] = []
+                        self.trajectory.results.f_add_result_to_group("all_results", ind.generation,
+                                                                      result[ind.generation])
+                    result[ind.generation].append((ind_idx, fitness))
+                    self.trajectory.current_results = result[ind.generation]
+                    self.trajectory.individual = ind
+                    new_individuals = self.async_postprocessing(self.trajectory, (ind_idx, fitness))
+                    for new_idx, individual in new_individuals.items():
+                        new_ind = Individual(ind.generation + 1, new_idx, [])
+                        for key, val in individual.items():
+                            new_ind.f_add_parameter('individual.' + key, val)
+                        self.trajectory.individuals.setdefault(new_ind.generation, []).append(new_ind)
+                        submit(new_ind)
+        except Exception:
+            for future in pending:
+                future.cancel()
+            if self.logging:
+                logger.exception("Error during asynchronous execution of individuals")
+            raise
+        if self.result_store is not None:
+            # Generations overlap in the asynchronous mode, they are only complete at the end of the run
+            for generation, generation_results in sorted(result.items()):
+                self.result_store.append_generation(generation, self.trajectory.individuals[generation],
+                                                    generation_results)
         return result
 
+    def _save_checkpoint(self, generation, runfunc, result):
+        """
+        Writes the state of the outer loop to the checkpoint file: the trajectory, the postprocessing function together
+        with the optimizer it is bound to, the runfunc together with its optimizee, the results and the state of the
+        global random number generators.
+        :param generation: id of the next generation to run
+        :param runfunc: The function to be called from the optimizee
+        :param result: the results of the generations run so far
+        """
+        save_checkpoint(self.checkpoint_path, {
+            'generation': generation,
+            'trajectory': self.trajectory,
+            'postprocessing': self.postprocessing,
+            'runfunc': runfunc,
+            'result': result,
+            'run_id': self.run_id,
+            'random_state': random.getstate(),
+            'numpy_random_state': np.random.get_state(),
+        })
+
+    def load_checkpoint(self, checkpoint_path):
+        """
+        Restores the state of the outer loop from a checkpoint written by a previous run. Continue the run with
+        `run(checkpoint['runfunc'], checkpoint['generation'], checkpoint['result'])`, the generations finished before
+        the checkpoint are not run again.
+        :param checkpoint_path: Path of the checkpoint file
+        :return: the checkpoint, a dictionary holding the runfunc, the id of the next generation (`generation`) and
+        the results of the finished generations (`result`)
+        """
+        checkpoint = load_checkpoint(checkpoint_path)
+        self.trajectory = checkpoint['trajectory']
+        self.postprocessing = checkpoint['postprocessing']
+        self.run_id = checkpoint['run_id']
+        random.setstate(checkpoint['random_state'])
+        np.random.set_state(checkpoint['numpy_random_state'])
+        logger.info("Restored checkpoint %s, continuing at generation %d", checkpoint_path, checkpoint['generation'])
+        return checkpoint
+
+    def _store_generation_params(self, it):
+        """
+        Writes the parameters the optimizer recorded in the `generation_params` result group for generation `it`
+        to the result store, if there are any.
+        """
+        generation_params = self.trajectory.results.f_get_result('generation_params')
+        if generation_params is None:
+            return
+        params = generation_params.f_get_result('generation_{}'.format(it))
+        if params is not None:
+            self.result_store.add_generation_params(it, params.f_to_dict())
+
+    @staticmethod
+    def _cache_namespace(runfunc):
+        """
+        Identity of the optimizee used in the keys of the evaluation cache
+        """
+        optimizee = getattr(runfunc, '__self__', None)
+        if isinstance(optimizee, Optimizee):
+            return '{}.{}'.format(optimizee.cache_identity(), runfunc.__name__)
+        return '{}.{}'.format(runfunc.__module__, runfunc.__qualname__)
+
+    def _uses_pilot(self):
+        """
+        Checks if the JUBE_params of the trajectory ask for pilot workers
+        """
+        if 'JUBE_params' not in self.trajectory.par.keys():
+            return False
+        return int(self.trajectory.parameters['JUBE_params'].params.get('pilot_workers', 0)) > 0
+
+    @staticmethod
+    def _has_batch_simulation(runfunc):
+        """
+        Checks if runfunc is the simulate function of an optimizee which overrides
+        :meth:`~l2l.optimizees.optimizee.Optimizee.simulate_batch`
+        """
+        optimizee = getattr(runfunc, '__self__', None)
+        if not isinstance(optimizee, Optimizee) or runfunc.__func__ is not type(optimizee).simulate:
+            return False
+        return type(optimizee).simulate_batch is not Optimizee.simulate_batch
+
     def add_postprocessing(self, func):
         """
         Function to add a postprocessing step
@@ -94,6 +557,15 @@ class Environment:
         """
         self.postprocessing = func
 
+    def add_async_postprocessing(self, func):
+        """
+        Function to add the postprocessing step of the asynchronous mode
+        :param func: the function which is called with the trajectory and the (ind_idx, fitness) tuple of every
+        individual as soon as it finishes. The finished individual is accessible as `traj.individual`. It returns
+        a dictionary {ind_idx: Individual-Dict} of new individuals to be evaluated, which may be empty.
+        """
+        self.async_postprocessing = func
+
     def enable_logging(self):
         """
         Function to enable logging
@@ -0,0 +1,140 @@
+import hashlib
+import logging
+import os
+import pickle
+import sqlite3
+from collections import OrderedDict
+
+import numpy as np
+
+logger = logging.getLogger("utils.EvaluationCache")
+
+
+def individual_key(individual, namespace=''):
+    """
+    Computes a stable key of the parameters of an individual: the SHA-1 hash of their names, dtypes, shapes and raw
+    bytes, prefixed by `namespace`. Individuals with equal parameters have the same key.
+
+    :param individual: The :class:`~l2l.utils.individual.Individual`
+    :param namespace: A string hashed along with the parameters
+    :return: the hexadecimal hash
+    """
+    digest = hashlib.sha1(namespace.encode())
+    params = individual.params
+    for name in sorted(params):
+        value = np.asarray(params[name])
+        digest.update(name.encode())
+        if value.dtype.hasobject:
+            digest.update(pickle.dumps(params[name], pickle.HIGHEST_PROTOCOL))
+        else:
+            digest.update('{}{}'.format(value.dtype.str, value.shape).encode())
+            digest.update(np.ascontiguousarray(value).tobytes())
+    return digest.hexdigest()
+
+
+class EvaluationCache:
+    """
+    EvaluationCache memoizes the fitness of the individuals so that an individual which is evaluated again, e.g. an
+    offspring surviving unmutated or a grid point revisited by another run, is not simulated a second time.
+
+    The key of an individual is the hash of its parameters computed by :func:`individual_key`, using the namespace
+    of the cache, which identifies the optimizee and its seed (see
+    :meth:`~l2l.optimizees.optimizee.Optimizee.cache_identity`). The entries are kept in memory in least recently
+    used order, at most `max_size` of them. If `path` is given, every entry is also written to an SQLite database
+    in that file, which can be shared by successive experiments.
+
+    Only deterministic optimizees should be cached: the fitness of a noisy optimizee would be drawn only once.
+    """
+
+    def __init__(self, namespace, max_size=None, path=None):
+        """
+        Initializes the cache
+
+        :param namespace: Identity of the optimizee, part of every key
+        :param max_size: Maximal number of entries kept in memory, None for no limit
+        :param path: Path of the SQLite database holding the persistent entries, None to keep the entries in memory
+            only
+        """
+        if max_size is not None and max_size < 1:
+            raise ValueError("max_size needs to be greater than 0")
+        self.namespace = namespace
+        self.max_size = max_size
+        self.path = None if path is None else os.path.abspath(path)
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._db = None
+
+    def key(self, individual):
+        """
+        Computes the key of an individual
+
+        :param individual: The :class:`~l2l.utils.individual.Individual`
+        :return: the hexadecimal hash of the parameters of the individual
+        """
+        return individual_key(individual, self.namespace)
+
+    def get(self, key):
+        """
+        Looks up the fitness stored for a key and counts the hit or the miss
+
+        :param key: The key of the individual, see :meth:`key`
+        :return: the fitness or None if the key is not in the cache
+        """
+        fitness = self._entries.get(key)
+        if fitness is not None:
+            self._entries.move_to_end(key)
+        elif self.path is not None:
+            row = self._connection().execute("SELECT fitness FROM fitness WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                fitness = pickle.loads(row[0])
+                self._remember(key, fitness)
+        if fitness is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return fitness
+
+    def put(self, key, fitness):
+        """
+        Stores the fitness of an individual
+
+        :param key: The key of the individual, see :meth:`key`
+        :param fitness: The fitness tuple returned by the optimizee
+        """
+        self._remember(key, fitness)
+        if self.path is not None:
+            connection = self._connection()
+            connection.execute("INSERT OR REPLACE INTO fitness (key, fitness) VALUES (?, ?)",
+                               (key, pickle.dumps(fitness, pickle.HIGHEST_PROTOCOL)))
+            connection.commit()
+
+    def _remember(self, key, fitness):
+        self._entries[key] = fitness
+        self._entries.move_to_end(key)
+        if self.max_size is not None:
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def _connection(self):
+        if self._db is None:
+            self._db = sqlite3.connect(self.path)
+            self._db.execute("CREATE TABLE IF NOT EXISTS fitness (key TEXT PRIMARY KEY, fitness BLOB)")
+            self._db.commit()
+        return self._db
+
+    def close(self):
+        """
+        Closes the database. It is opened again on the next access
+        """
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __getstate__(self):
+        d = dict(self.__dict__)
+        d['_db'] = None
+        return d
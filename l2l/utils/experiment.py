@@ -36,6 +36,43 @@ class Experiment(object):
             - jube_parameter: dict, User specified parameter for jube.
                 See notes section for default jube parameter
             - multiprocessing, bool, enable multiprocessing, Default: False
+            - n_workers: int, number of local worker processes used to
+                execute the individuals when multiprocessing (JUBE) is not
+                enabled, Default: 1 (sequential execution)
+            - chunk_size: int, number of individuals sent to a local worker
+                at once, Default: 1
+            - asynchronous: bool, hand every result to the optimizer as soon
+                as it arrives instead of waiting for the whole generation.
+                Needs n_workers > 1 and an optimizer implementing
+                post_process_async, Default: False
+            - store_results: bool, write every generation to a ResultStore
+                in the `generations` directory of the results path as soon
+                as it is complete, Default: False
+            - results_window: int, number of generations kept in memory
+                when store_results is enabled, Default: None (all)
+            - checkpoint_interval: int, write a checkpoint of the outer loop
+                to `checkpoint.bin` in the results path every
+                checkpoint_interval generations, see resume_experiment,
+                Default: None (no checkpoints)
+            - timeout: float, deadline in seconds for the simulation of an
+                individual, Default: None (no deadline)
+            - max_retries: int, number of times a failed individual is run
+                again, Default: 0
+            - on_failure: str, what to do with the individuals which still
+                fail after max_retries: `raise`, `drop` or `penalty`,
+                Default: `raise`. The optimizers of L2L need `penalty`
+            - penalty_fitness: fitness given to the failed individuals when
+                on_failure is `penalty`
+            - cache: bool, memoize the fitness of the individuals and do not
+                simulate an individual again, Default: False. Only for
+                deterministic optimizees
+            - cache_size: int, number of fitnesses kept in memory by the
+                cache, Default: None (no limit)
+            - cache_path: str, SQLite file persisting the cache, which can
+                be shared by several experiments, Default: None
+            - deduplicate: bool, simulate individuals of a generation with
+                equal parameters only once, Default: False. Only for
+                deterministic optimizees
         :return traj, trajectory object
         :return all_jube_params, dict, a dictionary with all parameters for jube
             given by the user and default ones
@@ -84,7 +121,24 @@ class Experiment(object):
             add_time=True,
             automatic_storing=True,
             log_stdout=kwargs.get('log_stdout', False),  # Sends stdout to logs
-            multiprocessing=kwargs.get('multiprocessing', False)
+            multiprocessing=kwargs.get('multiprocessing', False),
+            n_workers=kwargs.get('n_workers', 1),
+            chunk_size=kwargs.get('chunk_size', 1),
+            asynchronous=kwargs.get('asynchronous', False),
+            results_path=os.path.join(self.paths.results_path, 'generations')
+            if kwargs.get('store_results', False) else None,
+            results_window=kwargs.get('results_window'),
+            checkpoint_path=os.path.join(self.paths.results_path, 'checkpoint.bin')
+            if kwargs.get('checkpoint_interval') else None,
+            checkpoint_interval=kwargs.get('checkpoint_interval') or 1,
+            timeout=kwargs.get('timeout'),
+            max_retries=kwargs.get('max_retries', 0),
+            on_failure=kwargs.get('on_failure', 'raise'),
+            penalty_fitness=kwargs.get('penalty_fitness'),
+            cache=kwargs.get('cache', False),
+            cache_size=kwargs.get('cache_size'),
+            cache_path=kwargs.get('cache_path'),
+            deduplicate=kwargs.get('deduplicate', False)
         )
 
         create_shared_logger_data(
@@ -166,9 +220,33 @@ class Experiment(object):
         jube.prepare_optimizee(optimizee, self.paths.simulation_path)
         # Add post processing
         self.env.add_postprocessing(optimizer.post_process)
+        if self.env.asynchronous:
+            self.env.add_async_postprocessing(optimizer.post_process_async)
         # Run the simulation
         self.env.run(optimizee.simulate)
 
+    def resume_experiment(self, checkpoint_path):
+        """
+        Continues an experiment from a checkpoint written by a previous run,
+        see the checkpoint_interval argument of prepare_experiment. The
+        experiment has to be prepared with the same arguments as the original
+        one. The trajectory, the optimizer and the optimizee are restored from
+        the checkpoint and the run continues at the first generation which was
+        not finished.
+
+        :param checkpoint_path: str, path of the checkpoint file
+        :return optimizer, the restored optimizer object
+        """
+        checkpoint = self.env.load_checkpoint(checkpoint_path)
+        self.traj = self.env.trajectory
+        self.optimizer = getattr(self.env.postprocessing, '__self__', None)
+        self.optimizee = getattr(checkpoint['runfunc'], '__self__', None)
+        if self.optimizee is not None:
+            jube.prepare_optimizee(self.optimizee, self.paths.simulation_path)
+        self.env.run(checkpoint['runfunc'], checkpoint['generation'],
+                     checkpoint['result'])
+        return self.optimizer
+
     def end_experiment(self, optimizer):
         """
         Ends the experiment and disables the logging
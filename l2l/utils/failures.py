@@ -0,0 +1,68 @@
+import logging
+import signal
+import threading
+from contextlib import contextmanager
+
+logger = logging.getLogger("utils.failures")
+
+#: Actions taken for an individual which still fails after all its retries
+FAILURE_ACTIONS = ('raise', 'drop', 'penalty')
+
+
+class SimulationError(Exception):
+    """
+    Raised by the runners when the simulation of an individual raised in the process which executed it. The message
+    holds the traceback reported by that process
+    """
+
+
+class IndividualTimeoutError(Exception):
+    """
+    Raised when the simulation of an individual exceeds its deadline
+    """
+
+
+@contextmanager
+def deadline(seconds):
+    """
+    Context manager raising :class:`IndividualTimeoutError` in the enclosed block once `seconds` of wall-clock time
+    have elapsed. It relies on SIGALRM, which can only be handled in the main thread of a process: in any other
+    thread the deadline is skipped with a warning. Nothing is done if `seconds` is None.
+
+    :param seconds: the deadline in seconds
+    """
+    if seconds is None:
+        yield
+        return
+    if threading.current_thread() is not threading.main_thread():
+        logger.warning("The deadline of %s seconds is not enforced outside the main thread", seconds)
+        yield
+        return
+
+    def on_alarm(signum, frame):
+        raise IndividualTimeoutError("Simulation exceeded its deadline of {} seconds".format(seconds))
+
+    previous_handler = signal.signal(signal.SIGALRM, on_alarm)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous_handler)
+
+
+class IndividualsFailedError(Exception):
+    """
+    Raised when individuals of a generation still fail after all their retries and the failure action is `raise`.
+    It keeps the generation and a dictionary mapping the ind_idx of every failed individual to the reason.
+    """
+
+    def __init__(self, generation, failures):
+        super().__init__(generation, failures)
+        self.generation = generation
+        self.failures = failures
+
+    def __str__(self):
+        return "{} individuals of generation {} failed:\n{}".format(
+            len(self.failures), self.generation,
+            "\n".join("Individual {}: {}".format(ind_idx, reason) for ind_idx, reason in self.failures.items()))
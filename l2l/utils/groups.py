@@ -88,6 +88,27 @@ class ResultGroup(sdictm):
             logging.exception("Key not found when adding to result group")
             raise Exception("Group name not found when adding value to result group")
 
+    def f_get_result(self, key, default=None):
+        """
+        Returns a result of this group without creating it
+        :param key: the name of the result
+        :param default: value returned if the result does not exist
+        """
+        return self._data.get(key, default)
+
+    def f_remove_result(self, key):
+        """
+        Removes a result or a result group from this group. Nothing happens if it does not exist.
+        :param key: the name of the result
+        """
+        self._data.pop(key, None)
+
+    def f_to_dict(self):
+        """
+        Converts this group and its subgroups to nested dictionaries
+        """
+        return {key: val.f_to_dict() if isinstance(val, ResultGroup) else val for key, val in self._data.items()}
+
     def __str__(self):
         return str(self.results)
 
@@ -111,14 +132,14 @@ class ParameterDict(sdictm):
     def __getattr__(self, attr):
         """
         This function has been overwritten in order to allow a particular access to values in the dictionary.
-        If attr is ind_idx, it returns the id from the current result with index trajectory.v_idx
+        If attr is ind_idx, it returns the position of the current result with index trajectory.v_idx
         :param attr: Contains the attribute name to be accessed
         :return: the value of the attribute name indicated by attr
         """
         if attr == '__getstate__':
             raise AttributeError()
         if attr == 'ind_idx':
-            return [i[0] for i in self.trajectory.current_results].index(self.trajectory.v_idx)
+            return self.trajectory.f_get_run_position(self.trajectory.v_idx)
         if attr in self._INSTANCE_VAR_LIST:
             return object.__getattribute__(self, attr)
         if '.' in attr:
@@ -1,37 +1,87 @@
-from l2l.utils.groups import ParameterGroup
-
-
-class Individual(ParameterGroup):
+class Individual:
     """
-    This class represents individuals in the parameter search. It derives from a Parameter group.
+    This class represents individuals in the parameter search. It keeps the interface of a Parameter group.
     The main elements which make an individual are the ID of its generation, its individual ID and the
     params specific for its run.
+
+    The individuals of a generation created by the trajectory do not hold their own parameters. They share the
+    columns of the generation, a dictionary mapping every parameter name to a sequence (a list or an array) with
+    one entry per individual, and only keep the row of the individual in these columns. The parameter dictionary
+    is materialized on demand and the individual gets its own copy as soon as a parameter is added to it.
     """
 
-    def __init__(self, generation=0, ind_idx=0, params=[]):
+    __slots__ = ('generation', 'ind_idx', '_params', '_columns', '_row')
+
+    def __init__(self, generation=0, ind_idx=0, params=[], columns=None, row=None):
         """
         Initialization of the individual
         :param generation: ID of the generation to which this individual belongs to
         :param ind_idx: global ID of the individual
         :param params: individual parameters which are used to execute the optimizee simulate function
+        :param columns: Parameter columns shared by the individuals of the generation, indexed by parameter name
+        :param row: Row of the individual in the shared columns. Defaults to `ind_idx`
         """
-        self.params = {}
-        for i in params:
-            self.f_add_parameter(i.keys()[0], i[i.keys()[0]])
         self.generation = generation
         self.ind_idx = ind_idx
+        self._columns = columns
+        self._row = ind_idx if row is None else row
+        self._params = None if columns is not None else {}
+        for i in params:
+            key = next(iter(i))
+            self.f_add_parameter(key, i[key])
+
+    @property
+    def params(self):
+        """
+        Dictionary of the parameters of the individual
+        """
+        if self._params is None:
+            return {key: values[self._row] for key, values in self._columns.items()}
+        return self._params
+
+    def f_add_parameter(self, key, val, comment=""):
+        """
+        Adds parameter with name key and value val. The comment is ignored for the moment but kept for
+        compatibility with the pypet groups
+        :param key: Name of the parameter
+        :param val: Value of the parameter
+        :param comment: Ignores for the moment
+        """
+        if self._params is None:
+            # Detach the individual from the shared columns of its generation
+            self._params = self.params
+            self._columns = None
+        self._params[key] = val
 
     def __getattr__(self, attr):
+        # Only called for names which are not slots. Private and special names are never parameters, this also
+        # keeps copy and pickle from looking up parameters on a half-initialized instance.
+        if attr.startswith('_'):
+            raise AttributeError(attr)
         if attr == 'keys':
             return self.params.keys()
-        ret = self.params.get('individual.' + attr)
-        return ret
+        key = 'individual.' + attr
+        if self._params is None:
+            values = self._columns.get(key)
+            return None if values is None else values[self._row]
+        return self._params.get(key)
 
     def __getitem__(self, key):
         return self.__getattr__(key)
 
+    def __str__(self):
+        return str(self.params)
+
+    def __repr__(self):
+        return self.params.__repr__()
+
     def __getstate__(self):
-        return self.__dict__
+        # Only the parameters of this individual are stored, not the columns of the whole generation
+        return {'generation': self.generation, 'ind_idx': self.ind_idx, 'params': self.params}
 
     def __setstate__(self, d):
-        self.__dict__.update(d)
+        self.generation = d['generation']
+        self.ind_idx = d['ind_idx']
+        self._params = d['params']
+        self._columns = None
+        self._row = self.ind_idx
@@ -0,0 +1,163 @@
+import os
+import shutil
+import subprocess
+import sys
+import logging
+
+import l2l
+from l2l.utils.JUBE_runner import JUBERunner
+from l2l.utils.pilot_worker import QUEUE_DIR, CLAIMED_DIR, STOP_FILE, ticket_name
+from l2l.utils.work_units import write_work_units
+
+logger = logging.getLogger("PilotRunner")
+
+
+class PilotRunner(JUBERunner):
+    """
+    PilotRunner executes the individuals on long-lived pilot workers instead of starting one job per individual and
+    generation. The workers (see :mod:`l2l.utils.pilot_worker`) are launched once per experiment by :meth:`start`,
+    either as local processes or as jobs submitted to the scheduler, and pull the individuals from a file-based queue
+    in the simulation path. Each generation then only costs writing its work unit file and one ticket per
+    individual.
+
+    It is configured through the JUBE_params of the trajectory:
+
+    - pilot_workers: number of workers
+    - pilot_launcher: `local` (default) to start the workers as processes of this machine, `scheduler` to submit
+      every worker as a job with `submit_cmd`, using `nodes`, `walltime`, `ppn`, `err_file` and `out_file`
+    - ready_poll_min, ready_poll_max: bounds of the polling interval, shared with the workers
+    """
+
+    def __init__(self, trajectory):
+        """
+        Initializes the PilotRunner using the parameters found inside the trajectory in the
+        param dictionary called JUBE_params.
+
+        :param trajectory: A trajectory object holding the parameters to use in the initialization
+        """
+        super().__init__(trajectory)
+        args = self.trajectory.parameters["JUBE_params"].params
+        self.n_workers = int(args.get('pilot_workers', 1))
+        self.launcher = args.get('pilot_launcher', 'local')
+        if self.launcher not in ('local', 'scheduler'):
+            raise ValueError("Unknown pilot launcher {}".format(self.launcher))
+        for sdir in [QUEUE_DIR, CLAIMED_DIR]:
+            self.work_paths[sdir] = os.path.join(self.path, sdir)
+        self.processes = []
+
+    def start(self):
+        """
+        Clears the queue and launches the workers
+        """
+        for sdir in [QUEUE_DIR, CLAIMED_DIR]:
+            shutil.rmtree(self.work_paths[sdir], ignore_errors=True)
+            os.makedirs(self.work_paths[sdir])
+        stop_file = os.path.join(self.path, STOP_FILE)
+        if os.path.isfile(stop_file):
+            os.remove(stop_file)
+
+        command = [sys.executable, '-m', 'l2l.utils.pilot_worker', self.path,
+                   '--poll-min', str(self.poll_interval_min), '--poll-max', str(self.poll_interval_max)]
+        if self.launcher == 'local':
+            # The workers import the same l2l package as this process
+            l2l_root = os.path.dirname(os.path.dirname(os.path.abspath(l2l.__file__)))
+            env = dict(os.environ)
+            env['PYTHONPATH'] = os.pathsep.join(p for p in [l2l_root, env.get('PYTHONPATH')] if p)
+            for i in range(self.n_workers):
+                with open(os.path.join(self.work_paths['work'], 'pilot_%d.out' % i), 'w') as out:
+                    self.processes.append(subprocess.Popen(command, stdout=out, stderr=subprocess.STDOUT, env=env))
+        else:
+            job_file = self.write_pilot_job_file(command)
+            for i in range(self.n_workers):
+                subprocess.check_call(self.jube_config['submit_cmd'].split() + [job_file])
+        logger.info("Launched %d pilot workers (%s)", self.n_workers, self.launcher)
+
+    def write_pilot_job_file(self, command):
+        """
+        Writes the batch script used to submit one pilot worker to the scheduler
+        :param command: the command starting the worker
+        :return: the path of the script
+        """
+        job_file = os.path.join(self.work_paths['run_files'], 'pilot_job.sh')
+        with open(job_file, 'w') as f:
+            f.write('#!/bin/bash\n')
+            f.write('#SBATCH --nodes=%s\n' % self.jube_config['nodes'])
+            f.write('#SBATCH --ntasks-per-node=%s\n' % self.jube_config['ppn'])
+            f.write('#SBATCH --time=%s\n' % self.jube_config['walltime'])
+            f.write('#SBATCH --error=%s\n' % os.path.join(self.work_paths['work'], self.jube_config['err_file']))
+            f.write('#SBATCH --output=%s\n' % os.path.join(self.work_paths['work'], self.jube_config['out_file']))
+            f.write(' '.join(command) + '\n')
+        return job_file
+
+    def close(self):
+        """
+        Asks the workers to stop once the queue is empty and waits for the local workers to exit
+        """
+        open(os.path.join(self.path, STOP_FILE), 'w').close()
+        for process in self.processes:
+            process.wait()
+        self.processes = []
+        logger.info("Pilot workers stopped")
+
+    def _dispatch(self, trajectory, generation, individuals):
+        """
+        Writes the work units of the individuals and puts one ticket per individual into the queue
+        """
+        write_work_units(self.work_units_path(generation), trajectory.f_slim_copy(), individuals)
+        if individuals:
+            trajectory.individual = individuals[-1]
+
+        for ind in individuals:
+            # Tickets are renamed into the queue so that the workers never see a partial ticket
+            name = ticket_name(generation, ind.ind_idx)
+            open(os.path.join(self.work_paths['work'], name), 'w').close()
+            os.replace(os.path.join(self.work_paths['work'], name), os.path.join(self.work_paths[QUEUE_DIR], name))
+        logger.info("Dispatched %d individuals of generation %d to the pilot workers", len(individuals), generation)
+
+    def run(self, trajectory, generation):
+        """
+        Dispatches the individuals of the generation to the workers and gathers the results
+
+        :param trajectory: trajectory object storing individual parameters for each generation
+        :param generation: id of the generation
+        :return results: a list of (ind_idx, fitness) tuples in the order of `trajectory.individuals[generation]`
+        """
+        self.trajectory = trajectory
+        self.generation = generation
+        self.done = False
+        individuals = trajectory.individuals[generation]
+        # Left over by an earlier run in the same directory
+        self._clear_ready_files(generation, individuals)
+        self._dispatch(trajectory, generation, individuals)
+
+        collected = dict(self.iter_results(generation, individuals))
+        self.done = True
+        return [(ind.ind_idx, collected[ind.ind_idx]) for ind in individuals]
+
+    def run_individuals(self, trajectory, generation, individuals, timeout=None):
+        """
+        Runs a list of individuals of the generation on the workers, see :meth:`JUBERunner.run_individuals`
+        """
+        self.trajectory = trajectory
+        self.generation = generation
+        self._clear_ready_files(generation, individuals)
+        self._dispatch(trajectory, generation, individuals)
+        results, failures = self.gather_results(generation, individuals, timeout)
+        self._withdraw_tickets(generation, failures)
+        return [(ind.ind_idx, results[ind.ind_idx]) for ind in individuals if ind.ind_idx in results], failures
+
+    def _withdraw_tickets(self, generation, failures):
+        """
+        Removes the tickets of the failed individuals which are still in the queue, so that no worker runs them
+        after they were given up, e.g. next to their retry. Individuals already claimed by a worker cannot be
+        stopped: if they have not finished, this is recorded in their failure reason.
+        :param failures: dictionary of the reasons of the failures, indexed by ind_idx
+        """
+        for ind_idx in failures:
+            try:
+                os.remove(os.path.join(self.work_paths[QUEUE_DIR], ticket_name(generation, ind_idx)))
+            except FileNotFoundError:
+                if not os.path.isfile(self._ready_file(generation, ind_idx)):
+                    logger.warning("Individual %d of generation %d is still running on a pilot worker", ind_idx,
+                                   generation)
+                    failures[ind_idx] += " (still running on a pilot worker)"
@@ -0,0 +1,110 @@
+"""
+Long-lived worker of the pilot mode, see :class:`~l2l.utils.pilot_runner.PilotRunner`. It is started once per
+experiment with
+
+    python -m l2l.utils.pilot_worker <simulation_path>
+
+loads the optimizee once and then simulates the individuals whose tickets it claims from the queue directory until
+the stop file is written and the queue is empty.
+"""
+import argparse
+import logging
+import os
+import pickle
+import socket
+import time
+import traceback
+
+from l2l.utils.work_units import read_work_unit, work_units_fname, result_fname, error_fname, ready_fname
+
+logger = logging.getLogger("utils.pilot_worker")
+
+QUEUE_DIR = 'queue'
+CLAIMED_DIR = 'claimed'
+STOP_FILE = 'stop'
+
+
+def ticket_name(generation, ind_idx):
+    """
+    Name of the ticket of an individual in the queue directory
+    """
+    return '%d_%d' % (generation, ind_idx)
+
+
+def claim_ticket(queue_path, claimed_path, worker_id):
+    """
+    Claims the next ticket of the queue. A ticket is claimed by renaming it into the claimed directory, which is
+    atomic, so every ticket is processed by exactly one worker even if many workers share the queue.
+    :return: a tuple (generation, ind_idx) or None if the queue is empty
+    """
+    for name in sorted(os.listdir(queue_path)):
+        try:
+            os.rename(os.path.join(queue_path, name), os.path.join(claimed_path, name + '.' + worker_id))
+        except FileNotFoundError:
+            # Claimed by another worker in the meantime
+            continue
+        generation, ind_idx = name.split('_')
+        return int(generation), int(ind_idx)
+    return None
+
+
+def write_file(fname, data):
+    """
+    Writes a file under a temporary name and renames it when it is complete
+    """
+    with open(fname + '.tmp', 'wb') as handle:
+        handle.write(data)
+    os.replace(fname + '.tmp', fname)
+
+
+def run_worker(simulation_path, poll_interval_min=0.05, poll_interval_max=1.0):
+    """
+    Main loop of a pilot worker
+
+    :param simulation_path: The simulation path of the experiment, holding the optimizee, the work units and the
+        queue
+    :param poll_interval_min: Minimal interval in seconds between two checks of an empty queue
+    :param poll_interval_max: Maximal interval in seconds between two checks of an empty queue
+    """
+    worker_id = '%s-%d' % (socket.gethostname(), os.getpid())
+    queue_path = os.path.join(simulation_path, QUEUE_DIR)
+    claimed_path = os.path.join(simulation_path, CLAIMED_DIR)
+    with open(os.path.join(simulation_path, "optimizee.bin"), "rb") as handle:
+        optimizee = pickle.load(handle)
+    logger.info("Pilot worker %s started", worker_id)
+
+    interval = poll_interval_min
+    while True:
+        ticket = claim_ticket(queue_path, claimed_path, worker_id)
+        if ticket is None:
+            if os.path.isfile(os.path.join(simulation_path, STOP_FILE)):
+                break
+            time.sleep(interval)
+            interval = min(2 * interval, poll_interval_max)
+            continue
+        interval = poll_interval_min
+        generation, ind_idx = ticket
+        try:
+            trajectory = read_work_unit(work_units_fname(simulation_path, generation), ind_idx)
+            res = optimizee.simulate(trajectory)
+        except Exception:
+            # The traceback is written instead of the result, the runner reports the individual as failed
+            logger.exception("Individual %d of generation %d failed", ind_idx, generation)
+            write_file(error_fname(simulation_path, generation, ind_idx), traceback.format_exc().encode())
+        else:
+            write_file(result_fname(simulation_path, generation, ind_idx), pickle.dumps(res, pickle.HIGHEST_PROTOCOL))
+        open(ready_fname(simulation_path, generation, ind_idx), 'w').close()
+    logger.info("Pilot worker %s stopped", worker_id)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pilot worker simulating the individuals of an L2L experiment")
+    parser.add_argument('simulation_path', help="Simulation path of the experiment")
+    parser.add_argument('--poll-min', type=float, default=0.05, help="Minimal polling interval in seconds")
+    parser.add_argument('--poll-max', type=float, default=1.0, help="Maximal polling interval in seconds")
+    args = parser.parse_args()
+    run_worker(args.simulation_path, args.poll_min, args.poll_max)
+
+
+if __name__ == '__main__':
+    main()
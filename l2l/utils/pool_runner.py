@@ -0,0 +1,257 @@
+import concurrent.futures
+import logging
+import os
+import threading
+import time
+import traceback
+
+from l2l.utils.failures import deadline
+from l2l.utils.individual import Individual
+
+logger = logging.getLogger("utils.PoolRunner")
+
+# Per-process state installed by `_init_worker`. It is only populated inside the worker processes.
+_worker_state = {}
+
+
+class IndividualExecutionError(Exception):
+    """
+    Raised when the simulation of an individual fails inside a worker process. It keeps the index of the failing
+    individual, its generation and the formatted traceback of the exception raised by the optimizee.
+    """
+
+    def __init__(self, ind_idx, generation, worker_traceback):
+        super().__init__(ind_idx, generation, worker_traceback)
+        self.ind_idx = ind_idx
+        self.generation = generation
+        self.worker_traceback = worker_traceback
+
+    def __str__(self):
+        return "Individual {} of generation {} failed in worker process:\n{}".format(
+            self.ind_idx, self.generation, self.worker_traceback)
+
+
+def _init_worker(runfunc, trajectory):
+    """
+    Initializer of every worker process. The optimizee (bound to `runfunc`) and the trajectory are transferred
+    once when the worker starts and are kept for the whole lifetime of the worker.
+    """
+    _worker_state['runfunc'] = runfunc
+    _worker_state['trajectory'] = trajectory
+
+
+def _run_chunk(generation, work_units, timeout=None, fail_fast=True):
+    """
+    Simulates a chunk of individuals in a worker process
+
+    :param generation: id of the generation
+    :param work_units: list of (ind_idx, params) tuples, params being the parameter dict of the individual
+    :param timeout: deadline in seconds for the simulation of each individual, None for no deadline
+    :param fail_fast: If True, the first failing individual raises an :class:`IndividualExecutionError`. Otherwise
+        the failure is recorded and the next individual is simulated
+    :return: a tuple (pid, busy_time, results, failures) where results is a list of (ind_idx, fitness) tuples in the
+        order of `work_units` and failures a dictionary mapping the ind_idx of the failed individuals to the
+        formatted traceback
+    """
+    start = time.time()
+    runfunc = _worker_state['runfunc']
+    trajectory = _worker_state['trajectory']
+    results = []
+    failures = {}
+    for ind_idx, params in work_units:
+        ind = Individual(generation, ind_idx, [])
+        for key, val in params.items():
+            ind.f_add_parameter(key, val)
+        trajectory.individual = ind
+        try:
+            with deadline(timeout):
+                results.append((ind_idx, runfunc(trajectory)))
+        except Exception:
+            if fail_fast:
+                raise IndividualExecutionError(ind_idx, generation, traceback.format_exc())
+            failures[ind_idx] = traceback.format_exc()
+    return os.getpid(), time.time() - start, results, failures
+
+
+class PoolRunner:
+    """
+    PoolRunner executes the individuals of the generations on a pool of local worker processes. It is the local
+    alternative to the JUBERunner for machines with many cores that do not need a scheduler.
+
+    The workers are started on the first call to :meth:`run` and survive across generations until :meth:`close` is
+    called. Each worker loads the optimizee once at startup, afterwards only the parameters of the individuals are
+    streamed to the workers.
+    """
+
+    def __init__(self, trajectory, runfunc, n_workers, chunk_size=1, timeout=None):
+        """
+        Initializes the PoolRunner
+
+        :param trajectory: A trajectory object holding the parameters which are shipped to the workers at startup,
+            without the history of the exploration
+        :param runfunc: The function to be called from the optimizee, usually `optimizee.simulate`
+        :param n_workers: Number of worker processes
+        :param chunk_size: Number of individuals sent to a worker in one task
+        :param timeout: Deadline in seconds for the simulation of each individual, None for no deadline
+        """
+        if n_workers < 1:
+            raise ValueError("n_workers needs to be greater than 0")
+        if chunk_size < 1:
+            raise ValueError("chunk_size needs to be greater than 0")
+        self.trajectory = trajectory
+        self.runfunc = runfunc
+        self.n_workers = n_workers
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+        self.executor = None
+        self.start_time = None
+        # Statistics of every worker indexed by pid: number of tasks, number of individuals and busy time
+        self.worker_stats = {}
+        self._n_pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def pool_size(self):
+        """
+        Number of worker processes of the pool
+        """
+        return self.n_workers
+
+    @property
+    def queue_depth(self):
+        """
+        Number of tasks which were submitted to the pool and have not finished yet
+        """
+        with self._lock:
+            return self._n_pending
+
+    def utilization(self):
+        """
+        Fraction of the time since the start of the pool that each worker spent simulating individuals
+        :return: a dictionary indexed by worker pid
+        """
+        if self.start_time is None:
+            return {}
+        elapsed = max(time.time() - self.start_time, 1e-12)
+        return {pid: stats['busy_time'] / elapsed for pid, stats in self.worker_stats.items()}
+
+    def start(self):
+        """
+        Starts the worker processes. Called automatically by :meth:`run` if the pool is not running yet.
+        """
+        if self.executor is None:
+            self.executor = concurrent.futures.ProcessPoolExecutor(max_workers=self.n_workers,
+                                                                   initializer=_init_worker,
+                                                                   initargs=(self.runfunc,
+                                                                             self.trajectory.f_slim_copy()))
+            self.start_time = time.time()
+            logger.info("Started worker pool with %d processes", self.n_workers)
+
+    def close(self):
+        """
+        Shuts down the worker processes
+        """
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+            logger.info("Worker pool shut down. Utilization per worker: %s", self.utilization())
+
+    def submit(self, generation, individuals):
+        """
+        Submits a list of individuals to the pool as one task
+
+        :param generation: id of the generation the individuals belong to
+        :param individuals: list of individuals to simulate
+        :return: a :class:`concurrent.futures.Future` resolving to a list of (ind_idx, fitness) tuples
+        """
+        future = self._submit_chunk(generation, individuals, fail_fast=True)
+        result_future = concurrent.futures.Future()
+
+        def unpack(done_future):
+            try:
+                result_future.set_result(done_future.result()[2])
+            except concurrent.futures.CancelledError:
+                result_future.cancel()
+            except Exception as e:
+                result_future.set_exception(e)
+
+        future.add_done_callback(unpack)
+        result_future.add_done_callback(lambda f: f.cancelled() and future.cancel())
+        return result_future
+
+    def _submit_chunk(self, generation, individuals, fail_fast):
+        self.start()
+        work_units = [(ind.ind_idx, ind.params) for ind in individuals]
+        with self._lock:
+            self._n_pending += 1
+        future = self.executor.submit(_run_chunk, generation, work_units, self.timeout, fail_fast)
+        future.add_done_callback(self._task_done)
+        return future
+
+    def _task_done(self, future):
+        with self._lock:
+            self._n_pending -= 1
+            if future.cancelled() or future.exception() is not None:
+                return
+            pid, busy_time, results, failures = future.result()
+            stats = self.worker_stats.setdefault(pid, {'n_tasks': 0, 'n_individuals': 0, 'busy_time': 0.})
+            stats['n_tasks'] += 1
+            stats['n_individuals'] += len(results) + len(failures)
+            stats['busy_time'] += busy_time
+
+    def run(self, trajectory, generation):
+        """
+        Runs all the individuals of the generation on the worker pool and gathers the results.
+
+        :param trajectory: trajectory object storing individual parameters for each generation
+        :param generation: id of the generation
+        :return results: a list of (ind_idx, fitness) tuples in the order of `trajectory.individuals[generation]`
+        """
+        individuals = trajectory.individuals[generation]
+        chunks = [individuals[i:i + self.chunk_size] for i in range(0, len(individuals), self.chunk_size)]
+
+        logger.info("Running generation %d on %d worker processes in %d chunks", generation, self.n_workers,
+                    len(chunks))
+        futures = [self.submit(generation, chunk) for chunk in chunks]
+        results = []
+        try:
+            # Futures are gathered in submission order to keep the generation order of the results
+            for future in futures:
+                results.extend(future.result())
+        except Exception:
+            for future in futures:
+                future.cancel()
+            raise
+        logger.info("Worker pool: size %d, queue depth %d, utilization %s", self.pool_size, self.queue_depth,
+                    self.utilization())
+        return results
+
+    def run_individuals(self, generation, individuals):
+        """
+        Runs a list of individuals on the worker pool without stopping at the first failure. Individuals which raise
+        or exceed the deadline are reported as failed. If a worker process dies, the individuals of its chunk are
+        reported as failed and the pool is restarted for the next call.
+
+        :param generation: id of the generation
+        :param individuals: list of individuals to simulate
+        :return: a tuple (results, failures) where results is a list of (ind_idx, fitness) tuples in the order of
+            `individuals` and failures a dictionary mapping the ind_idx of the failed individuals to the reason
+        """
+        chunks = [individuals[i:i + self.chunk_size] for i in range(0, len(individuals), self.chunk_size)]
+        futures = [(self._submit_chunk(generation, chunk, fail_fast=False), chunk) for chunk in chunks]
+        results = []
+        failures = {}
+        broken = False
+        for future, chunk in futures:
+            try:
+                _, _, chunk_results, chunk_failures = future.result()
+            except concurrent.futures.BrokenExecutor as e:
+                broken = True
+                failures.update((ind.ind_idx, "Worker process died: {}".format(e)) for ind in chunk)
+                continue
+            results.extend(chunk_results)
+            failures.update(chunk_failures)
+        if broken:
+            logger.warning("A worker process died, the pool is restarted")
+            self.close()
+        return results, failures
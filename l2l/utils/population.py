@@ -0,0 +1,101 @@
+import numpy as np
+
+from l2l import dict_to_list, DictEntryType
+
+
+class Population:
+    """
+    A population of individuals stored as a single contiguous (n, dim) float array. Row i holds the flattened
+    Individual-Dict of individual i, as produced by :func:`~l2l.dict_to_list`. The Dict-Specification is computed
+    once for the whole population and Individual-Dicts are only materialized on demand. The sequence entries of a
+    materialized Individual-Dict are views into the population array.
+    """
+
+    def __init__(self, data, dict_spec):
+        """
+        Initializes the population
+
+        :param data: array-like of shape (n, dim), one flattened individual per row
+        :param dict_spec: The Dict-Specification of the individuals, see :func:`~l2l.dict_to_list`
+        """
+        self.data = np.ascontiguousarray(data, dtype=float)
+        if self.data.ndim == 1:
+            self.data = self.data.reshape(-1, sum(entry[2] for entry in dict_spec))
+        self.dict_spec = dict_spec
+        # Slice of every entry of the Dict-Specification within a row
+        self._slices = []
+        cursor = 0
+        for key, value_type, value_len in dict_spec:
+            self._slices.append((key, value_type, slice(cursor, cursor + value_len)))
+            cursor += value_len
+        if self.data.shape[1] != cursor:
+            raise ValueError("Population of dimension {} does not match the dict specification of dimension {}"
+                             .format(self.data.shape[1], cursor))
+
+    @classmethod
+    def from_individuals(cls, individuals, dict_spec=None):
+        """
+        Creates a population from a list of Individual-Dicts
+
+        :param individuals: list of Individual-Dicts
+        :param dict_spec: The Dict-Specification of the individuals. Computed from the first individual if None
+        :return: the new :class:`Population`
+        """
+        if dict_spec is None:
+            _, dict_spec = dict_to_list(individuals[0], get_dict_spec=True)
+        return cls(np.array([dict_to_list(ind) for ind in individuals]).reshape(len(individuals), -1), dict_spec)
+
+    @property
+    def dim(self):
+        """
+        Length of the flattened individuals
+        """
+        return self.data.shape[1]
+
+    def __len__(self):
+        return self.data.shape[0]
+
+    def __getitem__(self, index):
+        """
+        Materializes the Individual-Dict of the individual at the given index
+        """
+        row = self.data[index]
+        individual = {}
+        for key, value_type, value_slice in self._slices:
+            if value_type == DictEntryType.Sequence:
+                individual[key] = row[value_slice]
+            else:
+                individual[key] = row[value_slice.start]
+        return individual
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def get_grouped_dict(self):
+        """
+        Returns the population grouped by the keys of the Individual-Dicts without materializing them.
+
+        :return: a dictionary with the keys of the Individual-Dicts. Sequence entries map to an (n, length) view of
+            the population array, scalar entries to a view of length n.
+        """
+        grouped_dict = {}
+        for key, value_type, value_slice in self._slices:
+            if value_type == DictEntryType.Sequence:
+                grouped_dict[key] = self.data[:, value_slice]
+            else:
+                grouped_dict[key] = self.data[:, value_slice.start]
+        return grouped_dict
+
+    def apply_bounding(self, bounding_func):
+        """
+        Applies a bounding function to every individual and writes the bounded values back into the population
+
+        :param bounding_func: function taking and returning an Individual-Dict
+        :return: the population itself
+        """
+        for i in range(len(self)):
+            bounded = bounding_func(self[i])
+            for key, _, value_slice in self._slices:
+                self.data[i, value_slice] = bounded[key]
+        return self
@@ -0,0 +1,127 @@
+import logging
+import os
+import pickle
+import re
+import shutil
+
+import numpy as np
+
+from l2l.utils.population import Population
+
+logger = logging.getLogger("utils.ResultStore")
+
+
+class ResultStore:
+    """
+    ResultStore persists the results of the outer loop generation by generation. Every generation is written to its
+    own directory as soon as it is complete, with one .npy file per column:
+
+    - `ind_idx.npy`: the indices of the evaluated individuals, shape (n,)
+    - `fitness.npy`: their fitnesses, shape (n, n_fitness)
+    - `individuals.npy`: their flattened parameters, shape (n, dim), see :class:`~l2l.utils.population.Population`
+
+    The Dict-Specification of the individuals and the parameters the optimizer recorded for the generation are
+    pickled next to the columns. A generation directory is written under a temporary name and renamed when it is
+    complete, so an interrupted run never leaves a partial generation behind. The columns are memory-mapped when
+    read back.
+    """
+
+    _generation_dir = re.compile(r'^generation_(\d+)$')
+
+    def __init__(self, path):
+        """
+        Initializes the store, creating its directory if needed. The generations already stored in `path` are kept.
+
+        :param path: Directory of the store
+        """
+        self.path = os.path.abspath(path)
+        os.makedirs(self.path, exist_ok=True)
+
+    def _generation_path(self, generation):
+        return os.path.join(self.path, 'generation_{:05d}'.format(generation))
+
+    @property
+    def generations(self):
+        """
+        Sorted list of the ids of the stored generations
+        """
+        generations = []
+        for name in os.listdir(self.path):
+            match = self._generation_dir.match(name)
+            if match:
+                generations.append(int(match.group(1)))
+        return sorted(generations)
+
+    def append_generation(self, generation, individuals, results):
+        """
+        Writes the individuals of a generation and their fitnesses. A generation which was already stored is
+        replaced.
+
+        :param generation: id of the generation
+        :param individuals: list of :class:`~l2l.utils.individual.Individual` of the generation
+        :param results: list of (ind_idx, fitness) tuples of the generation
+        """
+        by_idx = {ind.ind_idx: ind for ind in individuals}
+        individual_dicts = []
+        for ind_idx, _ in results:
+            params = by_idx[ind_idx].params
+            individual_dicts.append({key.split('.', 1)[-1]: value for key, value in params.items()})
+        if individual_dicts:
+            population = Population.from_individuals(individual_dicts)
+            data, dict_spec = population.data, population.dict_spec
+        else:
+            data, dict_spec = np.zeros((0, 0)), []
+
+        final_path = self._generation_path(generation)
+        tmp_path = final_path + '.tmp'
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        np.save(os.path.join(tmp_path, 'ind_idx.npy'), np.array([ind_idx for ind_idx, _ in results], dtype=int))
+        np.save(os.path.join(tmp_path, 'fitness.npy'),
+                np.array([np.atleast_1d(fitness) for _, fitness in results], dtype=float).reshape(len(results), -1))
+        np.save(os.path.join(tmp_path, 'individuals.npy'), data)
+        with open(os.path.join(tmp_path, 'dict_spec.pkl'), 'wb') as handle:
+            pickle.dump(dict_spec, handle)
+        if os.path.isdir(final_path):
+            shutil.rmtree(final_path)
+        os.replace(tmp_path, final_path)
+        logger.info("Stored %d results of generation %d in %s", len(results), generation, final_path)
+
+    def add_generation_params(self, generation, params):
+        """
+        Writes the parameters the optimizer recorded for a stored generation
+
+        :param generation: id of the generation
+        :param params: dictionary of parameters
+        """
+        fname = os.path.join(self._generation_path(generation), 'generation_params.pkl')
+        with open(fname + '.tmp', 'wb') as handle:
+            pickle.dump(params, handle)
+        os.replace(fname + '.tmp', fname)
+
+    def load_generation(self, generation, mmap_mode='r'):
+        """
+        Reads a stored generation
+
+        :param generation: id of the generation
+        :param mmap_mode: mode used to memory-map the columns, see :func:`numpy.load`. None loads them in memory
+        :return: a dictionary with the `ind_idx` and `fitness` arrays, the `individuals` as a
+            :class:`~l2l.utils.population.Population` and the `generation_params` (None if not recorded)
+        """
+        path = self._generation_path(generation)
+        if not os.path.isdir(path):
+            raise KeyError("Generation {} is not stored in {}".format(generation, self.path))
+        with open(os.path.join(path, 'dict_spec.pkl'), 'rb') as handle:
+            dict_spec = pickle.load(handle)
+        data = np.load(os.path.join(path, 'individuals.npy'), mmap_mode=mmap_mode)
+        generation_params = None
+        params_fname = os.path.join(path, 'generation_params.pkl')
+        if os.path.isfile(params_fname):
+            with open(params_fname, 'rb') as handle:
+                generation_params = pickle.load(handle)
+        return {
+            'ind_idx': np.load(os.path.join(path, 'ind_idx.npy'), mmap_mode=mmap_mode),
+            'fitness': np.load(os.path.join(path, 'fitness.npy'), mmap_mode=mmap_mode),
+            'individuals': Population(data, dict_spec) if dict_spec else data,
+            'generation_params': generation_params,
+        }
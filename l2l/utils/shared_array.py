@@ -0,0 +1,72 @@
+import logging
+import os
+
+import numpy as np
+
+logger = logging.getLogger("utils.SharedArray")
+
+
+class SharedArray:
+    """
+    Handle to a large read-only NumPy array, e.g. the dataset of an optimizee. An array created with :meth:`create`
+    is written once to a .npy file. The handle only pickles the path of that file and every process which loads the
+    handle memory-maps the file on first access, so the processes of a node share a single copy of the array in the
+    page cache instead of unpickling a private copy each.
+
+    A handle created directly from an array without a file keeps the array in memory and pickles it along.
+    """
+
+    def __init__(self, array=None, fname=None):
+        """
+        Initializes the handle
+
+        :param array: The array held in memory. Ignored if `fname` is given
+        :param fname: Path of the .npy file holding the array
+        """
+        if array is None and fname is None:
+            raise ValueError("Either an array or a file name is needed")
+        self.fname = fname
+        self._array = array if fname is None else None
+
+    @classmethod
+    def create(cls, array, path, name):
+        """
+        Writes an array to the file `name`.npy in the directory `path` and returns a handle to it. The file is
+        written under a temporary name of the process and renamed when it is complete, so that processes creating
+        the same file at the same time do not corrupt it.
+
+        :param array: The array to share
+        :param path: Directory of the file, usually :attr:`~l2l.paths.Paths.data_path`
+        :param name: Name of the array
+        :return: the :class:`SharedArray` handle
+        """
+        fname = os.path.join(path, name + '.npy')
+        tmp_fname = '{}.{}.tmp'.format(fname, os.getpid())
+        with open(tmp_fname, 'wb') as handle:
+            np.save(handle, np.asarray(array))
+        os.replace(tmp_fname, fname)
+        logger.info("Shared array %s of shape %s written to %s", name, np.shape(array), fname)
+        return cls(fname=fname)
+
+    @property
+    def array(self):
+        """
+        The array. Memory-mapped read-only from the file when the handle has one
+        """
+        if self._array is None:
+            self._array = np.load(self.fname, mmap_mode='r')
+        return self._array
+
+    def __array__(self, dtype=None):
+        return np.asarray(self.array, dtype=dtype)
+
+    def __len__(self):
+        return len(self.array)
+
+    def __getstate__(self):
+        if self.fname is None:
+            return {'fname': None, '_array': self._array}
+        return {'fname': self.fname, '_array': None}
+
+    def __setstate__(self, d):
+        self.__dict__.update(d)
@@ -26,12 +26,49 @@ class Trajectory:
         self.individual = Individual()
         self.results = ResultGroup()
         self.results.f_add_result_group('all_results', "Contains all the results")
-        self.current_results = {}
+        self._current_results = []
+        self._run_positions = {}
+        self._n_indexed_results = 0
         self._parameters.parameter_group = {}
         self._parameters.parameter = {}
         self.individuals = {}
         self.v_idx = 0
 
+    @property
+    def current_results(self):
+        """
+        The list of (run_idx, fitness) tuples of the last executed generation
+        """
+        return self._current_results
+
+    @current_results.setter
+    def current_results(self, results):
+        self._current_results = results
+        self._run_positions = {}
+        self._n_indexed_results = 0
+
+    def f_get_run_position(self, run_idx):
+        """
+        Returns the position of a run within the current results. The map from run index to position is built once
+        for every new set of results and extended with results appended afterwards, so each lookup takes constant
+        time.
+        :param run_idx: index of the run, i.e. the first element of a tuple in the current results
+        :return: the position of the first result of the run in the current results
+        :exception: Produces a ValueError if the run is not part of the current results
+        """
+        if len(self._current_results) < self._n_indexed_results:
+            # The current results were cleared in place
+            self._run_positions = {}
+            self._n_indexed_results = 0
+        # Only results which were not indexed yet are added to the map
+        for position in range(self._n_indexed_results, len(self._current_results)):
+            self._run_positions.setdefault(self._current_results[position][0], position)
+        self._n_indexed_results = len(self._current_results)
+        try:
+            return self._run_positions[run_idx]
+        except KeyError:
+            raise ValueError("{} is not a run index of the current results".format(run_idx))
+
     def f_add_parameter_group(self, name, comment=""):
         """
         Adds a new parameter group
@@ -107,15 +144,59 @@ class Trajectory:
                 params[key] = build_dict[key]
 
         generation = gen[0]
-        self.individuals[generation] = []
+        # The individuals share the parameter lists of the build_dict instead of holding a copy of their values
+        self.individuals[generation] = [Individual(generation, i, columns=params) for i in ind_idx]
+        logging.info("Expanded trajectory for generation: " + str(generation))
 
-        for i in ind_idx:
-            ind = Individual(generation,i,[])
-            for j in params:
-                ind.f_add_parameter(j, params[j][i])
-            self.individuals[generation].append(ind)
+    def f_expand_population(self, population, generation):
+        """
+        Adds a new generation whose individuals are the rows of a population. Unlike :meth:`f_expand`, the parameters
+        of the individuals are not copied: they are views into the population array.
+        :param population: The :class:`~l2l.utils.population.Population` to be explored
+        :param generation: The id of the new generation
+        """
+        columns = {'individual.' + key: values for key, values in population.get_grouped_dict().items()}
+        self.individuals[generation] = [Individual(generation, i, columns=columns) for i in range(len(population))]
         logging.info("Expanded trajectory for generation: " + str(generation))
 
+    def f_slim_copy(self):
+        """
+        Returns a copy of the trajectory without the history of the exploration: the copy holds the parameters but
+        neither the individuals of the generations nor the results. Used to ship the trajectory to the processes
+        executing the individuals, whose `simulate` only reads the parameters and the current individual.
+        The parameters are shared with the trajectory, not copied.
+        :return: the slim trajectory
+        """
+        slim = Trajectory.__new__(Trajectory)
+        slim.__dict__.update(self.__dict__)
+        slim._parameters = ParameterDict(slim)
+        for key, val in self._parameters._data.items():
+            if key != 'trajectory':
+                slim._parameters._data[key] = val
+        slim._results = {}
+        slim.results = ResultGroup()
+        slim.results.f_add_result_group('all_results', "Contains all the results")
+        slim.current_results = []
+        slim.individuals = {}
+        return slim
+
+    def f_remove_generation(self, generation):
+        """
+        Removes the individuals, the results and the generation parameters of a generation from the trajectory.
+        Used to keep only a window of generations in memory when the results are persisted to a
+        :class:`~l2l.utils.result_store.ResultStore`.
+        :param generation: The id of the generation
+        """
+        self.individuals.pop(generation, None)
+        self.results.all_results.f_remove_result(generation)
+        generation_params = self.results.f_get_result('generation_params')
+        if generation_params is not None:
+            generation_params.f_remove_result('generation_{}'.format(generation))
+        for group_name in ['failed_individuals', 'evaluation_cache']:
+            group = self.results.f_get_result(group_name)
+            if group is not None:
+                group.f_remove_result(generation)
+
     def __str__(self):
         return str(self._parameters)
 
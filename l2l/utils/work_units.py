@@ -0,0 +1,87 @@
+import os
+import pickle
+import struct
+
+# Size of the footer holding the offset of the index at the end of a work unit file
+_FOOTER = struct.Struct('<Q')
+
+#: Subdirectories of the simulation path holding the work units, the results and the ready files of the individuals.
+#: They are shared by the runners and the processes simulating the individuals
+WORK_UNITS_DIR = 'trajectories'
+RESULTS_DIR = 'results'
+READY_DIR = 'ready_files'
+
+
+def work_units_fname(simulation_path, generation):
+    """
+    Path of the file holding the work units of a generation, see :func:`write_work_units`
+    """
+    return os.path.join(simulation_path, WORK_UNITS_DIR, 'work_units_%s.bin' % generation)
+
+
+def result_fname(simulation_path, generation, ind_idx):
+    """
+    Path of the file holding the pickled fitness of an individual
+    """
+    return os.path.join(simulation_path, RESULTS_DIR, 'results_%s_%s.bin' % (ind_idx, generation))
+
+
+def error_fname(simulation_path, generation, ind_idx):
+    """
+    Path of the file holding the traceback of an individual whose simulation raised
+    """
+    return os.path.join(simulation_path, RESULTS_DIR, 'error_%s_%s.txt' % (ind_idx, generation))
+
+
+def ready_fname(simulation_path, generation, ind_idx):
+    """
+    Path of the file marking the end of the simulation of an individual, written after its result or its error
+    """
+    return os.path.join(simulation_path, READY_DIR, 'ready_%s_%s' % (generation, ind_idx))
+
+
+def write_work_units(fname, trajectory, individuals):
+    """
+    Writes the work units of one generation into a single indexed file. The file holds the trajectory once, followed
+    by every individual and an index mapping the ind_idx of the individuals to their offset in the file. The file is
+    written under a temporary name and renamed when it is complete.
+
+    :param fname: Path of the work unit file
+    :param trajectory: The trajectory shipped with every work unit, usually a slim copy without history (see
+        :meth:`~l2l.utils.trajectory.Trajectory.f_slim_copy`)
+    :param individuals: list of individuals of the generation
+    """
+    tmp_fname = fname + '.tmp'
+    index = {}
+    with open(tmp_fname, 'wb') as handle:
+        pickle.dump(trajectory, handle, pickle.HIGHEST_PROTOCOL)
+        for ind in individuals:
+            index[ind.ind_idx] = handle.tell()
+            pickle.dump(ind, handle, pickle.HIGHEST_PROTOCOL)
+        index_offset = handle.tell()
+        pickle.dump(index, handle, pickle.HIGHEST_PROTOCOL)
+        handle.write(_FOOTER.pack(index_offset))
+    os.replace(tmp_fname, fname)
+
+
+def read_work_unit(fname, ind_idx):
+    """
+    Reads the work unit of one individual from a file written by :func:`write_work_units`. Only the trajectory and
+    the individual are unpickled.
+
+    :param fname: Path of the work unit file
+    :param ind_idx: index of the individual
+    :return: the trajectory, with `trajectory.individual` set to the individual
+    """
+    with open(fname, 'rb') as handle:
+        handle.seek(-_FOOTER.size, os.SEEK_END)
+        index_offset, = _FOOTER.unpack(handle.read(_FOOTER.size))
+        handle.seek(index_offset)
+        index = pickle.load(handle)
+        if ind_idx not in index:
+            raise KeyError("Individual {} is not part of the work units in {}".format(ind_idx, fname))
+        handle.seek(0)
+        trajectory = pickle.load(handle)
+        handle.seek(index[ind_idx])
+        trajectory.individual = pickle.load(handle)
+    return trajectory